@@ -6,9 +6,11 @@ from .environment import *
 class ASGBetaSubstitutionContext:
     def __init__(self) -> None:
         self.substitutionTable = {}
+        self.substitutedNodeMask = 0
 
     def setSubstitutionForNode(self, oldNode: ASGNode, replacedNode: ASGNode):
         self.substitutionTable[oldNode] = replacedNode
+        self.substitutedNodeMask |= oldNode.getBetaReplaceableNodeBit()
 
     def getSubstitutionFor(self, node):
         return self.substitutionTable.get(node, node)
@@ -19,11 +21,8 @@ class ASGBetaSubstitutionContext:
     def includesNode(self, node) -> bool:
         return node in self.substitutionTable
     
-    def includesAnyOf(self, listOfNodes) -> bool:
-        for node in listOfNodes:
-            if self.includesNode(node):
-                return True
-        return False
+    def mayAffectNode(self, node: ASGNode) -> bool:
+        return (node.betaReplaceableDependencyMask() & self.substitutedNodeMask) != 0
 
 class ASGReductionAlgorithm(ASGDynamicProgrammingReductionAlgorithm):
     @asgPatternMatchingOnNodeKind(ASGApplicationNode, when = lambda n: n.isLiteralAlwaysReducedPrimitiveApplication() or n.isLiteralPureCompileTimePrimitiveApplication())
@@ -51,12 +50,16 @@ class ASGBetaSubstitutionAlgorithm(ASGDynamicProgrammingAlgorithm):
         if self.substitutionContext.includesNode(node):
             return self.substitutionContext.getSubstitutionFor(node)
         
-        betaReplaceableDependencies = node.betaReplaceableDependencies()
-        if not self.substitutionContext.includesAnyOf(betaReplaceableDependencies):
+        if not self.substitutionContext.mayAffectNode(node):
             return node
 
         return self(node)
 
+    def requiresRecursiveSubstitutionOf(self, node: ASGNode) -> bool:
+        if self.substitutionContext.isEmpty() or self.substitutionContext.includesNode(node):
+            return False
+        return self.substitutionContext.mayAffectNode(node)
+
     @asgPatternMatchingOnNodeKind(ASGBetaReplaceableNode)
     def expandBetaReplaceableNode(self, node: ASGBetaReplaceableNode) -> ASGTypecheckedNode:
         if not self.substitutionContext.includesNode(node):
@@ -83,6 +86,55 @@ class ASGBetaSubstitutionAlgorithm(ASGDynamicProgrammingAlgorithm):
             expandedParameters.append(self.expandParameter(attribute))
         return node.__class__(*expandedParameters)
 
+class ASGQuasiQuoteTemplate:
+    ## Precompiled once; instantiating only rebuilds the paths that lead into the unquoted holes.
+    def __init__(self, term: ASGNode) -> None:
+        self.term = term
+        self.holes = []
+        self.splices = []
+        self.rebuiltNodes = set()
+
+        def childrenOf(node: ASGNode):
+            ## The unquotes of a nested quasi-quote belong to it.
+            if node.isKindOf(ASGSyntaxQuasiUnquoteNode) or node.isKindOf(ASGSyntaxSpliceNode) or node.isKindOf(ASGSyntaxQuasiQuoteNode):
+                return ()
+            return filter(lambda child: isinstance(child, ASGNode), self.flattenedAttributeValuesOf(node))
+
+        def collectHoles(node: ASGNode):
+            if node.isKindOf(ASGSyntaxQuasiUnquoteNode):
+                self.holes.append(node)
+                self.rebuiltNodes.add(node)
+            elif node.isKindOf(ASGSyntaxSpliceNode):
+                self.splices.append(node)
+            elif any(map(lambda child: child in self.rebuiltNodes, childrenOf(node))):
+                self.rebuiltNodes.add(node)
+
+        asgDepthFirstPostOrderDo(term, childrenOf, collectHoles)
+
+    def flattenedAttributeValuesOf(self, node: ASGNode):
+        for value in node.getAllConstructionAttributes():
+            if isinstance(value, tuple):
+                yield from value
+            else:
+                yield value
+
+    def instantiateWith(self, holeValues: list[ASGNode]) -> ASGNode:
+        instantiatedNodes = dict(zip(self.holes, holeValues))
+
+        def instantiate(value):
+            if isinstance(value, tuple):
+                return tuple(map(instantiate, value))
+            elif not isinstance(value, ASGNode) or value not in self.rebuiltNodes:
+                return value
+
+            instantiatedNode = instantiatedNodes.get(value, None)
+            if instantiatedNode is None:
+                instantiatedNode = value.__class__(*map(instantiate, value.getAllConstructionAttributes()))
+                instantiatedNodes[value] = instantiatedNode
+            return instantiatedNode
+
+        return instantiate(self.term)
+
 class ASGTypecheckingErrorAcumulator:
     def __init__(self) -> None:
         self.errorList = []
@@ -91,25 +143,40 @@ class ASGTypecheckingErrorAcumulator:
         self.errorList.append(error)
 
 class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
-    def __init__(self, environment: ASGEnvironment, builder: ASGBuilderWithGVNAndEnvironment = None, reductionAlgorithm: ASGReductionAlgorithm = None, errorAccumulator = None, expansionLevel = 0) -> None:
+    def __init__(self, environment: ASGEnvironment, builder: ASGBuilderWithGVNAndEnvironment = None, reductionAlgorithm: ASGReductionAlgorithm = None, errorAccumulator = None, expansionLevel = 0, overloadResolutionMemo: dict = None, dependentInstantiationCache: ModuleDependentInstantiationCache = None, macroExpansionCache: ModuleMacroExpansionCache = None) -> None:
         super().__init__()
         self.environment = environment
         self.builder = builder
         self.reductionAlgorithm = reductionAlgorithm
         self.errorAccumulator = errorAccumulator
         self.expansionLevel = expansionLevel
+        self.overloadResolutionMemo = overloadResolutionMemo
+        self.dependentInstantiationCache = dependentInstantiationCache
+        self.macroExpansionCache = macroExpansionCache
         if self.builder is None:
             self.builder = ASGBuilderWithGVNAndEnvironment(None, self.environment.getTopLevelTargetEnvironment())
         if self.reductionAlgorithm is None:
             self.reductionAlgorithm = ASGReductionAlgorithm()
         if self.errorAccumulator is None:
             self.errorAccumulator = ASGTypecheckingErrorAcumulator()
+        if self.overloadResolutionMemo is None:
+            self.overloadResolutionMemo = {}
+        if self.dependentInstantiationCache is None:
+            ## Without a module, the instantiations are only shared during this analysis.
+            self.dependentInstantiationCache = self.environment.getDependentInstantiationCache()
+            if self.dependentInstantiationCache is None:
+                self.dependentInstantiationCache = ModuleDependentInstantiationCache()
+        if self.macroExpansionCache is None:
+            ## Without a module, the macro expansions are only shared during this analysis.
+            self.macroExpansionCache = self.environment.getMacroExpansionCache()
+            if self.macroExpansionCache is None:
+                self.macroExpansionCache = ModuleMacroExpansionCache()
 
     def withDivergingEnvironment(self, newEnvironment: ASGEnvironment):
-        return ASGExpandAndTypecheckingAlgorithm(newEnvironment, ASGBuilderWithGVNAndEnvironment(self.builder, newEnvironment.getTopLevelTargetEnvironment()), self.reductionAlgorithm, self.errorAccumulator, self.expansionLevel + 1)
+        return ASGExpandAndTypecheckingAlgorithm(newEnvironment, ASGBuilderWithGVNAndEnvironment(self.builder, newEnvironment.getTopLevelTargetEnvironment()), self.reductionAlgorithm, self.errorAccumulator, self.expansionLevel + 1, self.overloadResolutionMemo, self.dependentInstantiationCache, self.macroExpansionCache)
 
     def withNextMacroExpansionLevel(self):
-        return ASGExpandAndTypecheckingAlgorithm(self.environment, self.builder, self.reductionAlgorithm, self.errorAccumulator, self.expansionLevel + 1)
+        return ASGExpandAndTypecheckingAlgorithm(self.environment, self.builder, self.reductionAlgorithm, self.errorAccumulator, self.expansionLevel + 1, self.overloadResolutionMemo, self.dependentInstantiationCache, self.macroExpansionCache)
 
     def withFunctionalAnalysisEnvironment(self, newEnvironment: ASGFunctionalAnalysisEnvironment):
         return self.withDivergingEnvironment(newEnvironment)
@@ -162,7 +229,7 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
 
         # Coercion
         expectedTypeNode = expectedType.asASGTypeNode()
-        analyzedNode = expectedTypeNode.coerceExpressionWith(analyzedNode, self)
+        analyzedNode = expectedTypeNode.coerceExpressionWith(analyzedNode, self).asASGDataNode()
 
         # Type checking
         analyzedNodeType = analyzedNode.getTypeInEnvironment(self.environment)
@@ -386,6 +453,7 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
 
         body, bodyTypechecked = functionalAnalyzer.analyzeNodeWithExpectedType(node.body, resultType)
         bodyReturn = functionalAnalyzer.builder.forSyntaxExpansionBuildAndSequence(self, node, ASGSequenceReturnNode, body, predecessor = functionalAnalyzer.builder.currentPredecessor)
+        functionalAnalyzer.builder.exitScope()
         
         pureFunctional = bodyReturn.isPureSequencing()
         return self.builder.forSyntaxExpansionBuildAndSequence(self, node, ASGLambdaNode, piType, typedArguments, entryPoint, exitPoint = bodyReturn, name = name, callingConvention = node.callingConvention, pureFunctional = pureFunctional)
@@ -413,6 +481,7 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
         functionalAnalyzer.builder.currentPredecessor = None
 
         resultType = functionalAnalyzer.analyzeTypeExpression(node.resultType)
+        functionalAnalyzer.builder.exitScope()
         return self.builder.forSyntaxExpansionBuildAndSequence(self, node, ASGPiNode, typedArguments, resultType, isVariadic = node.isVariadic, callingConvention = node.callingConvention)
 
     @asgPatternMatchingOnNodeKind(ASGSyntaxLexicalBlockNode)
@@ -451,10 +520,15 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
     @asgPatternMatchingOnNodeKind(ASGSyntaxIdentifierReferenceNode)
     def expandSyntaxIdentifierReferenceNode(self, node: ASGSyntaxIdentifierReferenceNode) -> ASGTypecheckedNode:
         self.syntaxPredecessorOf(node)
-        lookupResults = self.environment.lookSymbolBindingListRecursively(node.value)
-        if len(lookupResults) == 0:
+        ## The overloads are only collected when the innermost binding is functional.
+        innermostBinding = self.environment.lookSymbolBindingRecursively(node.value)
+        if innermostBinding is None:
             return self.makeErrorAtNode('Failed to finding binding for symbol %s.' % node.value, node)
-        elif len(lookupResults) == 1 or not lookupResults[0].getTypeInEnvironment(self.environment).isFunctionalTypeNode():
+        elif not innermostBinding.getTypeInEnvironment(self.environment).isFunctionalTypeNode():
+            return innermostBinding.expandSyntaxBindingReferenceWith(node, self)
+        
+        lookupResults = self.environment.lookSymbolBindingListRecursively(node.value)
+        if len(lookupResults) == 1:
             return lookupResults[0].expandSyntaxBindingReferenceWith(node, self)
         else:
             # Select the first overloaded functionals.
@@ -478,9 +552,15 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
             return self.builder.forSyntaxExpansionBuildAndSequence(self, node, ASGOverloadedAlternativesNode, overloadedType, overloadedAlternatives)
 
     def evaluateAndExpandMacroExpression(self, macroExpression: ASGNode, expansionLocation: ASGNode) -> ASGTypecheckedNode:
-        macroExpressionResult = self.evaluateMacroExpression(macroExpression)
+        ## The macro expressions are evaluated once per module, and their result is expanded at every call site.
+        evaluatedMacroExpressions = self.macroExpansionCache.evaluatedMacroExpressions
+        macroExpressionResult = evaluatedMacroExpressions.get(macroExpression, None)
         if macroExpressionResult is None:
-            return self.makeErrorAtNode('Failed to evaluate macro expression.', expansionLocation)
+            macroExpressionResult = self.evaluateMacroExpression(macroExpression)
+            if macroExpressionResult is None:
+                return self.makeErrorAtNode('Failed to evaluate macro expression.', expansionLocation)
+            evaluatedMacroExpressions[macroExpression] = macroExpressionResult
+
         #return self(macroExpressionResult)
         return self.withNextMacroExpansionLevel()(macroExpressionResult)
 
@@ -551,6 +631,21 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
             return singleArgument.elements
         return arguments
 
+    def instantiateDependentTypeNode(self, dependentType: ASGPiNode, node: ASGNode, substitutionAlgorithm: ASGBetaSubstitutionAlgorithm, substitutedArguments: list[ASGNode]) -> ASGNode:
+        if not substitutionAlgorithm.requiresRecursiveSubstitutionOf(node):
+            return substitutionAlgorithm.expandNode(node)
+
+        ## Only the arguments that are used by the node are part of the key.
+        usedDependencyMask = node.betaReplaceableDependencyMask()
+        usedArguments = tuple(substitutedArguments[i] for i in range(len(substitutedArguments)) if dependentType.arguments[i].getBetaReplaceableNodeBit() & usedDependencyMask)
+        instantiationCache = self.dependentInstantiationCache
+        instantiationKey = (dependentType, node, usedArguments)
+        instantiation = instantiationCache.lookup(instantiationKey)
+        if instantiation is None:
+            instantiation = substitutionAlgorithm.expandNode(node)
+            instantiationCache.store(instantiationKey, instantiation)
+        return instantiation
+
     def expandDependentApplicationWithType(self, node: ASGSyntaxApplicationNode, dependentType: ASGPiNode):
         self.syntaxPredecessorOf(node)
 
@@ -569,7 +664,7 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
         for i in range(directCheckeableArgumentCount):
             argumentValue: ASGNode = expandedArguments[i]
             argumentSpecification: ASGArgumentNode = dependentType.arguments[i]
-            expectedType = substitutionAlgorithm.expandNode(argumentSpecification.type)
+            expectedType = self.instantiateDependentTypeNode(dependentType, argumentSpecification.type, substitutionAlgorithm, analyzedArguments)
             analyzedArgument, typechecked = self.analyzeNodeWithExpectedType(argumentValue, expectedType)
             analyzedArguments.append(analyzedArgument)
             substitutionAlgorithm.substitutionContext.setSubstitutionForNode(argumentSpecification, analyzedArgument)
@@ -584,7 +679,7 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
             analyzedArguments.append(analyzedArgument)
 
         # Analyze the result type.
-        resultType = substitutionAlgorithm.expandNode(dependentType.resultType)
+        resultType = self.instantiateDependentTypeNode(dependentType, dependentType.resultType, substitutionAlgorithm, analyzedArguments[:directCheckeableArgumentCount])
 
         # Make the application node
         if dependentType.isPureFunctional() or functional.isPureFunctionalValue():
@@ -650,29 +745,91 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
         
         return application
     
+    def isOverloadedAlternativeTypeRankable(self, alternativeType: ASGNode, argumentCount: int) -> bool:
+        ## Dependent and macro alternatives, and alternatives that unpack a single tuple argument, are only selected by attempting their expansion.
+        if not isinstance(alternativeType, ASGFunctionTypeNode):
+            return False
+        return argumentCount != 1 or len(alternativeType.arguments) <= 1
+
+    def rankOverloadedAlternativeType(self, alternativeType: ASGFunctionTypeNode, analyzedArguments: list[ASGNode], argumentTypes: list[ASGNode]) -> int:
+        ## 0 for a direct match, 1 when the arguments need a coercion, None when not applicable.
+        requiredArgumentCount = len(alternativeType.arguments)
+        availableArgumentCount = len(argumentTypes)
+        if requiredArgumentCount != availableArgumentCount and (not alternativeType.isVariadic or availableArgumentCount < requiredArgumentCount):
+            return None
+
+        rank = 0
+        for i in range(requiredArgumentCount):
+            expectedTypeNode = alternativeType.arguments[i].asASGTypeNode()
+            if expectedTypeNode.isSatisfiedAsTypeBy(argumentTypes[i]):
+                continue
+
+            ## The coercions only depend on the types, so that attempting one on the actual argument is enough.
+            builderMemento = self.builder.memento()
+            errorMemento = self.errorAccumulator
+            self.errorAccumulator = ASGTypecheckingErrorAcumulator()
+            coercedArgument = expectedTypeNode.coerceExpressionWith(analyzedArguments[i], self).asASGDataNode()
+            isCoerced = len(self.errorAccumulator.errorList) == 0 and expectedTypeNode.isSatisfiedAsTypeBy(coercedArgument.getTypeInEnvironment(self.environment))
+            self.errorAccumulator = errorMemento
+            self.builder.restoreMemento(builderMemento)
+            if not isCoerced:
+                return None
+            rank = 1
+
+        return rank
+
+    def selectOverloadedAlternativeIndex(self, overloadedType: ASGOverloadedTypeNode, analyzedArguments: list[ASGNode], argumentTypes: list[ASGNode]) -> int:
+        memoKey = (overloadedType, tuple(argumentTypes))
+        if memoKey in self.overloadResolutionMemo:
+            return self.overloadResolutionMemo[memoKey]
+
+        ## Exact matches are preferred over the alternatives that require coercions. Ties are resolved in declaration order.
+        bestIndex = None
+        bestRank = None
+        for i in range(len(overloadedType.alternatives)):
+            rank = self.rankOverloadedAlternativeType(overloadedType.alternatives[i], analyzedArguments, argumentTypes)
+            if rank is not None and (bestRank is None or rank < bestRank):
+                bestIndex = i
+                bestRank = rank
+                if rank == 0:
+                    break
+
+        self.overloadResolutionMemo[memoKey] = bestIndex
+        return bestIndex
+
+    def expandOverloadedAlternativeApplication(self, node: ASGSyntaxApplicationNode, overloadedType: ASGOverloadedTypeNode, overloadedFunctional: ASGNode, alternativeIndex: int) -> ASGSyntaxApplicationNode:
+        alternativeType = overloadedType.alternatives[alternativeIndex]
+        functionalAlternative = self.builder.forSyntaxExpansionBuild(self, node, ASGOverloadedAlternativeSelectionNode, alternativeType, alternativeIndex, overloadedFunctional)
+        functionalAlternative = self.reductionAlgorithm(functionalAlternative.asASGDataNode())
+        return ASGSyntaxApplicationNode(ASGNodeSyntaxExpansionDerivation(self, node), functionalAlternative, node.arguments, kind = node.kind)
+
     def expandOverloadedApplicationWithType(self, node: ASGSyntaxApplicationNode, overloadedType: ASGOverloadedTypeNode):
         self.syntaxPredecessorOf(node)
 
         overloadedFunctional = self(node.functional)
 
-        alternativesWithErrors = []
+        ## The arguments are analyzed once, and the alternatives are ranked by their types.
+        argumentCount = len(node.arguments)
+        if all(self.isOverloadedAlternativeTypeRankable(alternativeType, argumentCount) for alternativeType in overloadedType.alternatives):
+            analyzedArguments = list(map(lambda argument: self(argument).asASGDataNode(), node.arguments))
+            argumentTypes = list(map(lambda argument: argument.getTypeInEnvironment(self.environment), analyzedArguments))
+            alternativeIndex = self.selectOverloadedAlternativeIndex(overloadedType, analyzedArguments, argumentTypes)
+            if alternativeIndex is None:
+                return self.makeOverloadedAlternativeNotFoundErrorAtNode(node)
+            return self(self.expandOverloadedAlternativeApplication(node, overloadedType, overloadedFunctional, alternativeIndex))
 
         for i in range(len(overloadedType.alternatives)):
-            alternativeType = overloadedType.alternatives[i]
-            functionalAlternative = self.builder.forSyntaxExpansionBuild(self, node, ASGOverloadedAlternativeSelectionNode, alternativeType, i, overloadedFunctional)
-            functionalAlternative = self.reductionAlgorithm(functionalAlternative.asASGDataNode())
-
-            alternativeApplicationNode = ASGSyntaxApplicationNode(ASGNodeSyntaxExpansionDerivation(self, node), functionalAlternative, node.arguments, kind = node.kind)
+            alternativeApplicationNode = self.expandOverloadedAlternativeApplication(node, overloadedType, overloadedFunctional, i)
             alternativeExpandedResult, expansionTypecheckingErrors = self.attemptExpansionOfNode(alternativeApplicationNode)
             if len(expansionTypecheckingErrors) == 0:
                 return alternativeExpandedResult
-            
-            alternativesWithErrors.append((functionalAlternative, expansionTypecheckingErrors))
 
         # Ensure the arguments are checked for generating the error messages.
         for argument in node.arguments:
             self(argument)
+        return self.makeOverloadedAlternativeNotFoundErrorAtNode(node)
 
+    def makeOverloadedAlternativeNotFoundErrorAtNode(self, node: ASGSyntaxApplicationNode) -> ASGTypecheckedNode:
         # TODO: Properly format the error message.
         return self.makeErrorAtNode('Failed to find matching overloaded alternative.', node)
     
@@ -711,6 +868,7 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
         entryPoint = branchAnalyzer.builder.forSyntaxExpansionBuildAndSequence(self, node, ASGSequenceEntryNode)
         branchResult = branchAnalyzer(node)
         exitPoint = branchAnalyzer.builder.currentPredecessor
+        branchAnalyzer.builder.exitScope()
         return entryPoint, exitPoint, branchResult, branchAnalyzer
 
     def analyzeOptionalDivergentBranchExpression(self, divergenceNode: ASGNode, branchNode: ASGNode) -> tuple[ASGSequenceEntryNode, ASGNode]:
@@ -725,6 +883,7 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
         else:
             branchResult = self.expandVoidConstantFor(expansionNode)
         exitPoint = branchAnalyzer.builder.currentPredecessor
+        branchAnalyzer.builder.exitScope()
         return entryPoint, exitPoint, branchResult, branchAnalyzer
         
     def mergeTypesOfBranches(self, branches: list[ASGNode]):
@@ -789,6 +948,7 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
         if not exitPoint.isSequenceTerminatorNode():
             implicitContinue = bodyAnalyzer.builder.forSyntaxExpansionBuildAndSequence(self, expansionNode, ASGLoopContinueNode, exitPoint, entryPoint)
             bodyAnalyzer.environment.addContinueNodeToCurrentLoop(implicitContinue)
+        bodyAnalyzer.builder.exitScope()
         return entryPoint, loopBodyEnvironment.breakNodes, loopBodyEnvironment.continueNodes
 
     def analyzeOptionalLoopContinueExpression(self, loopNode: ASGNode, loopBodyEntryNode: ASGNode, continueNodes: list[ASGNode], continueExpressionNode: ASGNode) -> tuple[ASGSequenceEntryNode, ASGNode]:
@@ -802,6 +962,7 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
             continueAnalyzer(continueExpressionNode)
 
         exitPoint = continueAnalyzer.builder.currentPredecessor
+        continueAnalyzer.builder.exitScope()
         return entryPoint, exitPoint
 
     def analyzeOptionalLoopConditionExpression(self, loopExpressionNode: ASGNode, loopNode: ASGNode, predecessor: ASGNode, conditionExpression: ASGNode) -> tuple[ASGSequenceEntryNode, ASGNode]:
@@ -815,7 +976,9 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
         if conditionExpression is not None:
             conditionValue, typechecked = conditionAnalyzer.analyzeBooleanCondition(conditionExpression)
 
-        return conditionAnalyzer.builder.forSyntaxExpansionBuildAndSequence(self, expansionNode, ASGLoopIterationEndNode, conditionValue, conditionAnalyzer.builder.currentPredecessor, loopNode)
+        iterationEnd = conditionAnalyzer.builder.forSyntaxExpansionBuildAndSequence(self, expansionNode, ASGLoopIterationEndNode, conditionValue, conditionAnalyzer.builder.currentPredecessor, loopNode)
+        conditionAnalyzer.builder.exitScope()
+        return iterationEnd
     
     @asgPatternMatchingOnNodeKind(ASGSyntaxDoContinueWithWhileNode)
     def expandSyntaxDoContinueWithWhileNode(self, node: ASGSyntaxDoContinueWithWhileNode) -> ASGTypecheckedNode:
@@ -908,6 +1071,30 @@ class ASGExpandAndTypecheckingAlgorithm(ASGDynamicProgrammingAlgorithm):
         metaType = node.term.asASGDataNode().__class__.asMetaTypeForSyntaxExpansion(self, node)
         return self.builder.forSyntaxExpansionBuild(self, node, ASGLiteralMetaValueNode, metaType, node.term)
 
+    @asgPatternMatchingOnNodeKind(ASGSyntaxQuasiQuoteNode)
+    def expandSyntaxQuasiQuoteNode(self, node: ASGSyntaxQuasiQuoteNode) -> ASGTypecheckedNode:
+        self.syntaxPredecessorOf(node)
+        quasiQuoteTemplates = self.macroExpansionCache.quasiQuoteTemplates
+        template = quasiQuoteTemplates.get(node, None)
+        if template is None:
+            template = ASGQuasiQuoteTemplate(node.term)
+            quasiQuoteTemplates[node] = template
+
+        if len(template.splices) != 0:
+            return self.makeErrorAtNode('Splices are not supported by quasi-quotes.', template.splices[0])
+
+        ## The holes are filled during compile time.
+        holeValues = []
+        for hole in template.holes:
+            holeValue = self.evaluateMacroExpression(hole.term)
+            if holeValue is None:
+                return self.makeErrorAtNode('Failed to evaluate quasi-unquote expression.', hole)
+            holeValues.append(holeValue)
+
+        instantiatedTerm = template.instantiateWith(holeValues)
+        metaType = instantiatedTerm.asASGDataNode().__class__.asMetaTypeForSyntaxExpansion(self, node)
+        return self.builder.forSyntaxExpansionBuild(self, node, ASGLiteralMetaValueNode, metaType, instantiatedTerm)
+
 def expandAndTypecheck(environment: ASGEnvironment, node: ASGNode):
     expander = ASGExpandAndTypecheckingAlgorithm(environment)
     result = expander.expandTopLevelScript(node)
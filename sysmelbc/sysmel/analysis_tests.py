@@ -0,0 +1,181 @@
+from .analysis import *
+from .testSupport import expandAndTypecheckSourceString
+import unittest
+import unittest.mock
+
+class TestASGOverloadResolution(unittest.TestCase):
+    def setUp(self):
+        topLevelEnvironment = ASGTopLevelTargetEnvironment.getForTarget(DefaultCompilationTarget)
+        environment = makeScriptAnalysisEnvironment(DefaultCompilationTarget, Module('test', DefaultCompilationTarget), EmptySourcePosition.getSingleton(), 'test.sysmel', None)
+        self.expander = ASGExpandAndTypecheckingAlgorithm(environment)
+        derivation = ASGNodeNoDerivation.getSingleton()
+        integerType = topLevelEnvironment.lookValidLastBindingOf('Int32')
+        self.trueType = topLevelEnvironment.lookValidLastBindingOf('True')
+        self.trueValue = topLevelEnvironment.lookValidLastBindingOf('true')
+
+        ## Passing true into a Boolean requires its injection into the sum type.
+        self.booleanFunctionType = ASGFunctionTypeNode(derivation, [topLevelEnvironment.lookValidLastBindingOf('Boolean')], integerType)
+        self.trueFunctionType = ASGFunctionTypeNode(derivation, [self.trueType], integerType)
+        self.otherTrueFunctionType = ASGFunctionTypeNode(derivation, [self.trueType], self.trueType)
+        self.integerFunctionType = ASGFunctionTypeNode(derivation, [integerType], integerType)
+
+    def selectAlternativeIndex(self, alternatives):
+        return self.selectOverloadedTypeAlternativeIndex(ASGOverloadedTypeNode(ASGNodeNoDerivation.getSingleton(), alternatives))
+
+    def selectOverloadedTypeAlternativeIndex(self, overloadedType):
+        return self.expander.selectOverloadedAlternativeIndex(overloadedType, [self.trueValue], [self.trueType])
+
+    def testRanking(self):
+        self.assertEqual(self.expander.rankOverloadedAlternativeType(self.trueFunctionType, [self.trueValue], [self.trueType]), 0)
+        self.assertEqual(self.expander.rankOverloadedAlternativeType(self.booleanFunctionType, [self.trueValue], [self.trueType]), 1)
+        self.assertIsNone(self.expander.rankOverloadedAlternativeType(self.integerFunctionType, [self.trueValue], [self.trueType]))
+
+    def testExactMatchIsPreferredOverCoercion(self):
+        self.assertEqual(self.selectAlternativeIndex([self.integerFunctionType, self.booleanFunctionType, self.trueFunctionType]), 2)
+        self.assertEqual(self.selectAlternativeIndex([self.integerFunctionType, self.booleanFunctionType]), 1)
+        self.assertIsNone(self.selectAlternativeIndex([self.integerFunctionType]))
+
+    def testTiesAreResolvedInDeclarationOrder(self):
+        self.assertEqual(self.selectAlternativeIndex([self.trueFunctionType, self.otherTrueFunctionType]), 0)
+        self.assertEqual(self.selectAlternativeIndex([self.otherTrueFunctionType, self.trueFunctionType]), 0)
+
+    def testSelectionIsMemoized(self):
+        overloadedType = ASGOverloadedTypeNode(ASGNodeNoDerivation.getSingleton(), [self.booleanFunctionType, self.trueFunctionType])
+        self.assertEqual(self.selectOverloadedTypeAlternativeIndex(overloadedType), 1)
+        memoKey = (overloadedType, (self.trueType,))
+        self.assertEqual(self.expander.overloadResolutionMemo[memoKey], 1)
+
+        ## A memo hit does not rank the alternatives again.
+        self.expander.overloadResolutionMemo[memoKey] = 0
+        self.assertEqual(self.selectOverloadedTypeAlternativeIndex(overloadedType), 0)
+
+    def testRankedApplicationReportsArgumentErrors(self):
+        analyzed, errors = expandAndTypecheckSourceString('1i32 + missing.')
+        self.assertEqual([error.message for error in errors], ['Failed to finding binding for symbol missing.'])
+
+        analyzed, errors = expandAndTypecheckSourceString('1i32 + true.')
+        self.assertEqual([error.message for error in errors], ['Failed to find matching overloaded alternative.'])
+
+    def testRepeatedCoercionsAreUnified(self):
+        ## The injection built while ranking is kept by the unification table, so the later ones are unified with it.
+        analyzed, errors = expandAndTypecheckSourceString(':f(:(Boolean)b :: Int32) := 1i32. f(true). f(true). :(Boolean)a := true. :(Boolean)c := true. c.')
+        self.assertEqual(errors, [])
+
+    def testDependentAlternativesFallBackToTrialExpansion(self):
+        ## The lambdas have dependent types, so that the first alternative that typechecks is selected, even with a coercion.
+        analyzed, errors = expandAndTypecheckSourceString(':g(:(Int32 ref)r :: Int64) := 2i64. :!v := 3i32. { :g(:(Int32)x :: Int32) := 1i32. g(v) }.')
+        self.assertEqual(errors, [])
+        self.assertEqual(analyzed.type.name, 'Int32')
+
+        analyzed, errors = expandAndTypecheckSourceString(':g(:(Int32)x :: Int32) := 1i32. { :g(:(Int64)r :: Int64) := 2i64. g(true) }.')
+        self.assertEqual([error.message for error in errors], ['Failed to find matching overloaded alternative.'])
+
+class TestASGDependentInstantiationCache(unittest.TestCase):
+    IdentitySource = ':Identity(:(Type)T, :(T pointer)x :: T pointer) := x.\n'
+
+    def analyzeInNewModule(self, sourceText: str) -> ModuleDependentInstantiationCache:
+        module = Module('test', DefaultCompilationTarget)
+        analyzed, errors = expandAndTypecheckSourceString(self.IdentitySource + sourceText, 'test.sysmel', module)
+        self.assertEqual(errors, [])
+        return module.dependentInstantiationCache
+
+    def testRepeatedInstantiationHits(self):
+        ## The argument and the result type are the same T pointer node, so that only the first substitution misses.
+        cache = self.analyzeInNewModule(':f(:(Integer pointer)y :: Integer pointer) := Identity(Integer, Identity(Integer, y)).')
+        self.assertEqual((cache.missCount, cache.hitCount, len(cache.instantiations)), (1, 3, 1))
+
+    def testDifferentArgumentMisses(self):
+        cache = self.analyzeInNewModule(':f(:(Integer pointer)y :: Integer pointer) := Identity(Integer, y).\n:g(:(Int32 pointer)y :: Int32 pointer) := Identity(Int32, y).')
+        self.assertEqual((cache.missCount, cache.hitCount, len(cache.instantiations)), (2, 2, 2))
+
+    def testCacheIsScopedToTheModule(self):
+        firstCache = self.analyzeInNewModule(':f(:(Integer pointer)y :: Integer pointer) := Identity(Integer, y).')
+        secondCache = self.analyzeInNewModule(':f(:(Integer pointer)y :: Integer pointer) := Identity(Integer, y).')
+        self.assertIsNot(firstCache, secondCache)
+        self.assertEqual((secondCache.missCount, secondCache.hitCount), (1, 1))
+
+    def testAnalysisWithoutModuleHasTransientCache(self):
+        topLevelEnvironment = ASGTopLevelTargetEnvironment.getForTarget(DefaultCompilationTarget)
+        asgSyntax, syntaxErrors = parseSourceCodeIntoSyntax(SourceCode(None, 'test.sysmel', 'sysmel', (self.IdentitySource + ':f(:(Integer pointer)y :: Integer pointer) := Identity(Integer, Identity(Integer, y)).').encode('utf-8')))
+        expander = ASGExpandAndTypecheckingAlgorithm(topLevelEnvironment)
+        expander.expandTopLevelScript(asgSyntax)
+        self.assertEqual(expander.errorAccumulator.errorList, [])
+
+        cache = expander.dependentInstantiationCache
+        self.assertEqual((cache.missCount, cache.hitCount), (1, 3))
+        self.assertIs(expander.withNextMacroExpansionLevel().dependentInstantiationCache, cache)
+        self.assertIsNone(topLevelEnvironment.getDependentInstantiationCache())
+        self.assertIsNot(ASGExpandAndTypecheckingAlgorithm(topLevelEnvironment).dependentInstantiationCache, cache)
+
+class TestASGQuasiQuoteTemplate(unittest.TestCase):
+    def setUp(self):
+        self.derivation = ASGNodeNoDerivation.getSingleton()
+        self.holeValue = ASGSyntaxLiteralIntegerNode(self.derivation, 42)
+
+        ## f(h(a), `,b, ``g(`,c))
+        self.functional = self.makeIdentifier('f')
+        self.unchangedArgument = ASGSyntaxApplicationNode(self.derivation, self.makeIdentifier('h'), [self.makeIdentifier('a')])
+        self.hole = ASGSyntaxQuasiUnquoteNode(self.derivation, self.makeIdentifier('b'))
+        self.nestedHole = ASGSyntaxQuasiUnquoteNode(self.derivation, self.makeIdentifier('c'))
+        self.nestedQuasiQuote = ASGSyntaxQuasiQuoteNode(self.derivation, ASGSyntaxApplicationNode(self.derivation, self.makeIdentifier('g'), [self.nestedHole]))
+        self.term = ASGSyntaxApplicationNode(self.derivation, self.functional, [self.unchangedArgument, self.hole, self.nestedQuasiQuote])
+
+    def makeIdentifier(self, name: str):
+        return ASGSyntaxIdentifierReferenceNode(self.derivation, name)
+
+    def testHolesAreFilled(self):
+        template = ASGQuasiQuoteTemplate(self.term)
+        self.assertEqual(template.holes, [self.hole])
+
+        instantiatedTerm = template.instantiateWith([self.holeValue])
+        self.assertIsInstance(instantiatedTerm, ASGSyntaxApplicationNode)
+        self.assertIs(instantiatedTerm.arguments[1], self.holeValue)
+
+    def testUnchangedSubtermsAreShared(self):
+        instantiatedTerm = ASGQuasiQuoteTemplate(self.term).instantiateWith([self.holeValue])
+        self.assertIsNot(instantiatedTerm, self.term)
+        self.assertIs(instantiatedTerm.functional, self.functional)
+        self.assertIs(instantiatedTerm.arguments[0], self.unchangedArgument)
+
+        ## Without holes there is nothing to rebuild.
+        self.assertIs(ASGQuasiQuoteTemplate(self.unchangedArgument).instantiateWith([]), self.unchangedArgument)
+
+    def testNestedQuasiQuotesAreLeftAlone(self):
+        template = ASGQuasiQuoteTemplate(self.term)
+        self.assertNotIn(self.nestedHole, template.holes)
+        self.assertNotIn(self.nestedQuasiQuote, template.rebuiltNodes)
+        self.assertIs(template.instantiateWith([self.holeValue]).arguments[2], self.nestedQuasiQuote)
+
+    def testSplicesAreReported(self):
+        splice = ASGSyntaxSpliceNode(self.derivation, self.makeIdentifier('x'))
+        template = ASGQuasiQuoteTemplate(ASGSyntaxApplicationNode(self.derivation, self.functional, [splice]))
+        self.assertEqual(template.splices, [splice])
+
+        analyzed, errors = expandAndTypecheckSourceString('``f(`@x).')
+        self.assertEqual([error.message for error in errors], ['Splices are not supported by quasi-quotes.'])
+
+class TestASGMacroExpansionCache(unittest.TestCase):
+    def testMacroExpressionIsReusedAcrossCallSites(self):
+        module = Module('test', DefaultCompilationTarget)
+        evaluateMacroExpression = ASGExpandAndTypecheckingAlgorithm.evaluateMacroExpression
+        with unittest.mock.patch.object(ASGExpandAndTypecheckingAlgorithm, 'evaluateMacroExpression', autospec = True, side_effect = evaluateMacroExpression) as evaluateMacroExpressionSpy:
+            analyzed, errors = expandAndTypecheckSourceString("macroLet: #three with: ``(1i32 + (`,`'2i32)).\nthree. three. three.", module = module)
+
+        self.assertEqual(errors, [])
+        ## The macro expression and its single hole are only evaluated by the first call site.
+        self.assertEqual(evaluateMacroExpressionSpy.call_count, 2)
+        self.assertEqual(len(module.macroExpansionCache.evaluatedMacroExpressions), 1)
+        self.assertEqual(len(module.macroExpansionCache.quasiQuoteTemplates), 1)
+
+    def testAnalysisWithoutModuleHasTransientCache(self):
+        topLevelEnvironment = ASGTopLevelTargetEnvironment.getForTarget(DefaultCompilationTarget)
+        asgSyntax, syntaxErrors = parseSourceCodeIntoSyntax(SourceCode(None, 'test.sysmel', 'sysmel', b"macroLet: #three with: ``(1i32 + (`,`'2i32)).\nthree. three."))
+        expander = ASGExpandAndTypecheckingAlgorithm(topLevelEnvironment)
+        expander.expandTopLevelScript(asgSyntax)
+        self.assertEqual(expander.errorAccumulator.errorList, [])
+
+        cache = expander.macroExpansionCache
+        self.assertEqual((len(cache.evaluatedMacroExpressions), len(cache.quasiQuoteTemplates)), (1, 1))
+        self.assertIs(expander.withNextMacroExpansionLevel().macroExpansionCache, cache)
+        self.assertIsNone(topLevelEnvironment.getMacroExpansionCache())
+        self.assertIsNot(ASGExpandAndTypecheckingAlgorithm(topLevelEnvironment).macroExpansionCache, cache)
@@ -32,6 +32,9 @@ class ASGSequenceEntryNode(ASGSequencingNode):
     def interpretInContext(self, context, parameterList):
         pass
 
+    def compileInterpretationStepWith(self, compiler, resultSlot: int, parameters):
+        return None
+
 class ASGSequenceDivergenceNode(ASGSequencingNode):
     predecessor = ASGSequencingPredecessorAttribute()
 
@@ -185,6 +188,13 @@ class ASGSequenceReturnNode(ASGSequencingNode):
     def interpretInContext(self, context, parameters):
         context.returnValue(context[parameters[0]])
 
+    def compileInterpretationStepWith(self, compiler, resultSlot: int, parameters):
+        valueSlot = compiler.slotOf(parameters[0])
+        def step(context, data):
+            context.result = data[valueSlot]
+            return True
+        return step
+
 class ASGTypedExpressionNode(ASGTypecheckedNode):
     type = ASGNodeTypeInputNode()
 
@@ -305,11 +315,20 @@ class ASGBetaReplaceableNode(ASGTypedDataExpressionNode):
     def isBetaReplaceableNode(self) -> bool:
         return True
 
+    def getBetaReplaceableNodeBit(self) -> int:
+        ## Without a position in its binder, the node conservatively overlaps every bit.
+        return -1
+
 class ASGArgumentNode(ASGBetaReplaceableNode):
     index = ASGNodeDataAttribute(int, default = 0)
     name = ASGNodeDataAttribute(str, default = None, notCompared = True)
     isImplicit = ASGNodeDataAttribute(bool, default = False)
 
+    def getBetaReplaceableNodeBit(self) -> int:
+        ## The bits are relative to the binder, so that the masks are bounded by its argument count. The nodes of
+        ## different binders may share a bit, which only makes the dependency masks conservative.
+        return 1 << self.index
+
     def isArgumentNode(self) -> bool:
         return True
 
@@ -511,6 +530,8 @@ class ASGMacroBinding(ASGTypedDataExpressionNode):
         return expander.evaluateAndExpandMacroExpression(self.value, bindingReferenceNode)
 
 class ASGLambdaNode(ASGTypedDataExpressionNode):
+    __slots__ = ('scheduledInstructions', 'compiledPythonFunction')
+
     arguments = ASGNodeDataInputPorts(notInterpreted = True)
     entryPoint = ASGSequencingDestinationPort(notInterpreted = True)
     exitPoint = ASGSequencingPredecessorAttribute(notInterpreted = True)
@@ -530,8 +551,19 @@ class ASGLambdaNode(ASGTypedDataExpressionNode):
     def isPureFunctionalValue(self) -> bool:
         return self.pureFunctional
 
+    def __init__(self, *positionalArguments, **kwArguments) -> None:
+        super().__init__(*positionalArguments, **kwArguments)
+        self.scheduledInstructions = None
+        self.compiledPythonFunction = None
+
+    def getCompiledPythonFunction(self):
+        if self.compiledPythonFunction is None:
+            from .gcm import lambdaGCM
+            self.compiledPythonFunction = lambdaGCM(self).asPythonFunction()
+        return self.compiledPythonFunction
+
     def __call__(self, *args: Any, **kwds: Any) -> Any:
-        assert False
+        return self.getCompiledPythonFunction().evaluateInModuleWithArguments(None, *args)
 
 class ASGMirLambdaNode(ASGMirTypedDataExpressionNode):
     functionDefinition = ASGNodeDataInputPort()
@@ -542,12 +574,18 @@ class ASGMirLambdaNode(ASGMirTypedDataExpressionNode):
         return True
 
 class ASGMirFunctionDefinitionNode(ASGMirTypedDataExpressionNode):
+    __slots__ = ('scheduledInstructions',)
+
     arguments = ASGNodeDataInputPorts()
     entryPoint = ASGSequencingDestinationPort()
     exitPoint = ASGSequencingPredecessorAttribute()
     name = ASGNodeDataAttribute(str, default = None)
     callingConvention = ASGNodeDataAttribute(str, default = None)
 
+    def __init__(self, *positionalArguments, **kwArguments) -> None:
+        super().__init__(*positionalArguments, **kwArguments)
+        self.scheduledInstructions = None
+
     def isMirFunctionDefinition(self) -> bool:
         return True
 
@@ -575,10 +613,30 @@ class ASGFxApplicationNode(ASGSequencingAndDataNode):
     arguments = ASGNodeDataInputPorts()
     
     def interpretInContext(self, context, parameters):
-        functional = context[parameters[0]]
-        arguments = list(map(lambda x: context[x], parameters[1:]))
+        ## The first parameter is the type.
+        functional = context[parameters[1]]
+        arguments = list(map(lambda x: context[x], parameters[2:]))
         return functional(*arguments)
 
+    def compileInterpretationStepWith(self, compiler, resultSlot: int, parameters):
+        functionalSlot = compiler.slotOf(parameters[1])
+        argumentSlots = tuple(map(compiler.slotOf, parameters[2:]))
+        if len(argumentSlots) == 0:
+            def step(context, data):
+                data[resultSlot] = data[functionalSlot]()
+        elif len(argumentSlots) == 1:
+            argumentSlot, = argumentSlots
+            def step(context, data):
+                data[resultSlot] = data[functionalSlot](data[argumentSlot])
+        elif len(argumentSlots) == 2:
+            firstArgumentSlot, secondArgumentSlot = argumentSlots
+            def step(context, data):
+                data[resultSlot] = data[functionalSlot](data[firstArgumentSlot], data[secondArgumentSlot])
+        else:
+            def step(context, data):
+                data[resultSlot] = data[functionalSlot](*[data[argumentSlot] for argumentSlot in argumentSlots])
+        return step
+
 class ASGAllocaNode(ASGTypedStatefullExpressionNode):
     valueType = ASGNodeTypeInputNode(str)
 
@@ -627,9 +685,15 @@ class ASGInjectSum(ASGTypedDataExpressionNode):
         return True
     
 class ASGTopLevelScriptNode(ASGTypedDataExpressionNode):
+    __slots__ = ('scheduledInstructions',)
+
     entryPoint = ASGSequencingDestinationPort()
     exitPoint = ASGSequencingPredecessorAttribute()
 
+    def __init__(self, *positionalArguments, **kwArguments) -> None:
+        super().__init__(*positionalArguments, **kwArguments)
+        self.scheduledInstructions = None
+
 class ASGModuleTypeNode(ASGBaseTypeNode):
     pass
 
@@ -883,6 +947,14 @@ class ASGExportNode(ASGSequencingNode):
         value = context[parameters[0]]
         context.getActiveModule().exportValueWithName(value, self.exportedName, externalName = self.externalName)
 
+    def compileInterpretationStepWith(self, compiler, resultSlot: int, parameters):
+        valueSlot = compiler.slotOf(parameters[0])
+        exportedName = self.exportedName
+        externalName = self.externalName
+        def step(context, data):
+            context.module.exportValueWithName(data[valueSlot], exportedName, externalName = externalName)
+        return step
+
 class ASGFromExternalImportNode(ASGTypedDataExpressionNode):
     externalName = ASGNodeDataAttribute(str)
     importedName = ASGNodeDataAttribute(str)
@@ -898,6 +970,8 @@ class ASGMirFromExternalImportNode(ASGMirTypedDataExpressionNode):
         return True
 
 class ASGMirTypeNode(ASGTypeNode):
+    __slots__ = ('memoryDescriptor',)
+
     def __init__(self, *positionalArguments, **kwArguments) -> None:
         super().__init__(*positionalArguments, **kwArguments)
         self.memoryDescriptor = None
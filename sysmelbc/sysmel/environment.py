@@ -2,6 +2,7 @@ from .mop import *
 from .syntax import *
 from .asg import *
 from .module import *
+from .persistentHashMap import PersistentHashMap
 
 class ASGEnvironment(ABC):
     @abstractmethod
@@ -12,6 +13,12 @@ class ASGEnvironment(ABC):
     def lookSymbolBindingListRecursively(self, symbol: str):
         pass
 
+    def lookSymbolBindingRecursively(self, symbol: str):
+        bindingList = self.lookSymbolBindingListRecursively(symbol)
+        if len(bindingList) == 0:
+            return None
+        return bindingList[0]
+
     @abstractmethod
     def findCurrentLoopBodyEntryNode(self) -> ASGNode:
         pass
@@ -36,6 +43,14 @@ class ASGEnvironment(ABC):
     def getCurrentNamespace(self):
         return None
 
+    @abstractmethod
+    def getMacroExpansionCache(self) -> ModuleMacroExpansionCache | None:
+        pass
+
+    @abstractmethod
+    def getDependentInstantiationCache(self) -> ModuleDependentInstantiationCache | None:
+        pass
+
     @abstractmethod
     def getCompilationTarget(self):
         pass
@@ -109,6 +124,7 @@ class ASGTopLevelTargetEnvironment(ASGEnvironment):
         self.addPrimitiveFunctions()
         self.gcmCache = {}
         self.interpreterCache = {}
+        self.stableValueNames = None
 
     def addBaseType(self, baseType: ASGBaseTypeNode):
         baseType = self.addUnificationValue(baseType)
@@ -137,12 +153,50 @@ class ASGTopLevelTargetEnvironment(ASGEnvironment):
             raise Exception('Missing required binding for %s.' % name)
         return self.symbolTable[name][0]
 
+    def getStableValueNames(self) -> dict:
+        ## Deterministic names for a compiler version and target. Overloads are numbered from their oldest binding.
+        if self.stableValueNames is not None:
+            return self.stableValueNames
+
+        stableValueNames = {'#target': self.target}
+        namedValues = set()
+        def addNamedValue(name, value):
+            if value in namedValues:
+                return
+            stableValueNames[name] = value
+            namedValues.add(value)
+
+        for symbol, bindings in self.symbolTable.items():
+            for bindingIndex, value in enumerate(reversed(bindings)):
+                addNamedValue(symbol if bindingIndex == 0 else '%s#%d' % (symbol, bindingIndex), value)
+        for unificationIndex, value in enumerate(self.topLevelUnificationTable.values()):
+            addNamedValue('#unification%d' % unificationIndex, value)
+
+        for name, value in list(stableValueNames.items()):
+            if not isinstance(value, ASGNode):
+                continue
+            for attribute in value.__class__.__asgDataAttributes__:
+                attributeValue = attribute.loadValueFrom(value)
+                if callable(attributeValue) and not isinstance(attributeValue, ASGNode):
+                    addNamedValue(name + '.' + attribute.name, attributeValue)
+
+        self.stableValueNames = stableValueNames
+        return stableValueNames
+
     def getMirTypeUniverse(self):
         return self.lookValidLastBindingOf('MIR::Type')
 
     def getTopLevelTargetEnvironment(self):
         return self
     
+    def getMacroExpansionCache(self) -> ModuleMacroExpansionCache | None:
+        ## The macro expansions are only kept by a module, so that they are not retained across the compilations.
+        return None
+
+    def getDependentInstantiationCache(self) -> ModuleDependentInstantiationCache | None:
+        ## The instantiations are only kept by a module, so that they are not retained across the compilations.
+        return None
+
     def getCompilationTarget(self):
         return self.target
     
@@ -157,6 +211,9 @@ class ASGTopLevelTargetEnvironment(ASGEnvironment):
     def lookSymbolBindingListRecursively(self, symbol: str):
         return self.symbolTable.get(symbol, [])
 
+    def lookSymbolBindingRecursively(self, symbol: str):
+        return self.lookLastBindingOf(symbol)
+
     @classmethod
     def getForTarget(cls, target: CompilationTarget):
         if hasattr(target, 'asgTopLevelTargetEnvironment'):
@@ -458,6 +515,9 @@ class ASGChildEnvironment(ASGEnvironment):
     def lookSymbolBindingListRecursively(self, symbol: str):
         return self.parent.lookSymbolBindingListRecursively(symbol)
 
+    def lookSymbolBindingRecursively(self, symbol: str):
+        return self.parent.lookSymbolBindingRecursively(symbol)
+
     def findCurrentLoopBodyEntryNode(self) -> ASGNode:
         return self.parent.findCurrentLoopBodyEntryNode()
     
@@ -470,29 +530,50 @@ class ASGChildEnvironment(ASGEnvironment):
     def getCurrentNamespace(self):
         return self.parent.getCurrentNamespace()
     
+    def getMacroExpansionCache(self) -> ModuleMacroExpansionCache | None:
+        return self.parent.getMacroExpansionCache()
+
+    def getDependentInstantiationCache(self) -> ModuleDependentInstantiationCache | None:
+        return self.parent.getDependentInstantiationCache()
+
     def getCompilationTarget(self):
         return self.parent.getCompilationTarget()
 
+## The local symbol tables are persistent maps from the symbols into linked lists of their bindings, with the
+## innermost binding first, so that adding a binding never copies the bindings of the other symbols.
+def symbolTableWithBinding(symbolTable: PersistentHashMap, symbol: str, binding: ASGNode) -> PersistentHashMap:
+    return symbolTable.withKeyValue(symbol, (binding, symbolTable.get(symbol)))
+
+def symbolTableBindingListOf(symbolTable: PersistentHashMap, symbol: str) -> list:
+    bindingList = []
+    bindings = symbolTable.get(symbol)
+    while bindings is not None:
+        binding, bindings = bindings
+        bindingList.append(binding)
+    return bindingList
+
 class ASGChildEnvironmentWithBindings(ASGChildEnvironment):
     def __init__(self, parent: ASGEnvironment, sourcePosition: SourcePosition = None) -> None:
         super().__init__(parent, sourcePosition)
-        self.symbolTable = {}
-
-    def postCopy(self):
-        self.symbolTable = dict(self.symbolTable)
+        self.symbolTable = PersistentHashMap.getEmpty()
 
     def addSymbolBinding(self, symbol: str, binding: ASGNode):
         if symbol is not None:
-            self.symbolTable[symbol] = [binding] + self.symbolTable.get(symbol, [])
+            self.symbolTable = symbolTableWithBinding(self.symbolTable, symbol, binding)
 
     def childWithSymbolBinding(self, symbol: str, binding: ASGNode):
         child = copy.copy(self)
-        child.postCopy()
         child.addSymbolBinding(symbol, binding)
         return child
 
     def lookSymbolBindingListRecursively(self, symbol: str):
-        return self.symbolTable.get(symbol, []) + self.parent.lookSymbolBindingListRecursively(symbol)
+        return symbolTableBindingListOf(self.symbolTable, symbol) + self.parent.lookSymbolBindingListRecursively(symbol)
+
+    def lookSymbolBindingRecursively(self, symbol: str):
+        bindings = self.symbolTable.get(symbol)
+        if bindings is not None:
+            return bindings[0]
+        return self.parent.lookSymbolBindingRecursively(symbol)
 
 class ASGNamespaceEnvironment(ASGChildEnvironment):
     def __init__(self, parent: ASGEnvironment, sourcePosition: SourcePosition = None, namespace: Namespace = None) -> None:
@@ -529,15 +610,21 @@ class ASGFunctionalAnalysisEnvironment(ASGLexicalEnvironment):
     def __init__(self, parent: ASGEnvironment, sourcePosition: SourcePosition = None) -> None:
         super().__init__(parent, sourcePosition)
         self.arguments = []
-        self.symbolTable = {}
+        self.symbolTable = PersistentHashMap.getEmpty()
 
     def addArgumentBinding(self, argument: ASGArgumentNode):
         self.arguments.append(argument)
         if argument.name is not None:
-            self.symbolTable[argument.name] = [argument] + self.symbolTable.get(argument.name, [])
+            self.symbolTable = symbolTableWithBinding(self.symbolTable, argument.name, argument)
 
     def lookSymbolBindingListRecursively(self, symbol: str):
-        return self.symbolTable.get(symbol, []) + self.parent.lookSymbolBindingListRecursively(symbol)
+        return symbolTableBindingListOf(self.symbolTable, symbol) + self.parent.lookSymbolBindingListRecursively(symbol)
+
+    def lookSymbolBindingRecursively(self, symbol: str):
+        bindings = self.symbolTable.get(symbol)
+        if bindings is not None:
+            return bindings[0]
+        return self.parent.lookSymbolBindingRecursively(symbol)
 
 class ASGScriptEnvironment(ASGLexicalEnvironment):
     def __init__(self, parent: ASGEnvironment, module: Module, sourcePosition: SourcePosition = None, scriptDirectory = '', scriptName = 'script', frontEnd = None) -> None:
@@ -550,6 +637,12 @@ class ASGScriptEnvironment(ASGLexicalEnvironment):
     def getCurrentNamespace(self):
         return self.module.globalNamespace
 
+    def getMacroExpansionCache(self) -> ModuleMacroExpansionCache | None:
+        return self.module.macroExpansionCache
+
+    def getDependentInstantiationCache(self) -> ModuleDependentInstantiationCache | None:
+        return self.module.dependentInstantiationCache
+
     def isScriptEnvironment(self):
         return True
 
@@ -1,6 +1,7 @@
 from .mop import *
 from .asg import *
 from .interpreter import ASGNodeWithInterpretableInstructions
+from .pythonBackend import ASGPythonCodeGenerator
 
 class ASGNodeWithInstructionScheduling:
     def __init__(self, functionalNode, activationParameters, constants, serializedInstructions) -> None:
@@ -8,6 +9,8 @@ class ASGNodeWithInstructionScheduling:
         self.activationParameters = activationParameters
         self.constants = constants
         self.serializedInstructions = serializedInstructions
+        self.interpretableInstructions = None
+        self.pythonFunction = None
 
     def enumerateForInterpretation(self):
         for node in self.constants:
@@ -26,7 +29,14 @@ class ASGNodeWithInstructionScheduling:
             yield node 
 
     def asInterpretableInstructions(self):
-        return ASGNodeWithInterpretableInstructions(self.functionalNode, list(self.enumerateForInterpretation()), len(self.constants), len(self.activationParameters))
+        if self.interpretableInstructions is None:
+            self.interpretableInstructions = ASGNodeWithInterpretableInstructions(self.functionalNode, list(self.enumerateForInterpretation()), len(self.constants), len(self.activationParameters))
+        return self.interpretableInstructions
+
+    def asPythonFunction(self):
+        if self.pythonFunction is None:
+            self.pythonFunction = ASGPythonCodeGenerator(self).generate()
+        return self.pythonFunction
 
 class InstructionUserList:
     def __init__(self) -> None:
@@ -119,18 +129,12 @@ class GlobalCodeMotionAlgorithm:
         self.dataInstructionIndexDictionary = {}
         self.constantDataInstructions = []
         
-        def traverseNode(node):
-            if node in visited:
-                return
-            
-            visited.add(node)
-            if not node.isConstantDataNode():
-                for dependency in self.dependenciesOf(node):
-                    if dependency in visited:
-                        continue
-
-                    traverseNode(dependency)
+        def dependenciesOfNode(node):
+            if node.isConstantDataNode():
+                return ()
+            return self.dependenciesOf(node)
 
+        def classifyNode(node):
             if node.isPureDataNode() or node.isStatefullDataNode():
                 if node.isActivationContextParameterDataNode():
                     self.activationContextParameterInstructions.append(node)
@@ -141,7 +145,7 @@ class GlobalCodeMotionAlgorithm:
                     self.dataInstructions.append(node)
 
         for region in self.regions:
-            traverseNode(region)
+            asgDepthFirstPostOrderDo(region, dependenciesOfNode, classifyNode, visited)
 
     def computeUserLists(self):
         self.dataInstructionUserLists = []
@@ -161,12 +165,18 @@ class GlobalCodeMotionAlgorithm:
 
     def computeDominanceTreeDepthAtIndex(self, index):
         if self.dominanceTreeDepths[index] is None:
-            idom = self.idoms[index]
-            if idom is None:
-                self.dominanceTreeDepths[index] = 0
-            else:
-                self.dominanceTreeDepths[index] = self.computeDominanceTreeDepthAtIndex(idom) + 1
-        
+            # Walk up the dominator tree until a known depth, and fill the depths back down.
+            pendingIndices = []
+            while index is not None and self.dominanceTreeDepths[index] is None:
+                pendingIndices.append(index)
+                index = self.idoms[index]
+
+            depth = self.dominanceTreeDepths[index] if index is not None else -1
+            for pendingIndex in reversed(pendingIndices):
+                depth += 1
+                self.dominanceTreeDepths[pendingIndex] = depth
+            index = pendingIndices[0]
+
         return self.dominanceTreeDepths[index]
     
     def computeLoopNestingLevels(self):
@@ -176,16 +186,20 @@ class GlobalCodeMotionAlgorithm:
     
     def computeLoopNestingLevelAtIndex(self, index):
         if self.loopNestingLevels[index] is None:
-            idom = self.idoms[index]
-            if idom is None:
-                self.loopNestingLevels[index] = 0
-            else:
-                self.loopNestingLevels[index] = self.computeLoopNestingLevelAtIndex(idom)
-            region = self.regions[index]
-            if region.isLoopEntryNode():
-                self.loopNestingLevels[index] += 1
-            elif region.isSequenceConvergenceNode() and region.divergence.isLoopEntryNode():
-                self.loopNestingLevels[index] -= 1
+            pendingIndices = []
+            while index is not None and self.loopNestingLevels[index] is None:
+                pendingIndices.append(index)
+                index = self.idoms[index]
+
+            loopNestingLevel = self.loopNestingLevels[index] if index is not None else 0
+            for pendingIndex in reversed(pendingIndices):
+                region = self.regions[pendingIndex]
+                if region.isLoopEntryNode():
+                    loopNestingLevel += 1
+                elif region.isSequenceConvergenceNode() and region.divergence.isLoopEntryNode():
+                    loopNestingLevel -= 1
+                self.loopNestingLevels[pendingIndex] = loopNestingLevel
+            index = pendingIndices[0]
         
         return self.loopNestingLevels[index]
     
@@ -213,35 +227,44 @@ class GlobalCodeMotionAlgorithm:
             for incomingValue in phi.values:
                 pinInstructionToRegion(incomingValue, incomingValue.predecessor)
 
-        def visitInstruction(instructionIndex):
-            if visited[instructionIndex]:
-                return True
-            
-            visited[instructionIndex] = True
-            instruction = self.dataInstructions[instructionIndex]
+        def applyDependencyRegion(instructionIndex, dependencyRegion):
+            dependencyRegionDepth = self.dominanceTreeDepths[dependencyRegion]
 
-            def applyDependencyRegion(dependencyRegion):
-                dependencyRegionDepth = self.dominanceTreeDepths[dependencyRegion]
+            instructionRegion = self.earlySchedule[instructionIndex]
+            instructionRegionDepth = self.dominanceTreeDepths[instructionRegion]
+            if instructionRegionDepth < dependencyRegionDepth:
+                self.earlySchedule[instructionIndex] = dependencyRegion
 
-                instructionRegion = self.earlySchedule[instructionIndex]
-                instructionRegionDepth = self.dominanceTreeDepths[instructionRegion]
-                if instructionRegionDepth < dependencyRegionDepth:
-                    self.earlySchedule[instructionIndex] = dependencyRegion
+        def visitInstruction(instructionIndex):
+            if visited[instructionIndex]:
+                return
 
-            for dependency in instruction.dataDependencies():
-                if dependency.isSequencingNode():
-                    dependencyRegion = self.regionToIndexDictionary[dependency]
-                    applyDependencyRegion(dependencyRegion)
-                    continue
-                elif dependency not in self.dataInstructionIndexDictionary:
-                    continue
+            # Use an explicit stack, so that long chains of instructions do not overflow the Python stack.
+            visited[instructionIndex] = True
+            stack = [(instructionIndex, self.dataInstructions[instructionIndex].dataDependencies())]
+            while stack:
+                instructionIndex, dependencies = stack[-1]
+                for dependency in dependencies:
+                    if dependency.isSequencingNode():
+                        applyDependencyRegion(instructionIndex, self.regionToIndexDictionary[dependency])
+                        continue
+                    elif dependency not in self.dataInstructionIndexDictionary:
+                        continue
 
-                dependencyIndex = self.dataInstructionIndexDictionary[dependency]
-                visitInstruction(dependencyIndex)
+                    dependencyIndex = self.dataInstructionIndexDictionary[dependency]
+                    if not visited[dependencyIndex]:
+                        visited[dependencyIndex] = True
+                        stack.append((dependencyIndex, self.dataInstructions[dependencyIndex].dataDependencies()))
+                        break
 
-                if not self.pinnedDataInstructions[instructionIndex]:
-                    dependencyRegion = self.earlySchedule[dependencyIndex]
-                    applyDependencyRegion(dependencyRegion)
+                    if not self.pinnedDataInstructions[instructionIndex]:
+                        applyDependencyRegion(instructionIndex, self.earlySchedule[dependencyIndex])
+                else:
+                    stack.pop()
+                    if stack:
+                        userIndex = stack[-1][0]
+                        if not self.pinnedDataInstructions[userIndex]:
+                            applyDependencyRegion(userIndex, self.earlySchedule[instructionIndex])
 
         for i in range(len(self.dataInstructions)):
             visitInstruction(i)
@@ -259,18 +282,7 @@ class GlobalCodeMotionAlgorithm:
             assert userRegion is not None
             return self.regionToIndexDictionary[userRegion]
 
-        def visitInstruction(instruction):
-            instructionIndex = self.dataInstructionIndexDictionary.get(instruction, None)
-            if instructionIndex is None or visited[instructionIndex]:
-                return
-            visited[instructionIndex] = True
-
-            lca = None
-            for user in self.dataInstructionUserLists[instructionIndex].users:
-                visitInstruction(user)
-                userBlockIndex = blockIndexOfInstructionUserOf(user, instruction)
-                lca = self.computeBlockLCA(lca, userBlockIndex)
-
+        def scheduleInstructionAtIndex(instructionIndex, lca):
             assert lca is not None
             bestBlock = lca
             while lca != self.scheduleRegions[instructionIndex]:
@@ -278,6 +290,33 @@ class GlobalCodeMotionAlgorithm:
                     bestBlock = lca
                 lca = self.idoms[lca]
             self.scheduleRegions[instructionIndex] = bestBlock
+
+        def visitInstruction(instruction):
+            instructionIndex = self.dataInstructionIndexDictionary.get(instruction, None)
+            if instructionIndex is None or visited[instructionIndex]:
+                return
+            visited[instructionIndex] = True
+
+            # Use an explicit stack, so that long chains of users do not overflow the Python stack.
+            # Each entry holds the instruction, its index, the pending users and the lca of the visited users.
+            stack = [[instruction, instructionIndex, iter(self.dataInstructionUserLists[instructionIndex].users), None]]
+            while stack:
+                entry = stack[-1]
+                instruction = entry[0]
+                for user in entry[2]:
+                    userIndex = self.dataInstructionIndexDictionary.get(user, None)
+                    if userIndex is not None and not visited[userIndex]:
+                        visited[userIndex] = True
+                        stack.append([user, userIndex, iter(self.dataInstructionUserLists[userIndex].users), None])
+                        break
+
+                    entry[3] = self.computeBlockLCA(entry[3], blockIndexOfInstructionUserOf(user, instruction))
+                else:
+                    stack.pop()
+                    scheduleInstructionAtIndex(entry[1], entry[3])
+                    if stack:
+                        usedEntry = stack[-1]
+                        usedEntry[3] = self.computeBlockLCA(usedEntry[3], blockIndexOfInstructionUserOf(instruction, usedEntry[0]))
         
         for i in range(len(self.dataInstructions)):
             if self.pinnedDataInstructions[i]:
@@ -331,16 +370,14 @@ class GlobalCodeMotionAlgorithm:
         sortedInstructions = []
         sortedPhiValueInstructions = []
         instructionsSet = set(instructions)
-        visitedSet = set(sortedInstructions)
+        visitedSet = set()
 
-        def visitInstruction(instruction):
-            if instruction in visitedSet or instruction not in instructionsSet:
-                return
-            visitedSet.add(instruction)
-            
+        def dependenciesInRegion(instruction):
             for dependency in instruction.dataDependencies():
-                visitInstruction(dependency)
+                if dependency in instructionsSet:
+                    yield dependency
 
+        def appendInstruction(instruction):
             if instruction.isPhiNode():
                 sortedPhiInstructions.append(instruction)
             elif instruction.isPhiValueNode():
@@ -348,20 +385,23 @@ class GlobalCodeMotionAlgorithm:
             else:
                 sortedInstructions.append(instruction)
 
-
         for instruction in instructions:
-            visitInstruction(instruction)
+            asgDepthFirstPostOrderDo(instruction, dependenciesInRegion, appendInstruction, visitedSet)
 
         return sortedPhiInstructions + sortedInstructions + sortedPhiValueInstructions
 
+## The nodes are immutable, so the scheduling is cached in the functional node until it is rebuilt.
 def lambdaGCM(node: ASGLambdaNode):
-    lambdaWithGcm = GlobalCodeMotionAlgorithm(node).computeForLambda()
-    return lambdaWithGcm
+    if node.scheduledInstructions is None:
+        node.scheduledInstructions = GlobalCodeMotionAlgorithm(node).computeForLambda()
+    return node.scheduledInstructions
 
 def mirFunctionDefinitionGCM(node: ASGMirFunctionDefinitionNode):
-    functionDefinitionWithGcm = GlobalCodeMotionAlgorithm(node).computeForMirFunctionDefinition()
-    return functionDefinitionWithGcm
+    if node.scheduledInstructions is None:
+        node.scheduledInstructions = GlobalCodeMotionAlgorithm(node).computeForMirFunctionDefinition()
+    return node.scheduledInstructions
 
 def topLevelScriptGCM(node: ASGTopLevelScriptNode):
-    topLevelScriptGCM = GlobalCodeMotionAlgorithm(node).computeForTopLevelScript()
-    return topLevelScriptGCM
+    if node.scheduledInstructions is None:
+        node.scheduledInstructions = GlobalCodeMotionAlgorithm(node).computeForTopLevelScript()
+    return node.scheduledInstructions
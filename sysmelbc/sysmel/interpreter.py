@@ -1,7 +1,16 @@
 from .mop import *
 from .asg import *
+from .parsetree import SourcePosition
+import threading
+import time
 
 class ASGNodeWithInterpretableInstructions:
+    ## Set to False for executing the instructions with the dispatching interpreter loop.
+    UseCompiledSteps = True
+
+    ## Set to an ASGInterpreterProfiler for profiling the evaluation of the compiled steps.
+    Profiler = None
+
     def __init__(self, functionalNode, instructions, constantCount, activationParameterCount) -> None:
         self.functionalNode = functionalNode
         self.instructions = instructions
@@ -10,6 +19,8 @@ class ASGNodeWithInterpretableInstructions:
         self.startpc = constantCount + activationParameterCount
         self.activationContextSize = len(self.instructions) - self.constantCount
         self.parametersLists = None
+        self.compiledSteps = None
+        self.compiledStepInstructions = None
         self.buildParametersLists()
 
     def buildParametersLists(self):
@@ -23,9 +34,53 @@ class ASGNodeWithInterpretableInstructions:
             self.parametersLists.append(parameterList)
 
     def evaluateInModuleWithArguments(self, module, *args):
+        if ASGNodeWithInterpretableInstructions.Profiler is not None:
+            return self.evaluateProfiledCompiledStepsInModuleWithArguments(ASGNodeWithInterpretableInstructions.Profiler, module, *args)
+        if ASGNodeWithInterpretableInstructions.UseCompiledSteps:
+            return self.evaluateCompiledStepsInModuleWithArguments(module, *args)
+        return self.interpretInModuleWithArguments(module, *args)
+
+    def interpretInModuleWithArguments(self, module, *args):
         activationContext = ASGNodeInterpreterActivationContext(self.startpc, module, args, self)
         return activationContext.execute()
 
+    def getCompiledSteps(self):
+        if self.compiledSteps is None:
+            compiler = ASGInterpretableInstructionsClosureCompiler(self)
+            self.compiledSteps = compiler.compile()
+            self.compiledStepInstructions = compiler.stepInstructions
+        return self.compiledSteps
+
+    def evaluateCompiledStepsInModuleWithArguments(self, module, *args):
+        steps = self.getCompiledSteps()
+        activationContext = ASGNodeCompiledActivationContext(module, args, self)
+        data = activationContext.data
+        for step in steps:
+            if step(activationContext, data):
+                break
+        return activationContext.result
+
+    def evaluateProfiledCompiledStepsInModuleWithArguments(self, profiler, module, *args):
+        ## The step index is published in the activation context, where the sampling thread reads it.
+        steps = self.getCompiledSteps()
+        activationContext = ASGNodeCompiledActivationContext(module, args, self)
+        data = activationContext.data
+        profiler.enterActivation(activationContext)
+        try:
+            if profiler.countsSteps:
+                for pc in range(len(steps)):
+                    activationContext.pc = pc
+                    if profiler.countStep(steps[pc], activationContext, data):
+                        break
+            else:
+                for pc in range(len(steps)):
+                    activationContext.pc = pc
+                    if steps[pc](activationContext, data):
+                        break
+        finally:
+            profiler.exitActivation(activationContext)
+        return activationContext.result
+
     def dump(self) -> str:
         result = ''
         for i in range(len(self.instructions)):
@@ -107,3 +162,211 @@ class ASGNodeInterpreterActivationContext:
             return self.instructions.instructions[self.instructions.constantCount + index]
         else:
             return self.data[index]
+
+class ASGInterpretableInstructionsClosureCompiler:
+    ## The data list starts with the constants, so that the operands are direct list indices.
+    ## A step returns True for finishing the activation.
+    def __init__(self, instructions: ASGNodeWithInterpretableInstructions) -> None:
+        self.instructions = instructions
+        self.stepInstructions = []
+
+    def slotOf(self, parameter: int) -> int:
+        return parameter + self.instructions.constantCount
+
+    def compileGenericStep(self, instruction, resultSlot: int, parameters):
+        interpretInContext = instruction.interpretInContext
+        def step(context, data):
+            data[resultSlot] = interpretInContext(context, parameters)
+            return context.shouldReturn
+        return step
+
+    def compile(self) -> list:
+        steps = []
+        instructions = self.instructions.instructions
+        constantCount = self.instructions.constantCount
+        for i in range(self.instructions.startpc, len(instructions)):
+            step = instructions[i].compileInterpretationStepWith(self, i, self.instructions.parametersLists[i - constantCount])
+            if step is not None:
+                steps.append(step)
+                self.stepInstructions.append(instructions[i])
+        return steps
+
+class ASGNodeCompiledActivationContext:
+    def __init__(self, module, activationParameters, instructions: ASGNodeWithInterpretableInstructions) -> None:
+        self.module = module
+        self.instructions = instructions
+        self.constantCount = instructions.constantCount
+        self.data = instructions.instructions[:instructions.constantCount]
+        self.data += activationParameters
+        self.data += [None] * (instructions.activationContextSize - len(activationParameters))
+        self.result = None
+        self.shouldReturn = False
+        self.pc = 0
+
+    def getActiveModule(self):
+        return self.module
+
+    def returnValue(self, value):
+        self.result = value
+        self.shouldReturn = True
+
+    def __getitem__(self, index: int):
+        return self.data[index + self.constantCount]
+
+class ASGInterpreterProfileEntry:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.executionCount = 0
+        self.cumulativeTime = 0.0
+        self.selfTime = 0.0
+        self.sampleCount = 0
+
+    def addStepProfile(self, stepProfile):
+        self.executionCount += stepProfile[0]
+        self.cumulativeTime += stepProfile[1]
+        self.selfTime += stepProfile[2]
+
+class ASGInterpreterProfiler:
+    ## The counting mode times every step, and the sampling mode takes the active stack from a thread.
+    ## The steps are only mapped into node kinds and source lines when formatting a report.
+    def __init__(self, samplingInterval: float | None = None) -> None:
+        self.samplingInterval = samplingInterval
+        self.countsSteps = samplingInterval is None
+        self.activationStack = []
+        self.activationCallerKeys = []
+        self.activationEntryTimes = []
+        self.activationCount = 0
+        self.nestedTime = 0.0
+        self.stepProfiles = {}
+        self.samples = {}
+        self.samplingThread = None
+        self.samplingStopEvent = None
+
+    def install(self):
+        ASGNodeWithInterpretableInstructions.Profiler = self
+        if self.samplingInterval is not None:
+            self.samplingStopEvent = threading.Event()
+            self.samplingThread = threading.Thread(target = self.samplingLoop, daemon = True)
+            self.samplingThread.start()
+
+    def uninstall(self):
+        if ASGNodeWithInterpretableInstructions.Profiler is self:
+            ASGNodeWithInterpretableInstructions.Profiler = None
+        if self.samplingThread is not None:
+            self.samplingStopEvent.set()
+            self.samplingThread.join()
+            self.samplingThread = None
+
+    def getActivationStackKey(self) -> tuple:
+        return tuple((context.instructions, context.pc) for context in list(self.activationStack))
+
+    def enterActivation(self, context):
+        self.activationCallerKeys.append(self.getActivationStackKey())
+        self.activationEntryTimes.append((time.perf_counter(), self.nestedTime))
+        self.activationStack.append(context)
+        self.activationCount += 1
+
+    def exitActivation(self, context):
+        self.activationStack.pop()
+        self.activationCallerKeys.pop()
+        entryTime, nestedTime = self.activationEntryTimes.pop()
+        ## The callers only see the total time of this activation as nested, which already includes the deeper ones.
+        self.nestedTime = nestedTime + time.perf_counter() - entryTime
+
+    def countStep(self, step, context, data) -> bool:
+        nestedTime = self.nestedTime
+        startTime = time.perf_counter()
+        finished = step(context, data)
+        elapsedTime = time.perf_counter() - startTime
+        key = (self.activationCallerKeys[-1], context.instructions, context.pc)
+        stepProfile = self.stepProfiles.get(key, None)
+        if stepProfile is None:
+            stepProfile = [0, 0.0, 0.0]
+            self.stepProfiles[key] = stepProfile
+        stepProfile[0] += 1
+        stepProfile[1] += elapsedTime
+        stepProfile[2] += elapsedTime - (self.nestedTime - nestedTime)
+        return finished
+
+    def samplingLoop(self):
+        while not self.samplingStopEvent.wait(self.samplingInterval):
+            stackKey = self.getActivationStackKey()
+            if len(stackKey) != 0:
+                self.samples[stackKey] = self.samples.get(stackKey, 0) + 1
+
+    @staticmethod
+    def formatSourceLine(node) -> str:
+        sourcePosition = node.sourceDerivation.getSourcePosition()
+        if isinstance(sourcePosition, SourcePosition):
+            return '%s:%d' % (sourcePosition.sourceCode, sourcePosition.startLine)
+        return str(sourcePosition)
+
+    @classmethod
+    def formatFunctionalFrame(cls, instructions) -> str:
+        functionalNode = instructions.functionalNode
+        if functionalNode is None:
+            return '<unknown>'
+        if functionalNode.isLambda() and functionalNode.name is not None:
+            return '%s (%s)' % (functionalNode.name, cls.formatSourceLine(functionalNode))
+        return '%s (%s)' % (functionalNode.__asgKindName__, cls.formatSourceLine(functionalNode))
+
+    @classmethod
+    def formatStepFrame(cls, instructions, pc: int) -> str:
+        instruction = instructions.compiledStepInstructions[pc]
+        return '%s (%s)' % (instruction.__asgKindName__, cls.formatSourceLine(instruction))
+
+    @classmethod
+    def formatStackFrames(cls, stackKey) -> list[str]:
+        frames = []
+        for instructions, pc in stackKey:
+            frames.append(cls.formatFunctionalFrame(instructions).replace(';', ','))
+            frames.append(cls.formatStepFrame(instructions, pc).replace(';', ','))
+        return frames
+
+    def getProfileEntries(self, keyFunction) -> list[ASGInterpreterProfileEntry]:
+        entries = {}
+        for (callerKey, instructions, pc), stepProfile in self.stepProfiles.items():
+            name = keyFunction(instructions.compiledStepInstructions[pc])
+            entry = entries.get(name, None)
+            if entry is None:
+                entry = entries[name] = ASGInterpreterProfileEntry(name)
+            entry.addStepProfile(stepProfile)
+        for stackKey, sampleCount in self.samples.items():
+            instructions, pc = stackKey[-1]
+            name = keyFunction(instructions.compiledStepInstructions[pc])
+            entry = entries.get(name, None)
+            if entry is None:
+                entry = entries[name] = ASGInterpreterProfileEntry(name)
+            entry.sampleCount += sampleCount
+        return sorted(entries.values(), key = lambda entry: (-entry.selfTime, -entry.sampleCount, entry.name))
+
+    def getKindProfileEntries(self) -> list[ASGInterpreterProfileEntry]:
+        return self.getProfileEntries(lambda instruction: instruction.__asgKindName__)
+
+    def getSourceLineProfileEntries(self) -> list[ASGInterpreterProfileEntry]:
+        return self.getProfileEntries(self.formatSourceLine)
+
+    def formatReport(self) -> str:
+        executionCount = sum(stepProfile[0] for stepProfile in self.stepProfiles.values())
+        sampleCount = sum(self.samples.values())
+        result = 'Interpreter profile: %d activations, %d steps, %d samples\n' % (self.activationCount, executionCount, sampleCount)
+        for title, entries in [('kind', self.getKindProfileEntries()), ('source line', self.getSourceLineProfileEntries())]:
+            result += '%-48s %10s %14s %14s %10s\n' % (title, 'executions', 'cumulative ms', 'self ms', 'samples')
+            for entry in entries:
+                result += '%-48s %10d %14.3f %14.3f %10d\n' % (entry.name, entry.executionCount, entry.cumulativeTime * 1000.0, entry.selfTime * 1000.0, entry.sampleCount)
+        return result
+
+    def formatCollapsedStacks(self) -> str:
+        ## One line per stack with its frames separated by semicolons, followed by its weight, as consumed by flamegraph.pl.
+        ## The counted steps are weighted by their self time in microseconds, and the sampled stacks by their sample count.
+        weights = {}
+        for (callerKey, instructions, pc), stepProfile in self.stepProfiles.items():
+            stack = ';'.join(self.formatStackFrames(callerKey + ((instructions, pc),)))
+            weights[stack] = weights.get(stack, 0) + max(0, round(stepProfile[2] * 1e6))
+        for stackKey, sampleCount in self.samples.items():
+            stack = ';'.join(self.formatStackFrames(stackKey))
+            weights[stack] = weights.get(stack, 0) + sampleCount
+        result = ''
+        for stack, weight in sorted(weights.items()):
+            result += '%s %d\n' % (stack, weight)
+        return result
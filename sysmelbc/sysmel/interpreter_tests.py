@@ -0,0 +1,38 @@
+from .asg import *
+from .interpreter import *
+import unittest
+
+class TestASGInterpreter(unittest.TestCase):
+    def setUp(self):
+        derivation = ASGNodeNoDerivation.getSingleton()
+        integerType = ASGBaseTypeNode(derivation, 'Int32')
+        functional = ASGArgumentNode(derivation, integerType, 0, 'f')
+        argument = ASGArgumentNode(derivation, integerType, 1, 'x')
+        entryPoint = ASGSequenceEntryNode(derivation)
+        firstApplication = ASGFxApplicationNode(derivation, integerType, functional, [argument], predecessor = entryPoint)
+        secondApplication = ASGFxApplicationNode(derivation, integerType, functional, [firstApplication], predecessor = firstApplication)
+        returnNode = ASGSequenceReturnNode(derivation, secondApplication, predecessor = secondApplication)
+        self.instructions = ASGNodeWithInterpretableInstructions(None, [integerType, functional, argument, entryPoint, firstApplication, secondApplication, returnNode], 1, 2)
+
+    def evaluateWithCompiledSteps(self, useCompiledSteps: bool):
+        ASGNodeWithInterpretableInstructions.UseCompiledSteps = useCompiledSteps
+        try:
+            return self.instructions.evaluateInModuleWithArguments(None, lambda x: x * 2 + 1, 5)
+        finally:
+            ASGNodeWithInterpretableInstructions.UseCompiledSteps = True
+
+    def testCompiledStepsMatchInterpreterLoop(self):
+        self.assertEqual(self.evaluateWithCompiledSteps(False), 23)
+        self.assertEqual(self.evaluateWithCompiledSteps(True), 23)
+
+    def testProfilerCountsStepsPerKind(self):
+        profiler = ASGInterpreterProfiler()
+        profiler.install()
+        try:
+            self.assertEqual(self.instructions.evaluateInModuleWithArguments(None, lambda x: x * 2 + 1, 5), 23)
+        finally:
+            profiler.uninstall()
+        executionCounts = {entry.name: entry.executionCount for entry in profiler.getKindProfileEntries()}
+        self.assertEqual(executionCounts, {'FxApplication': 2, 'SequenceReturn': 1})
+        ## Both applications have the same frames, so they are merged into a single stack.
+        self.assertEqual(len(profiler.formatCollapsedStacks().splitlines()), 2)
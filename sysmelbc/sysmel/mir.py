@@ -3,7 +3,7 @@ from .environment import *
 from .asg import *
 
 class ASGNodeMirExpansionDerivation(ASGNodeExpansionDerivation):
-    pass
+    __slots__ = ()
 
 class ASGMirReductionAlgorithm(ASGDynamicProgrammingReductionAlgorithm):
     def __init__(self) -> None:
@@ -230,6 +230,7 @@ class ASGMirExpanderAlgorithm(ASGDynamicProgrammingAlgorithm):
         arguments = definitionExpander.expandFlattenedNodes(node.arguments)
         entryPoint = definitionExpander.expandNode(node.entryPoint)
         exitPoint = definitionExpander.expandNode(node.exitPoint)
+        definitionExpander.builder.exitScope()
 
         definition = self.builder.forMirExpansionBuildAndSequence(self, node, ASGMirFunctionDefinitionNode, mirType.functionType, arguments, entryPoint, node.callingConvention, name = node.name, exitPoint = exitPoint)
         return self.builder.forMirExpansionBuildAndSequence(self, node, ASGMirLambdaNode, mirType, definition, [], name = node.name)
@@ -8,6 +8,35 @@ class ModuleExportedValue:
         self.externalName = externalName
         self.mirValue = None
 
+class ModuleMacroExpansionCache:
+    ## Macro expansion artifacts that are reused by every call site in the module.
+    def __init__(self) -> None:
+        self.evaluatedMacroExpressions = {}
+        self.quasiQuoteTemplates = {}
+
+class ModuleDependentInstantiationCache:
+    ## Keyed by the dependent type, the substituted node and the unified arguments, which are compared by identity.
+    def __init__(self) -> None:
+        self.instantiations = {}
+        self.hitCount = 0
+        self.missCount = 0
+
+    def lookup(self, key: tuple):
+        instantiation = self.instantiations.get(key, None)
+        if instantiation is None:
+            self.missCount += 1
+        else:
+            self.hitCount += 1
+        return instantiation
+
+    def store(self, key: tuple, instantiation: object):
+        self.instantiations[key] = instantiation
+
+    def formatReport(self) -> str:
+        lookupCount = self.hitCount + self.missCount
+        hitRate = self.hitCount * 100.0 / lookupCount if lookupCount != 0 else 0.0
+        return 'Dependent instantiations: %d entries, %d lookups, %d hits, %d misses, %.1f%% hit rate\n' % (len(self.instantiations), lookupCount, self.hitCount, self.missCount, hitRate)
+
 class Module:
     def __init__(self, name: str, target: CompilationTarget) -> None:
         self.name = name
@@ -15,6 +44,8 @@ class Module:
         self.exportedValues = []
         self.mirExportedValues = []
         self.globalNamespace = Namespace('__global')
+        self.macroExpansionCache = ModuleMacroExpansionCache()
+        self.dependentInstantiationCache = ModuleDependentInstantiationCache()
 
     def exportValueWithName(self, value, name, externalName):
         self.exportedValues.append(ModuleExportedValue(name, value, externalName))
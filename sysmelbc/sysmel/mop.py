@@ -6,6 +6,8 @@ import copy
 import struct
 
 class ASGNodeDerivation(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def getSourcePosition(self) -> SourcePosition:
         pass
@@ -14,6 +16,8 @@ class ASGNodeDerivation(ABC):
         return ()
 
 class ASGNodeSourceCodeDerivation(ASGNodeDerivation):
+    __slots__ = ('sourcePosition',)
+
     def __init__(self, sourcePosition: SourcePosition) -> None:
         super().__init__()
         self.sourcePosition = sourcePosition
@@ -22,6 +26,8 @@ class ASGNodeSourceCodeDerivation(ASGNodeDerivation):
         return self.sourcePosition
 
 class ASGNodeExpansionDerivation(ASGNodeDerivation):
+    __slots__ = ('algorithm', 'sourceNode', 'sourcePosition')
+
     def __init__(self, algorithm, sourceNode) -> None:
         super().__init__()
         self.algorithm = algorithm
@@ -38,6 +44,8 @@ class ASGNodeExpansionDerivation(ASGNodeDerivation):
         return (self.sourceNode,)
 
 class ASGNodeUnificationDerivation(ASGNodeDerivation):
+    __slots__ = ('originalNode', 'unifiedNode', 'sourcePosition')
+
     def __init__(self, originalNode, unifiedNode) -> None:
         super().__init__()
         self.originalNode = originalNode
@@ -54,20 +62,23 @@ class ASGNodeUnificationDerivation(ASGNodeDerivation):
         return (self.originalNode,)
 
 class ASGNodeSyntaxExpansionDerivation(ASGNodeExpansionDerivation):
-    pass
+    __slots__ = ()
 
 class ASGNodeCoercionExpansionDerivation(ASGNodeExpansionDerivation):
-    pass
+    __slots__ = ()
 
 class ASGNodeMacroExpansionDerivation(ASGNodeExpansionDerivation):
+    __slots__ = ('macro',)
+
     def __init__(self, algorithm, sourceNode, macro) -> None:
         super().__init__(algorithm, sourceNode)
         self.macro = macro
 
 class ASGNodeReductionDerivation(ASGNodeExpansionDerivation):
-    pass
+    __slots__ = ()
 
 class ASGNodeNoDerivation(ASGNodeDerivation):
+    __slots__ = ()
     Singleton = None
 
     def getSourcePosition(self) -> SourcePosition:
@@ -80,10 +91,14 @@ class ASGNodeNoDerivation(ASGNodeDerivation):
         return cls.Singleton
 
 class ASGNodeMirExpansionDerivation(ASGNodeExpansionDerivation):
-    pass
+    __slots__ = ()
 
 class ASGNodeMirTypeExpansionDerivation(ASGNodeExpansionDerivation):
-    pass
+    __slots__ = ()
+
+def unificationHashOfSequence(nodes) -> int:
+    ## Hashing the tuple of the element hashes is sensitive to the order, so that permutations do not collide.
+    return hash(tuple([node.unificationHash() for node in nodes]))
 
 class ASGNodeAttributeDescriptor:
     def __init__(self) -> None:
@@ -92,7 +107,10 @@ class ASGNodeAttributeDescriptor:
 
     def setName(self, name: str):
         self.name = name
-        self.storageName = '_' + name
+        self.storageName = name
+
+    def getStorageSlotNames(self) -> tuple[str]:
+        return (self.storageName,)
 
     def loadValueFrom(self, instance):
         return getattr(instance, self.storageName)
@@ -112,6 +130,12 @@ class ASGNodeAttributeDescriptor:
     def initializeWithDefaultConstructorValueOn(self, instance):
         raise Exception("Cannot initialize attribute %s with default value during construction." % str(self.name))
 
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return ['%s.initializeWithConstructorValueOn(%s, self)' % (generator.bind(self), valueName)]
+
+    def generateDefaultInitializationCodeWith(self, generator) -> list[str]:
+        return ['%s.initializeWithDefaultConstructorValueOn(self)' % generator.bind(self)]
+
     def isConstructionAttribute(self) -> bool:
         return False
 
@@ -147,12 +171,6 @@ class ASGNodeAttributeDescriptor:
     
     def getNodeDerivationsOf(self, instance):
         return ()
-    
-    def __get__(self, instance, owner):
-        return self.loadValueFrom(instance)
-    
-    def __set__(self, instance, value):
-        raise Exception('Not supported')
 
 class ASGNodeConstructionAttribute(ASGNodeAttributeDescriptor):
     def isConstructionAttribute(self) -> bool:
@@ -176,6 +194,15 @@ class ASGNodeConstructionAttribute(ASGNodeAttributeDescriptor):
     def initializeWithConstructorValueOn(self, constructorValue, instance):
         self.storeValueIn(constructorValue, instance)
 
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return ['self.%s = %s' % (self.storageName, valueName)]
+
+    def generateHashCodeWith(self, generator) -> str:
+        return 'hash(self.%s)' % self.storageName
+
+    def generateEqualsCodeWith(self, generator) -> str:
+        return 'self.%s == other.%s' % (self.storageName, self.storageName)
+
 class ASGNodeConstructionAttributeWithSourceDerivation(ASGNodeConstructionAttribute):
     def __init__(self, notInterpreted = False) -> None:
         super().__init__()
@@ -184,7 +211,10 @@ class ASGNodeConstructionAttributeWithSourceDerivation(ASGNodeConstructionAttrib
 
     def setName(self, name: str):
         super().setName(name)
-        self.sourceDerivationStorageName = '_' + name + '_sourceDerivation'
+        self.sourceDerivationStorageName = name + '_sourceDerivation'
+
+    def getStorageSlotNames(self) -> tuple[str]:
+        return (self.storageName, self.sourceDerivationStorageName)
 
     def loadSourceDerivationFrom(self, instance):
         return getattr(instance, self.sourceDerivationStorageName)
@@ -196,6 +226,36 @@ class ASGNodeConstructionAttributeWithSourceDerivation(ASGNodeConstructionAttrib
         self.storeValueIn(constructorValue.asASGNode(), instance)
         self.storeSourceDerivationIn(constructorValue.asASGNodeDerivation(), instance)
 
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return self.generateConvertedInitializationCode(valueName, 'asASGNode')
+
+    def generateConvertedInitializationCode(self, valueName: str, conversionSelector: str) -> list[str]:
+        return ['self.%s = %s.%s()' % (self.storageName, valueName, conversionSelector),
+                'self.%s = %s.%sDerivation()' % (self.sourceDerivationStorageName, valueName, conversionSelector)]
+
+    def generateOptionalConvertedInitializationCode(self, valueName: str, conversionSelector: str) -> list[str]:
+        return ['if %s is None:' % valueName] + self.generateNoneInitializationCode(' ' * 4) + \
+            ['else:'] + list(map(lambda line: ' ' * 4 + line, self.generateConvertedInitializationCode(valueName, conversionSelector)))
+
+    def generateNoneInitializationCode(self, indentation: str = '') -> list[str]:
+        return [indentation + 'self.%s = None' % self.storageName, indentation + 'self.%s = None' % self.sourceDerivationStorageName]
+
+    def generateConvertedTupleInitializationCode(self, valueName: str, conversionSelector: str) -> list[str]:
+        return ['self.%s = tuple([element.%s() for element in %s])' % (self.storageName, conversionSelector, valueName),
+                'self.%s = tuple([element.%sDerivation() for element in %s])' % (self.sourceDerivationStorageName, conversionSelector, valueName)]
+
+    def generateNodeHashCode(self) -> str:
+        return 'self.%s.unificationHash()' % self.storageName
+
+    def generateNodeEqualsCode(self) -> str:
+        return 'self.%s.unificationEquals(other.%s)' % (self.storageName, self.storageName)
+
+    def generateTupleHashCodeWith(self, generator) -> str:
+        return 'hash(tuple([element.unificationHash() for element in self.%s]))' % self.storageName
+
+    def generateTupleEqualsCodeWith(self, generator) -> str:
+        return '%s.equalsFromAndFrom(self, other)' % generator.bind(self)
+
 class ASGNodeDataAttribute(ASGNodeConstructionAttribute):
     def __init__(self, type, **kwArguments) -> None:
         super().__init__()
@@ -226,6 +286,11 @@ class ASGNodeDataAttribute(ASGNodeConstructionAttribute):
         else:
             super().initializeWithDefaultConstructorValueOn(instance)
 
+    def generateDefaultInitializationCodeWith(self, generator) -> list[str]:
+        if self.hasDefaultValue:
+            return ['self.%s = %s' % (self.storageName, generator.bind(self.defaultValue))]
+        return super().generateDefaultInitializationCodeWith(generator)
+
     def isDataAttribute(self) -> bool:
         return True
 
@@ -253,6 +318,9 @@ class ASGPredecessorAttribute(ASGNodeConstructionAttributeWithSourceDerivation):
         self.storeValueIn(None, instance)
         self.storeSourceDerivationIn(None, instance)
 
+    def generateDefaultInitializationCodeWith(self, generator) -> list[str]:
+        return self.generateNoneInitializationCode()
+
     def getNodeInputsOf(self, instance):
         value = self.loadValueFrom(instance)
         if value is None:
@@ -264,6 +332,12 @@ class ASGPredecessorAttribute(ASGNodeConstructionAttributeWithSourceDerivation):
     
     def equalsFromAndFrom(self, first, second) -> bool:
         return self.loadValueFrom(first).unificationEquals(self.loadValueFrom(second))
+
+    def generateHashCodeWith(self, generator) -> str:
+        return self.generateNodeHashCode()
+
+    def generateEqualsCodeWith(self, generator) -> str:
+        return self.generateNodeEqualsCode()
     
 class ASGSyntacticPredecessorAttribute(ASGPredecessorAttribute):
     def isSyntacticPredecessorAttribute(self) -> bool:
@@ -276,6 +350,9 @@ class ASGSyntacticPredecessorAttribute(ASGPredecessorAttribute):
         else:
             super().initializeWithConstructorValueOn(constructorValue, instance)
 
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return self.generateOptionalConvertedInitializationCode(valueName, 'asASGNode')
+
 class ASGSequencingPredecessorAttribute(ASGPredecessorAttribute):
     def isSequencingPredecessorAttribute(self) -> bool:
         return True
@@ -287,12 +364,24 @@ class ASGSequencingPredecessorAttribute(ASGPredecessorAttribute):
         else:
             self.storeValueIn(constructorValue.asASGSequencingNode(), instance)
             self.storeSourceDerivationIn(constructorValue.asASGSequencingNodeDerivation(), instance)
+
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return self.generateOptionalConvertedInitializationCode(valueName, 'asASGSequencingNode')
     
 class ASGSequencingPredecessorsAttribute(ASGPredecessorAttribute):
     def initializeWithConstructorValueOn(self, constructorValue, instance):
         self.storeValueIn(tuple(map(lambda x: x.asASGSequencingNode(), constructorValue)), instance)
         self.storeSourceDerivationIn(tuple(map(lambda x: x.asASGSequencingNodeDerivation(), constructorValue)), instance)
 
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return self.generateConvertedTupleInitializationCode(valueName, 'asASGSequencingNode')
+
+    def generateHashCodeWith(self, generator) -> str:
+        return self.generateTupleHashCodeWith(generator)
+
+    def generateEqualsCodeWith(self, generator) -> str:
+        return self.generateTupleEqualsCodeWith(generator)
+
     def isSequencingPredecessorAttribute(self) -> bool:
         return True
     
@@ -300,11 +389,7 @@ class ASGSequencingPredecessorsAttribute(ASGPredecessorAttribute):
         return self.loadValueFrom(instance)
 
     def hashFrom(self, instance) -> int:
-        result = hash(tuple)
-        for value in self.loadValueFrom(instance):
-            result ^= value.unificationHash()
-
-        return value.unificationHash()
+        return unificationHashOfSequence(self.loadValueFrom(instance))
     
     def equalsFromAndFrom(self, first, second) -> bool:
         firstValue = self.loadValueFrom(first)
@@ -337,6 +422,15 @@ class ASGSequencingDestinationPort(ASGNodeConstructionAttributeWithSourceDerivat
     
     def equalsFromAndFrom(self, first, second) -> bool:
         return self.loadValueFrom(first).unificationEquals(self.loadValueFrom(second))
+
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return self.generateConvertedInitializationCode(valueName, 'asASGSequencingNode')
+
+    def generateHashCodeWith(self, generator) -> str:
+        return self.generateNodeHashCode()
+
+    def generateEqualsCodeWith(self, generator) -> str:
+        return self.generateNodeEqualsCode()
     
 class ASGNodeDataInputPort(ASGNodeConstructionAttributeWithSourceDerivation):
     def initializeWithConstructorValueOn(self, constructorValue, instance):
@@ -357,6 +451,15 @@ class ASGNodeDataInputPort(ASGNodeConstructionAttributeWithSourceDerivation):
     
     def equalsFromAndFrom(self, first, second) -> bool:
         return self.loadValueFrom(first).unificationEquals(self.loadValueFrom(second))
+
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return self.generateConvertedInitializationCode(valueName, 'asASGDataNode')
+
+    def generateHashCodeWith(self, generator) -> str:
+        return self.generateNodeHashCode()
+
+    def generateEqualsCodeWith(self, generator) -> str:
+        return self.generateNodeEqualsCode()
     
 class ASGNodeOptionalDataInputPort(ASGNodeConstructionAttributeWithSourceDerivation):
     def initializeWithConstructorValueOn(self, constructorValue, instance):
@@ -394,11 +497,29 @@ class ASGNodeOptionalDataInputPort(ASGNodeConstructionAttributeWithSourceDerivat
             return False
         return firstValue.unificationEquals(secondValue)
 
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return self.generateOptionalConvertedInitializationCode(valueName, 'asASGDataNode')
+
+    def generateHashCodeWith(self, generator) -> str:
+        return '(hash(None) if self.%s is None else self.%s.unificationHash())' % (self.storageName, self.storageName)
+
+    def generateEqualsCodeWith(self, generator) -> str:
+        return '(self.%s is other.%s or (self.%s is not None and self.%s.unificationEquals(other.%s)))' % ((self.storageName,) * 5)
+
 class ASGNodeDataInputPorts(ASGNodeConstructionAttributeWithSourceDerivation):
     def initializeWithConstructorValueOn(self, constructorValue, instance) -> bool:
         self.storeValueIn(tuple(map(lambda x: x.asASGDataNode(), constructorValue)), instance)
         self.storeSourceDerivationIn(tuple(map(lambda x: x.asASGDataNodeDerivation(), constructorValue)), instance)
 
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return self.generateConvertedTupleInitializationCode(valueName, 'asASGDataNode')
+
+    def generateHashCodeWith(self, generator) -> str:
+        return self.generateTupleHashCodeWith(generator)
+
+    def generateEqualsCodeWith(self, generator) -> str:
+        return self.generateTupleEqualsCodeWith(generator)
+
     def isDataInputPort(self) -> bool:
         return True
 
@@ -409,11 +530,7 @@ class ASGNodeDataInputPorts(ASGNodeConstructionAttributeWithSourceDerivation):
         return self.loadValueFrom(instance)
 
     def hashFrom(self, instance) -> int:
-        result = hash(tuple)
-        for value in self.loadValueFrom(instance):
-            result ^= value.unificationHash()
-
-        return result
+        return unificationHashOfSequence(self.loadValueFrom(instance))
     
     def equalsFromAndFrom(self, first, second) -> bool:
         firstValue = self.loadValueFrom(first)
@@ -432,6 +549,15 @@ class ASGNodeDataAndSequencingInputPorts(ASGNodeConstructionAttributeWithSourceD
         self.storeValueIn(tuple(map(lambda x: x.asASGNode(), constructorValue)), instance)
         self.storeSourceDerivationIn(tuple(map(lambda x: x.asASGNodeDerivation(), constructorValue)), instance)
 
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return self.generateConvertedTupleInitializationCode(valueName, 'asASGNode')
+
+    def generateHashCodeWith(self, generator) -> str:
+        return self.generateTupleHashCodeWith(generator)
+
+    def generateEqualsCodeWith(self, generator) -> str:
+        return self.generateTupleEqualsCodeWith(generator)
+
     def isDataInputPort(self) -> bool:
         return True
 
@@ -442,11 +568,7 @@ class ASGNodeDataAndSequencingInputPorts(ASGNodeConstructionAttributeWithSourceD
         return self.loadValueFrom(instance)
 
     def hashFrom(self, instance) -> int:
-        result = hash(tuple)
-        for value in self.loadValueFrom(instance):
-            result ^= value.unificationHash()
-
-        return value.unificationHash()
+        return unificationHashOfSequence(self.loadValueFrom(instance))
     
     def equalsFromAndFrom(self, first, second) -> bool:
         firstValue = self.loadValueFrom(first)
@@ -480,11 +602,29 @@ class ASGNodeTypeInputNode(ASGNodeConstructionAttributeWithSourceDerivation):
     def equalsFromAndFrom(self, first, second) -> bool:
         return self.loadValueFrom(first).unificationEquals(self.loadValueFrom(second))
 
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return self.generateConvertedInitializationCode(valueName, 'asASGTypeNode')
+
+    def generateHashCodeWith(self, generator) -> str:
+        return self.generateNodeHashCode()
+
+    def generateEqualsCodeWith(self, generator) -> str:
+        return self.generateNodeEqualsCode()
+
 class ASGNodeTypeInputNodes(ASGNodeConstructionAttributeWithSourceDerivation):
     def initializeWithConstructorValueOn(self, constructorValue, instance) -> bool:
         self.storeValueIn(tuple(map(lambda x: x.asASGTypeNode(), constructorValue)), instance)
         self.storeSourceDerivationIn(tuple(map(lambda x: x.asASGTypeNodeDerivation(), constructorValue)), instance)
 
+    def generateInitializationCodeWith(self, generator, valueName: str) -> list[str]:
+        return self.generateConvertedTupleInitializationCode(valueName, 'asASGTypeNode')
+
+    def generateHashCodeWith(self, generator) -> str:
+        return self.generateTupleHashCodeWith(generator)
+
+    def generateEqualsCodeWith(self, generator) -> str:
+        return self.generateTupleEqualsCodeWith(generator)
+
     def isInterpretationDependency(self) -> bool:
         return True
     
@@ -495,11 +635,7 @@ class ASGNodeTypeInputNodes(ASGNodeConstructionAttributeWithSourceDerivation):
         return self.loadValueFrom(instance)
 
     def hashFrom(self, instance) -> int:
-        result = hash(tuple)
-        for value in self.loadValueFrom(instance):
-            result ^= value.unificationHash()
-
-        return value.unificationHash()
+        return unificationHashOfSequence(self.loadValueFrom(instance))
     
     def equalsFromAndFrom(self, first, second) -> bool:
         firstValue = self.loadValueFrom(first)
@@ -513,6 +649,115 @@ class ASGNodeTypeInputNodes(ASGNodeConstructionAttributeWithSourceDerivation):
 
         return True
     
+def initializeASGNodeWithKeywordArguments(node, kwArguments):
+    constructionAttributeDictionary = node.__class__.__asgConstructionAttributeDictionary__
+    for key, value in kwArguments.items():
+        if key not in constructionAttributeDictionary:
+            raise Exception('Failed to find attribute %s in %s' % (str(key), repr(node.__class__)))
+        constructionAttributeDictionary[key].initializeWithConstructorValueOn(value, node)
+
+class ASGNodeMethodsGenerator:
+    def __init__(self, nodeClass) -> None:
+        self.nodeClass = nodeClass
+        self.namespace = {
+            'nodeClass': nodeClass,
+            'nodeClassHash': hash(nodeClass),
+            'initializeASGNodeWithKeywordArguments': initializeASGNodeWithKeywordArguments,
+        }
+        self.boundValueNames = {}
+
+    def bind(self, value) -> str:
+        name = self.boundValueNames.get(id(value), None)
+        if name is None:
+            name = 'boundValue%d' % len(self.boundValueNames)
+            self.boundValueNames[id(value)] = name
+            self.namespace[name] = value
+        return name
+
+    def generateInitializeSource(self) -> list[str]:
+        constructionAttributes = self.nodeClass.__asgConstructionAttributes__
+        lines = [
+            'def __init__(self, *positionalArguments, **kwArguments):',
+            '    if self.__class__ is not nodeClass:',
+            '        return self.__class__.__asgGeneratedInitialize__(self, *positionalArguments, **kwArguments)',
+            '    self.__hashValueCache__ = None',
+            '    self.__betaReplaceableDependencyMask__ = None',
+            '    self.__dominanceTreeDepth__ = None',
+            '    self.__constantDataNodeCache__ = None',
+            '    argumentCount = len(positionalArguments)',
+            '    if argumentCount > %d:' % len(constructionAttributes),
+            "        raise Exception('Excess number of construction arguments.')",
+        ]
+        for i, attribute in enumerate(constructionAttributes):
+            lines.append('    if argumentCount > %d:' % i)
+            lines.append('        value = positionalArguments[%d]' % i)
+            lines += map(lambda line: ' ' * 8 + line, attribute.generateInitializationCodeWith(self, 'value'))
+            lines.append('    else:')
+            lines += map(lambda line: ' ' * 8 + line, attribute.generateDefaultInitializationCodeWith(self))
+        lines += [
+            '    if kwArguments:',
+            '        initializeASGNodeWithKeywordArguments(self, kwArguments)',
+        ]
+        return lines
+
+    def generateUnificationHashSource(self) -> list[str]:
+        lines = [
+            'def unificationHash(self):',
+            '    if self.__hashValueCache__ is not None:',
+            '        return self.__hashValueCache__',
+            '    self.__hashValueCache__ = nodeClassHash',
+        ]
+
+        ## The attribute hashes are combined by hashing their tuple, which depends on their order.
+        attributeHashes = ['nodeClassHash']
+        for attribute in self.nodeClass.__asgConstructionAttributes__:
+            if attribute.isComparedForUnification():
+                attributeHashes.append(attribute.generateHashCodeWith(self))
+        if len(attributeHashes) > 1:
+            lines.append('    self.__hashValueCache__ = hash((%s))' % ', '.join(attributeHashes))
+        lines.append('    return self.__hashValueCache__')
+        return lines
+
+    def generateUnificationEqualsSource(self) -> list[str]:
+        lines = [
+            'def unificationEquals(self, other):',
+            '    if self is other: return True',
+            '    if self.__class__ != other.__class__:',
+            '        return False',
+        ]
+        for attribute in self.nodeClass.__asgConstructionAttributes__:
+            if attribute.isComparedForUnification():
+                lines.append('    if not (%s):' % attribute.generateEqualsCodeWith(self))
+                lines.append('        return False')
+        lines.append('    return True')
+        return lines
+
+    def compileFunction(self, sourceLines: list[str]):
+        source = '\n'.join(sourceLines) + '\n'
+        functionName = sourceLines[0][len('def '):sourceLines[0].index('(')]
+        exec(compile(source, '<generated %s.%s>' % (self.nodeClass.__name__, functionName), 'exec'), self.namespace)
+        function = self.namespace.pop(functionName)
+        function.__qualname__ = self.nodeClass.__qualname__ + '.' + functionName
+        function.__asgGeneratedSource__ = source
+        return function
+
+    def isReplaceableMethod(self, selector: str, classAttributes) -> bool:
+        ## Methods written by hand in the class or inherited from a hand written implementation are kept.
+        if selector in classAttributes:
+            return False
+        inheritedMethod = getattr(self.nodeClass, selector, None)
+        return inheritedMethod is None or inheritedMethod is object.__init__ or hasattr(inheritedMethod, '__asgGeneratedSource__')
+
+    def installMethods(self, classAttributes):
+        initializeMethod = self.compileFunction(self.generateInitializeSource())
+        self.nodeClass.__asgGeneratedInitialize__ = initializeMethod
+        if self.isReplaceableMethod('__init__', classAttributes):
+            self.nodeClass.__init__ = initializeMethod
+        if self.isReplaceableMethod('unificationHash', classAttributes):
+            self.nodeClass.unificationHash = self.compileFunction(self.generateUnificationHashSource())
+        if self.isReplaceableMethod('unificationEquals', classAttributes):
+            self.nodeClass.unificationEquals = self.compileFunction(self.generateUnificationEqualsSource())
+
 class ASGNodeMetaclass(type):
     def __new__(cls, name, bases, attributes):
         descriptors = []
@@ -521,12 +766,17 @@ class ASGNodeMetaclass(type):
             if baseDescriptors is not None:
                 descriptors += baseDescriptors
 
-        for attributeName, attributeDescriptor in attributes.items():
+        ## The attribute values are stored directly in slots, which replace the descriptors in the class.
+        slots = list(attributes.get('__slots__', ()))
+        for attributeName, attributeDescriptor in list(attributes.items()):
             if not isinstance(attributeDescriptor, ASGNodeAttributeDescriptor):
                 continue
 
             attributeDescriptor.setName(attributeName)
             descriptors.append(attributeDescriptor)
+            slots += attributeDescriptor.getStorageSlotNames()
+            del attributes[attributeName]
+        attributes['__slots__'] = tuple(slots)
 
         specialAttributes: list[ASGNodeAttributeDescriptor] = list(filter(lambda desc: desc.isSpecialAttribute(), descriptors))
         syntacticPredecessors: list[ASGNodeAttributeDescriptor] = list(filter(lambda desc: desc.isSyntacticPredecessorAttribute(), descriptors))
@@ -558,55 +808,13 @@ class ASGNodeMetaclass(type):
         nodeClass.__asgTypeInputPorts__ = typeInputPorts
         nodeClass.__asgDestinationPorts__ = destinationPorts
         nodeClass.__asgInterpretationDependency__ = interpretationDependencies
+        ASGNodeMethodsGenerator(nodeClass).installMethods(attributes)
         return nodeClass
 
 class ASGNode(metaclass = ASGNodeMetaclass):
-    def __init__(self, *positionalArguments, **kwArguments) -> None:
-        super().__init__()
+    __slots__ = ('__hashValueCache__', '__betaReplaceableDependencyMask__', '__dominanceTreeDepth__', '__constantDataNodeCache__')
 
-        self.__hashValueCache__ = None
-        self.__betaReplaceableDependencies__ = None
-        self.__dominanceTreeDepth__ = None
-        self.__constantDataNodeCache__ = None
-
-        constructionAttributes = self.__class__.__asgConstructionAttributes__
-        constructionAttributeDictionary = self.__class__.__asgConstructionAttributeDictionary__
-        if len(positionalArguments) > len(constructionAttributes):
-            raise Exception('Excess number of construction arguments.')
-        
-        for i in range(len(positionalArguments)):
-            constructionAttributes[i].initializeWithConstructorValueOn(positionalArguments[i], self)
-        for i in range(len(positionalArguments), len(constructionAttributes)):
-            constructionAttributes[i].initializeWithDefaultConstructorValueOn(self)
-
-        for key, value in kwArguments.items():
-            if key not in constructionAttributeDictionary:
-                raise Exception('Failed to find attribute %s in %s' % (str(key), repr(self.__class__)))
-            constructionAttributeDictionary[key].initializeWithConstructorValueOn(value, self)
-
-    def unificationHash(self) -> int:
-        if self.__hashValueCache__ is not None:
-            return self.__hashValueCache__
-
-        self.__hashValueCache__ = hash(self.__class__)
-        constructionAttributes = self.__class__.__asgConstructionAttributes__
-        for attribute in constructionAttributes:
-            if attribute.isComparedForUnification():
-                self.__hashValueCache__ ^= attribute.hashFrom(self)
-        return self.__hashValueCache__
-    
-    def unificationEquals(self, other) -> bool:
-        if self is other: return True
-        if self.__class__ != other.__class__:
-            return False
-
-        constructionAttributes = self.__class__.__asgConstructionAttributes__
-        for attribute in constructionAttributes:
-            if attribute.isComparedForUnification():
-                if not attribute.equalsFromAndFrom(self, other):
-                    return False
-
-        return True
+    ## The __init__, unificationHash and unificationEquals methods are generated for each node class by ASGNodeMetaclass.
 
     def isSatisfiedAsTypeBy(self, otherType) -> bool:
         if otherType.isBottomTypeNode():
@@ -858,19 +1066,22 @@ class ASGNode(metaclass = ASGNodeMetaclass):
     def expandSyntaxBindingReferenceWith(self, bindingReferenceNode, expander):
         return self
 
-    def betaReplaceableDependencies(self):
-        if self.__betaReplaceableDependencies__ is not None:
-            return self.__betaReplaceableDependencies__
-        
-        self.__betaReplaceableDependencies__ = set()
-        if self.isBetaReplaceableNode():
-            self.__betaReplaceableDependencies__.add(self)
+    def getBetaReplaceableNodeBit(self) -> int:
+        return 0
 
-        for dependency in self.allDependencies():
-            if dependency not in self.__betaReplaceableDependencies__:
-                for element in dependency.betaReplaceableDependencies():
-                    self.__betaReplaceableDependencies__.add(element)
-        return self.__betaReplaceableDependencies__
+    def betaReplaceableDependencyMask(self) -> int:
+        ## Bitset of the beta replaceable nodes that this node depends on, for skipping the closed subgraphs during a substitution.
+        if self.__betaReplaceableDependencyMask__ is not None:
+            return self.__betaReplaceableDependencyMask__
+
+        def computeMask(node: ASGNode):
+            mask = node.getBetaReplaceableNodeBit()
+            for dependency in node.allDependencies():
+                mask |= dependency.__betaReplaceableDependencyMask__
+            node.__betaReplaceableDependencyMask__ = mask
+
+        asgDepthFirstPostOrderDo(self, lambda node: filter(lambda dependency: dependency.__betaReplaceableDependencyMask__ is None, node.allDependencies()), computeMask)
+        return self.__betaReplaceableDependencyMask__
 
     def isArgumentNode(self) -> bool:
         return False
@@ -953,11 +1164,17 @@ class ASGNode(metaclass = ASGNodeMetaclass):
 
     def dominanceTreeDepth(self):
         if self.__dominanceTreeDepth__ is None:
-            idom = self.immediateDominator()
-            if idom is not None:
-                self.__dominanceTreeDepth__ = idom.dominanceTreeDepth() + 1
-            else:
-                self.__dominanceTreeDepth__ = 0
+            ## Walk up the dominator chain up to a node with a known depth, and fill the depths back down.
+            pendingNodes = []
+            node = self
+            while node is not None and node.__dominanceTreeDepth__ is None:
+                pendingNodes.append(node)
+                node = node.immediateDominator()
+
+            depth = node.__dominanceTreeDepth__ if node is not None else -1
+            for pendingNode in reversed(pendingNodes):
+                depth += 1
+                pendingNode.__dominanceTreeDepth__ = depth
 
         return self.__dominanceTreeDepth__
     
@@ -1012,6 +1229,9 @@ class ASGNode(metaclass = ASGNodeMetaclass):
 
     def interpretInContext(self, context, parameters):
         raise Exception('Cannot interpret %s.' % self.printNameWithDataAttributes())
+
+    def compileInterpretationStepWith(self, compiler, resultSlot: int, parameters):
+        return compiler.compileGenericStep(self, resultSlot, parameters)
     
     def isMirFunctionType(self):
         return False
@@ -1050,6 +1270,82 @@ class ASGUnificationComparisonNode:
     def __hash__(self) -> int:
         return self.node.unificationHash()
 
+class ASGGVNKindStatistics:
+    def __init__(self, kindName: str) -> None:
+        self.kindName = kindName
+        self.lookupCount = 0
+        self.hitCount = 0
+        self.probeCount = 0
+        self.equalityCheckCount = 0
+        self.failedEqualityCheckCount = 0
+        self.insertionCount = 0
+        self.removalCount = 0
+
+    def getLiveEntryCount(self) -> int:
+        return self.insertionCount - self.removalCount
+
+    def getHitRate(self) -> float:
+        return self.hitCount / max(1, self.lookupCount)
+
+    def getAverageProbeCount(self) -> float:
+        return self.probeCount / max(1, self.lookupCount)
+
+    def getAverageEqualityCheckCount(self) -> float:
+        return self.equalityCheckCount / max(1, self.lookupCount)
+
+class ASGGVNStatistics:
+    ## The failed equality checks are the hash collisions.
+    def __init__(self) -> None:
+        self.kindStatistics: dict[str, ASGGVNKindStatistics] = {}
+        self.pendingEqualityCheckCount = 0
+        self.pendingFailedEqualityCheckCount = 0
+
+    def getKindStatistics(self, kind: type) -> ASGGVNKindStatistics:
+        statistics = self.kindStatistics.get(kind.__asgKindName__, None)
+        if statistics is None:
+            statistics = ASGGVNKindStatistics(kind.__asgKindName__)
+            self.kindStatistics[kind.__asgKindName__] = statistics
+        return statistics
+
+    def countEqualityCheck(self, result: bool):
+        self.pendingEqualityCheckCount += 1
+        if not result:
+            self.pendingFailedEqualityCheckCount += 1
+
+    def countLookup(self, kind: type, probeCount: int, isHit: bool):
+        statistics = self.getKindStatistics(kind)
+        statistics.lookupCount += 1
+        statistics.probeCount += probeCount
+        statistics.equalityCheckCount += self.pendingEqualityCheckCount
+        statistics.failedEqualityCheckCount += self.pendingFailedEqualityCheckCount
+        self.pendingEqualityCheckCount = 0
+        self.pendingFailedEqualityCheckCount = 0
+        if isHit:
+            statistics.hitCount += 1
+
+    def countInsertion(self, kind: type):
+        self.getKindStatistics(kind).insertionCount += 1
+
+    def countRemoval(self, kind: type):
+        self.getKindStatistics(kind).removalCount += 1
+
+    def getTableSize(self) -> int:
+        ## The entries of the finished child scopes are removed from the shared table.
+        return sum(statistics.getLiveEntryCount() for statistics in self.kindStatistics.values())
+
+    def getInsertionCount(self) -> int:
+        return sum(statistics.insertionCount for statistics in self.kindStatistics.values())
+
+    def formatReport(self) -> str:
+        lookupCount = sum(statistics.lookupCount for statistics in self.kindStatistics.values())
+        hitCount = sum(statistics.hitCount for statistics in self.kindStatistics.values())
+        result = 'GVN table size %d, %d insertions, %d lookups, hit rate %.1f%%\n' % (self.getTableSize(), self.getInsertionCount(), lookupCount, 100.0 * hitCount / max(1, lookupCount))
+        result += '%-32s %10s %10s %10s %9s %10s %10s %10s\n' % ('kind', 'lookups', 'insertions', 'entries', 'hit rate', 'probes', 'eq checks', 'collisions')
+        for statistics in sorted(self.kindStatistics.values(), key = lambda statistics: (-statistics.lookupCount, statistics.kindName)):
+            result += '%-32s %10d %10d %10d %8.1f%% %10.2f %10.2f %10d\n' % (statistics.kindName, statistics.lookupCount, statistics.insertionCount, statistics.getLiveEntryCount(), 100.0 * statistics.getHitRate(),
+                statistics.getAverageProbeCount(), statistics.getAverageEqualityCheckCount(), statistics.failedEqualityCheckCount)
+        return result
+
 class ASGPatternMatchingPattern(ABC):
     @abstractmethod
     def matchesNode(self, node: ASGNode):
@@ -1059,6 +1355,9 @@ class ASGPatternMatchingPattern(ABC):
     def getExpectedKind(self) -> type:
         pass
 
+    def getPredicate(self):
+        return self.matchesNode
+
     @abstractmethod
     def __call__(self, *args: Any, **kwds: Any) -> Any:
         pass
@@ -1075,6 +1374,9 @@ class ASGPatternMatchingNodeKindPattern(ASGPatternMatchingPattern):
     def matchesNode(self, node):
         return True
 
+    def getPredicate(self):
+        return None
+
     def __call__(self, algorithm, expansionResult, *args: Any, **kwArguments) -> Any:
         return self.function(algorithm, *args, **kwArguments)
 
@@ -1086,6 +1388,9 @@ class ASGPatternMatchingNodeKindPatternWithPredicate(ASGPatternMatchingNodeKindP
     def matchesNode(self, node):
         return self.predicate(node)
 
+    def getPredicate(self):
+        return self.predicate
+
 class ASGRecursivePatternMatchingNodeKindPattern(ASGPatternMatchingNodeKindPattern):
     def __call__(self, algorithm, expansionResult, *args: Any, **kwArguments) -> Any:
         return self.function(algorithm, expansionResult, *args, **kwArguments)
@@ -1168,8 +1473,34 @@ class ASGDynamicProgrammingAlgorithmMetaclass(type):
         algorithm = super().__new__(cls, name, bases, attributes)
         algorithm.__asgDPAPatterns__ = patterns
         algorithm.__asgDPAPatternKindDictionary__ = patternKindDictionary
+        algorithm.__asgDPANodeClassDecisionSequences__ = {}
         return algorithm
 
+    def getDecisionSequenceForNodeClass(algorithm, nodeClass: type) -> tuple:
+        decisionSequence = algorithm.__asgDPANodeClassDecisionSequences__.get(nodeClass, None)
+        if decisionSequence is None:
+            decisionSequence = algorithm.buildDecisionSequenceForNodeClass(nodeClass)
+            algorithm.__asgDPANodeClassDecisionSequences__[nodeClass] = decisionSequence
+        return decisionSequence
+
+    def buildDecisionSequenceForNodeClass(algorithm, nodeClass: type) -> tuple:
+        ## The (predicate, pattern) pairs in the order in which they are tried. A pattern without a predicate always matches,
+        ## so the sequence ends with it.
+        decisionSequence = []
+        currentClass = nodeClass
+        while currentClass is not None:
+            for pattern in algorithm.__asgDPAPatternKindDictionary__.get(currentClass, ()):
+                predicate = pattern.getPredicate()
+                decisionSequence.append((predicate, pattern))
+                if predicate is None:
+                    return tuple(decisionSequence)
+
+            if len(currentClass.__bases__) != 0:
+                currentClass = currentClass.__bases__[0]
+            else:
+                currentClass = None
+        return tuple(decisionSequence)
+
 class ASGDynamicProgrammingAlgorithmNodeExpansionResult:
     def __init__(self, incomingDelegatingExpansion, node: ASGNode) -> None:
         self.incomingDelegatingExpansion: ASGDynamicProgrammingAlgorithmNodeExpansionResult = incomingDelegatingExpansion
@@ -1189,18 +1520,113 @@ class ASGDynamicProgrammingAlgorithmNodeExpansionResult:
             self.incomingDelegatingExpansion.finishWithValue(resultValue)
         return resultValue
     
+class ASGGVNScope:
+    ## The ancestors are indexed by depth for a constant time visibility test.
+    __slots__ = ('parent', 'depth', 'ancestors', 'undoLog')
+
+    def __init__(self, parent) -> None:
+        self.parent: ASGGVNScope = parent
+        if parent is None:
+            self.depth = 0
+            self.ancestors = (self,)
+        else:
+            self.depth = parent.depth + 1
+            self.ancestors = parent.ancestors + (self,)
+        self.undoLog: list[ASGNode] = []
+
+    def isVisibleFrom(self, scope) -> bool:
+        return self.depth <= scope.depth and scope.ancestors[self.depth] is self
+
+class ASGGVNScopedTable:
+    ## A hash consing table shared by nested builders, where the innermost visible entry wins.
+    ## The builders are not used in strict stack order, so each scope has its own undo log.
+    def __init__(self) -> None:
+        self.buckets: dict[int, list[tuple[ASGNode, ASGGVNScope]]] = {}
+
+    def lookup(self, node: ASGNode, scope: ASGGVNScope) -> ASGNode | None:
+        bucket = self.buckets.get(node.unificationHash(), None)
+        if bucket is None:
+            return None
+
+        ancestors = scope.ancestors
+        scopeDepth = scope.depth
+        foundNode = None
+        foundDepth = -1
+        for entryNode, entryScope in bucket:
+            entryDepth = entryScope.depth
+            if foundDepth < entryDepth <= scopeDepth and ancestors[entryDepth] is entryScope and node.unificationEquals(entryNode):
+                foundNode = entryNode
+                foundDepth = entryDepth
+        return foundNode
+
+    def lookupCountingStatistics(self, node: ASGNode, scope: ASGGVNScope, statistics: ASGGVNStatistics) -> ASGNode | None:
+        bucket = self.buckets.get(node.unificationHash(), None)
+        probeCount = 1
+        foundNode = None
+        foundDepth = -1
+        if bucket is not None:
+            for entryNode, entryScope in bucket:
+                probeCount += 1
+                if foundDepth < entryScope.depth and entryScope.isVisibleFrom(scope):
+                    isEqual = node.unificationEquals(entryNode)
+                    statistics.countEqualityCheck(isEqual)
+                    if isEqual:
+                        foundNode = entryNode
+                        foundDepth = entryScope.depth
+
+        statistics.countLookup(node.__class__, probeCount, foundNode is not None)
+        return foundNode
+
+    def insert(self, node: ASGNode, scope: ASGGVNScope):
+        nodeHash = node.unificationHash()
+        bucket = self.buckets.get(nodeHash, None)
+        if bucket is None:
+            self.buckets[nodeHash] = [(node, scope)]
+        else:
+            bucket.append((node, scope))
+        scope.undoLog.append(node)
+
+    def rollbackScopeTo(self, scope: ASGGVNScope, undoLogSize: int, statistics: ASGGVNStatistics | None = None):
+        undoLog = scope.undoLog
+        while len(undoLog) > undoLogSize:
+            node = undoLog.pop()
+            if statistics is not None:
+                statistics.countRemoval(node.__class__)
+            nodeHash = node.unificationHash()
+            bucket = self.buckets[nodeHash]
+            for i in range(len(bucket) - 1, -1, -1):
+                if bucket[i][0] is node:
+                    del bucket[i]
+                    break
+            if len(bucket) == 0:
+                del self.buckets[nodeHash]
+
 class ASGBuilderWithGVN:
+    ## Set to an ASGGVNStatistics for collecting the statistics of the unification tables.
+    Statistics: ASGGVNStatistics | None = None
+
     def __init__(self, parentBuilder) -> None:
         self.parentBuilder: ASGBuilderWithGVN = parentBuilder
-        self.builtNodes = {}
+        if parentBuilder is None:
+            self.gvnTable = ASGGVNScopedTable()
+            self.gvnScope = ASGGVNScope(None)
+        else:
+            self.gvnTable = parentBuilder.gvnTable
+            self.gvnScope = ASGGVNScope(parentBuilder.gvnScope)
         self.currentPredecessor = None
 
     def memento(self):
         return self.currentPredecessor
 
     def restoreMemento(self, memento):
+        ## The nodes built by a failed attempt stay in the table, because the expansion memos and the instantiation
+        ## cache may still hold them. Forgetting them would build duplicates that are not identical to them.
         self.currentPredecessor = memento
 
+    def exitScope(self):
+        ## The entries of a finished child builder are removed from the table shared with its parent.
+        self.gvnTable.rollbackScopeTo(self.gvnScope, 0, ASGBuilderWithGVN.Statistics)
+
     def unifyWithPreviousBuiltNode(self, node: ASGNode):
         if node is None:
             return None
@@ -1208,23 +1634,18 @@ class ASGBuilderWithGVN:
         if not node.isPureDataNode():
             return node
         
-        comparisonNode = ASGUnificationComparisonNode(node)
-        unifiedNode = self.unifyChildNode(comparisonNode)
+        if ASGBuilderWithGVN.Statistics is not None:
+            unifiedNode = self.gvnTable.lookupCountingStatistics(node, self.gvnScope, ASGBuilderWithGVN.Statistics)
+        else:
+            unifiedNode = self.gvnTable.lookup(node, self.gvnScope)
         if unifiedNode is not None:
-            return ASGUnifiedNodeValue(unifiedNode.node, ASGNodeUnificationDerivation(node, unifiedNode.node))
-        
-        self.builtNodes[comparisonNode] = comparisonNode
+            return ASGUnifiedNodeValue(unifiedNode, ASGNodeUnificationDerivation(node, unifiedNode))
+
+        if ASGBuilderWithGVN.Statistics is not None:
+            ASGBuilderWithGVN.Statistics.countInsertion(node.__class__)
+        self.gvnTable.insert(node, self.gvnScope)
         return node
-    
-    def unifyChildNode(self, node: ASGNode):
-        unified = self.builtNodes.get(node, None)
-        if unified is not None:
-            return unified
 
-        if self.parentBuilder is not None:
-            return self.parentBuilder.unifyChildNode(node)
-        return None
-    
     def updatePredecessorWith(self, node: ASGNode):
         if node.asASGNode().isSequencingNode():
             self.currentPredecessor = node
@@ -1279,28 +1700,24 @@ class ASGDynamicProgrammingAlgorithm(metaclass = ASGDynamicProgrammingAlgorithmM
 
             return expansionResult.result
 
-        patternKindDictionary = self.__class__.__asgDPAPatternKindDictionary__
-        currentClass = node.__class__
-        while currentClass is not None:
-            patterns: list[ASGPatternMatchingNodeKindPattern] | None = patternKindDictionary.get(currentClass, None)
-            if patterns is not None:
-                for pattern in patterns:
-                    if pattern.matchesNode(node):
-                        incomingExpansion = None
-                        if incomingDelegatingNode is not None:
-                            incomingExpansion = self.processedNodes[incomingDelegatingNode]
+        algorithm = self.__class__
+        decisionSequence = algorithm.__asgDPANodeClassDecisionSequences__.get(node.__class__, None)
+        if decisionSequence is None:
+            decisionSequence = algorithm.getDecisionSequenceForNodeClass(node.__class__)
 
-                        expansionResult = ASGDynamicProgrammingAlgorithmNodeExpansionResult(incomingExpansion, node)
-                        self.processedNodes[node] = expansionResult
+        for predicate, pattern in decisionSequence:
+            if predicate is None or predicate(node):
+                incomingExpansion = None
+                if incomingDelegatingNode is not None:
+                    incomingExpansion = self.processedNodes[incomingDelegatingNode]
 
-                        patternResult = pattern(self, expansionResult, node)
-                        patternResult = self.postProcessResult(patternResult)
-                        return expansionResult.finishWithValue(patternResult)
+                expansionResult = ASGDynamicProgrammingAlgorithmNodeExpansionResult(incomingExpansion, node)
+                self.processedNodes[node] = expansionResult
+
+                patternResult = pattern(self, expansionResult, node)
+                patternResult = self.postProcessResult(patternResult)
+                return expansionResult.finishWithValue(patternResult)
 
-            if len(currentClass.__bases__) != 0:
-                currentClass = currentClass.__bases__[0]
-            else:
-                currentClass = None
         raise Exception("Failed to find matching pattern for %s in %s." % (str(node), str(self)))
     
     def __call__(self, node: ASGNode) -> Any:
@@ -1334,18 +1751,28 @@ class ASGDynamicProgrammingReductionAlgorithm(ASGDynamicProgrammingAlgorithm):
         else:
             return node
         
-def asgPredecessorTopoSortDo(startingNode, aBlock):
-    visited = set()
-    def visitNode(node):
-        if node in visited:
-            return
-        
-        visited.add(node)
-        for pred in node.sequencingDependencies():
-            visitNode(pred)
-        aBlock(node)
+def asgDepthFirstPostOrderDo(startingNode, dependenciesOf, aBlock, visited = None):
+    ## Explicit stack, so that long sequencing chains do not overflow the Python stack.
+    if visited is None:
+        visited = set()
+    elif startingNode in visited:
+        return
+
+    visited.add(startingNode)
+    stack = [(startingNode, iter(dependenciesOf(startingNode)))]
+    while stack:
+        node, dependencies = stack[-1]
+        for dependency in dependencies:
+            if dependency not in visited:
+                visited.add(dependency)
+                stack.append((dependency, iter(dependenciesOf(dependency))))
+                break
+        else:
+            stack.pop()
+            aBlock(node)
 
-    visitNode(startingNode)
+def asgPredecessorTopoSortDo(startingNode, aBlock):
+    asgDepthFirstPostOrderDo(startingNode, lambda node: node.sequencingDependencies(), aBlock)
 
 def asgPredecessorTopo(startingNode):
     topoSort = []
@@ -0,0 +1,131 @@
+from .asg import *
+import unittest
+
+class TestASGUnification(unittest.TestCase):
+    def setUp(self):
+        self.derivation = ASGNodeNoDerivation.getSingleton()
+        self.integerType = ASGBaseTypeNode(self.derivation, 'Int32')
+        self.first = ASGLiteralIntegerNode(self.derivation, self.integerType, 1)
+        self.second = ASGLiteralIntegerNode(self.derivation, self.integerType, 2)
+
+    def testHashIsOrderSensitive(self):
+        firstTuple = ASGTupleNode(self.derivation, self.integerType, (self.first, self.second))
+        secondTuple = ASGTupleNode(self.derivation, self.integerType, (self.second, self.first))
+        self.assertNotEqual(firstTuple.unificationHash(), secondTuple.unificationHash())
+        self.assertFalse(firstTuple.unificationEquals(secondTuple))
+        self.assertEqual(firstTuple.unificationHash(), ASGTupleNode(self.derivation, self.integerType, (self.first, self.second)).unificationHash())
+
+    def testGVNStatistics(self):
+        ASGBuilderWithGVN.Statistics = ASGGVNStatistics()
+        try:
+            builder = ASGBuilderWithGVN(None)
+            for i in range(3):
+                builder.build(ASGLiteralIntegerNode, self.derivation, self.integerType, 42)
+            statistics = ASGBuilderWithGVN.Statistics.kindStatistics['LiteralInteger']
+        finally:
+            ASGBuilderWithGVN.Statistics = None
+        self.assertEqual(statistics.lookupCount, 3)
+        self.assertEqual(statistics.hitCount, 2)
+        self.assertEqual(statistics.insertionCount, 1)
+        self.assertEqual(statistics.equalityCheckCount, 2)
+
+    def testGVNStatisticsTableSizeExcludesFinishedScopes(self):
+        ASGBuilderWithGVN.Statistics = ASGGVNStatistics()
+        try:
+            builder = ASGBuilderWithGVN(None)
+            builder.build(ASGLiteralIntegerNode, self.derivation, self.integerType, 1)
+            childBuilder = ASGBuilderWithGVN(builder)
+            childBuilder.build(ASGLiteralIntegerNode, self.derivation, self.integerType, 2)
+            childBuilder.build(ASGLiteralIntegerNode, self.derivation, self.integerType, 3)
+            childBuilder.exitScope()
+            statistics = ASGBuilderWithGVN.Statistics
+        finally:
+            ASGBuilderWithGVN.Statistics = None
+        self.assertEqual(statistics.getInsertionCount(), 3)
+        self.assertEqual(statistics.getTableSize(), 1)
+        self.assertEqual(statistics.kindStatistics['LiteralInteger'].removalCount, 2)
+        self.assertTrue(statistics.formatReport().startswith('GVN table size 1, 3 insertions, 3 lookups'))
+
+    def testBetaReplaceableDependencyMask(self):
+        typeUniverse = ASGAnyTypeUniverseNode(self.derivation, 'Type')
+        firstArgument = ASGArgumentNode(self.derivation, typeUniverse, 0, 'T')
+        secondArgument = ASGArgumentNode(self.derivation, typeUniverse, 1, 'U')
+        pointerType = ASGPointerTypeNode(self.derivation, firstArgument)
+        productType = ASGProductTypeNode(self.derivation, (pointerType, self.integerType))
+        self.assertEqual(self.integerType.betaReplaceableDependencyMask(), 0)
+        self.assertEqual(productType.betaReplaceableDependencyMask(), firstArgument.getBetaReplaceableNodeBit())
+        self.assertEqual(productType.betaReplaceableDependencyMask() & secondArgument.getBetaReplaceableNodeBit(), 0)
+
+    def testBetaReplaceableDependencyMaskIsBoundedByTheBinder(self):
+        ## The arguments built by earlier analyses do not widen the masks of a later one.
+        typeUniverse = ASGAnyTypeUniverseNode(self.derivation, 'Type')
+        for i in range(10000):
+            ASGArgumentNode(self.derivation, typeUniverse, i % 4, 'T%d' % i)
+        argument = ASGArgumentNode(self.derivation, typeUniverse, 2, 'V')
+        pointerType = ASGPointerTypeNode(self.derivation, ASGPointerTypeNode(self.derivation, argument))
+        self.assertEqual(pointerType.betaReplaceableDependencyMask(), 1 << 2)
+
+    def testCapturedValueDependencyMaskIsConservative(self):
+        typeUniverse = ASGAnyTypeUniverseNode(self.derivation, 'Type')
+        argument = ASGArgumentNode(self.derivation, typeUniverse, 3, 'T')
+        pointerType = ASGPointerTypeNode(self.derivation, ASGCapturedValueNode(self.derivation, typeUniverse))
+        self.assertNotEqual(pointerType.betaReplaceableDependencyMask() & argument.getBetaReplaceableNodeBit(), 0)
+
+class TestASGGVNScopedTable(unittest.TestCase):
+    def setUp(self):
+        self.derivation = ASGNodeNoDerivation.getSingleton()
+        self.integerType = ASGBaseTypeNode(self.derivation, 'Int32')
+        self.table = ASGGVNScopedTable()
+        self.rootScope = ASGGVNScope(None)
+        self.firstScope = ASGGVNScope(self.rootScope)
+        self.secondScope = ASGGVNScope(self.rootScope)
+
+    def makeLiteral(self, value: int):
+        return ASGLiteralIntegerNode(self.derivation, self.integerType, value)
+
+    def testSiblingScopesAreNotVisible(self):
+        literal = self.makeLiteral(42)
+        self.table.insert(literal, self.firstScope)
+        self.assertIs(self.table.lookup(self.makeLiteral(42), self.firstScope), literal)
+        self.assertIs(self.table.lookup(self.makeLiteral(42), ASGGVNScope(self.firstScope)), literal)
+        self.assertIsNone(self.table.lookup(self.makeLiteral(42), self.secondScope))
+        self.assertIsNone(self.table.lookup(self.makeLiteral(42), self.rootScope))
+
+    def testInnermostEntryWins(self):
+        outerLiteral = self.makeLiteral(42)
+        innerLiteral = self.makeLiteral(42)
+        self.table.insert(innerLiteral, self.firstScope)
+        self.table.insert(outerLiteral, self.rootScope)
+        self.assertIs(self.table.lookup(self.makeLiteral(42), ASGGVNScope(self.firstScope)), innerLiteral)
+        self.assertIs(self.table.lookup(self.makeLiteral(42), self.secondScope), outerLiteral)
+
+    def testRollback(self):
+        firstLiteral = self.makeLiteral(1)
+        self.table.insert(firstLiteral, self.firstScope)
+        self.table.insert(self.makeLiteral(2), self.firstScope)
+        self.table.insert(self.makeLiteral(2), self.rootScope)
+        self.table.rollbackScopeTo(self.firstScope, 1)
+        self.assertIs(self.table.lookup(self.makeLiteral(1), self.firstScope), firstLiteral)
+        self.assertIs(self.table.lookup(self.makeLiteral(2), self.firstScope).__class__, ASGLiteralIntegerNode)
+        self.assertEqual(len(self.firstScope.undoLog), 1)
+
+        self.table.rollbackScopeTo(self.rootScope, 0)
+        self.assertIsNone(self.table.lookup(self.makeLiteral(2), self.firstScope))
+
+    def testExitScope(self):
+        builder = ASGBuilderWithGVN(None)
+        childBuilder = ASGBuilderWithGVN(builder)
+        childLiteral = childBuilder.build(ASGLiteralIntegerNode, self.derivation, self.integerType, 42)
+        self.assertIs(childBuilder.build(ASGLiteralIntegerNode, self.derivation, self.integerType, 42).asASGNode(), childLiteral)
+
+        childBuilder.exitScope()
+        self.assertEqual(builder.gvnTable.buckets, {})
+        self.assertIsNot(ASGBuilderWithGVN(builder).build(ASGLiteralIntegerNode, self.derivation, self.integerType, 42), childLiteral)
+
+    def testFailedAttemptKeepsTheUnifiedNodes(self):
+        ## The memos may still hold the nodes built by a failed attempt, so they must keep being shared.
+        builder = ASGBuilderWithGVN(None)
+        memento = builder.memento()
+        attemptedLiteral = builder.build(ASGLiteralIntegerNode, self.derivation, self.integerType, 42)
+        builder.restoreMemento(memento)
+        self.assertIs(builder.build(ASGLiteralIntegerNode, self.derivation, self.integerType, 42).asASGNode(), attemptedLiteral)
@@ -1,4 +1,4 @@
-from .scanner import Token, TokenKind, scanSourceString, scanFileNamed
+from .scanner import Token, TokenBuffer, TokenKind, scanSourceCode, scanSourceString, scanFileNamed, readSourceCodeFileNamed, rescanSourceCodeWithEdit
 from .parsetree import *
 import copy
 
@@ -8,31 +8,80 @@ C_ESCAPE_TABLE = {
     't': '\t',
 }
 
+BinaryExpressionOperatorKinds = frozenset([TokenKind.OPERATOR, TokenKind.STAR, TokenKind.LESS_THAN, TokenKind.GREATER_THAN, TokenKind.BAR])
+UnaryPostfixStartKinds = frozenset([TokenKind.IDENTIFIER, TokenKind.LEFT_PARENT, TokenKind.LEFT_BRACKET, TokenKind.LEFT_CURLY_BRACKET, TokenKind.BYTE_ARRAY_START, TokenKind.DICTIONARY_START])
+DictionaryAssociationValueDelimiters = frozenset([TokenKind.DOT, TokenKind.RIGHT_CURLY_BRACKET])
+
+UnaryPostfixLevel = 0
+UnaryPrefixLevel = 1
+BinaryExpressionLevel = 2
+AssociationLevel = 3
+KeywordMessageLevel = 4
+MessageCascadeLevel = 5
+LowPrecedenceLevel = 6
+AssignmentLevel = 7
+CommaLevel = 8
+FunctionalTypeLevel = 9
+FunctionalTypeWithOptionalArgumentLevel = 10
+BindLevel = 11
+
+## Tokens that continue an expression after its leading operand.
+ExpressionContinuationKinds = BinaryExpressionOperatorKinds | frozenset([TokenKind.COLON, TokenKind.KEYWORD, TokenKind.SEMICOLON, TokenKind.ASSIGNMENT, TokenKind.COMMA, TokenKind.COLON_COLON, TokenKind.BIND_OPERATOR])
+
+MemoizedExpressionLevels = (BindLevel, FunctionalTypeWithOptionalArgumentLevel, AssignmentLevel)
+
+UnaryPrefixNodeBuilderSelectors = {
+    TokenKind.QUOTE: 'quoteNode',
+    TokenKind.QUASI_QUOTE: 'quasiQuoteNode',
+    TokenKind.QUASI_UNQUOTE: 'quasiUnquoteNode',
+    TokenKind.SPLICE: 'spliceNode',
+}
+
+UnaryPostfixArgumentListDelimiters = {
+    TokenKind.LEFT_PARENT: (TokenKind.RIGHT_PARENT, "Expected right parenthesis.", ParseTreeApplicationNode.Normal),
+    TokenKind.LEFT_BRACKET: (TokenKind.RIGHT_BRACKET, "Expected right bracket.", ParseTreeApplicationNode.Bracket),
+    TokenKind.BYTE_ARRAY_START: (TokenKind.RIGHT_BRACKET, "Expected right bracket.", ParseTreeApplicationNode.ByteArrayStart),
+}
+
+MissingDotErrorMessage = "Expected dot before expression."
+
+## Number of tokens after the start of the next top-level expression that the parsing of an expression may look at.
+TopLevelExpressionLookahead = 2
+
 class ParserState:
-    def __init__(self, sourceCode: SourceCode, tokens: list[Token]) -> None:
+    def __init__(self, sourceCode: SourceCode, tokens: TokenBuffer, memoize: bool = False, builder = None) -> None:
         self.sourceCode = sourceCode
         self.tokens = tokens
+        self.builder = builder if builder is not None else ParseTreeBuilder()
+        self.kinds = tokens.kinds
+        self.tokenCount = len(tokens)
         self.position = 0
 
+        ## Optional packrat cache of the speculatively parsed rules, keyed by (rule, token index).
+        ## The entries also keep the errors reported by the builder while parsing them, for reporting them again on a hit.
+        self.memoTable: dict[tuple, tuple[int, ParseTreeNode, tuple]] | None = {} if memoize else None
+        self.memoHitCount = 0
+        self.memoMissCount = 0
+
     def atEnd(self) -> bool:
-        return self.position >= len(self.tokens) or self.peekKind() == TokenKind.END_OF_SOURCE
+        return self.position >= self.tokenCount or self.kinds[self.position] == TokenKind.END_OF_SOURCE
 
     def peekKind(self, offset: int = 0) -> TokenKind:
         peekPosition = self.position + offset
-        if peekPosition < len(self.tokens):
-            return self.tokens[peekPosition].kind
+        if peekPosition < self.tokenCount:
+            return self.kinds[peekPosition]
         else:
             return TokenKind.END_OF_SOURCE
 
     def peek(self, offset: int = 0) -> Token:
         peekPosition = self.position + offset
-        if peekPosition < len(self.tokens):
+        if peekPosition < self.tokenCount:
             return self.tokens[peekPosition]
         else:
             return None
         
     def advance(self) -> None:
-        assert self.position < len(self.tokens)
+        assert self.position < self.tokenCount
         self.position += 1
 
     def next(self) -> Token:
@@ -40,46 +89,60 @@ class ParserState:
         self.position += 1
         return token
 
+    def nextIndex(self) -> int:
+        index = self.position
+        self.position += 1
+        return index
+
+    def sourcePositionAt(self, index: int) -> SourcePosition:
+        return self.tokens.sourcePositionAt(index)
+
+    def sourcePositionFromTo(self, startIndex: int, endIndex: int) -> SourcePosition:
+        return self.tokens.sourcePositionFromTo(startIndex, endIndex)
+
+    def tokenValueAt(self, index: int) -> bytes:
+        return self.tokens.getValueAt(index)
+
+    def tokenStringValueAt(self, index: int) -> str:
+        return self.tokens.getStringValueAt(index)
+
     def expectAddingErrorToNode(self, expectedKind: TokenKind, node: ParseTreeNode) -> ParseTreeNode:
         if self.peekKind() == expectedKind:
             self.advance()
             return node
         
         errorPosition = self.currentSourcePosition()
-        errorNode = ParseTreeErrorNode(errorPosition, "Expected token of kind %s." % str(expectedKind))
-        return ParseTreeSequenceNode(node.sourcePosition.to(errorPosition), [node, errorNode])
+        errorNode = self.builder.errorNode(errorPosition, "Expected token of kind TokenKind.%s." % TokenKind(expectedKind).name)
+        return self.builder.sequenceNode(self.builder.sourcePositionOf(node).to(errorPosition), [node, errorNode])
 
     def currentSourcePosition(self) -> SourcePosition:
-        if self.position < len(self.tokens):
-            return self.tokens[self.position].sourcePosition
+        if self.position < self.tokenCount:
+            return self.tokens.sourcePositionAt(self.position)
 
-        assert self.tokens[-1].kind == TokenKind.END_OF_SOURCE 
-        return self.tokens[-1].sourcePosition
+        assert self.kinds[-1] == TokenKind.END_OF_SOURCE 
+        return self.tokens.sourcePositionAt(self.tokenCount - 1)
 
     def previousSourcePosition(self) -> SourcePosition:
         assert self.position > 0
-        return self.tokens[self.position - 1].sourcePosition
+        return self.tokens.sourcePositionAt(self.position - 1)
 
     def sourcePositionFrom(self, startingPosition: int) -> SourcePosition:
-        assert startingPosition < len(self.tokens)
-        startSourcePosition = self.tokens[startingPosition].sourcePosition
+        assert startingPosition < self.tokenCount
         if self.position > 0:
-            endSourcePosition = self.previousSourcePosition()
-            return startSourcePosition.to(endSourcePosition)
+            return self.tokens.sourcePositionFromTo(startingPosition, self.position - 1)
         else:
-            endSourcePosition = self.currentSourcePosition()
-            return startSourcePosition.until(endSourcePosition)
+            return self.tokens.sourcePositionFromUntil(startingPosition, self.position)
     
     def advanceWithExpectedError(self, message: str):
         if self.peekKind() == TokenKind.ERROR:
-            errorToken = self.next()
-            return self, ParseTreeErrorNode(errorToken.sourcePosition, errorToken.errorMessage)
+            errorIndex = self.nextIndex()
+            return self, self.builder.errorNode(self.sourcePositionAt(errorIndex), self.tokens.errorMessageAt(errorIndex))
         elif self.atEnd():
-            return self, ParseTreeErrorNode(self.currentSourcePosition(), message)
+            return self, self.builder.errorNode(self.currentSourcePosition(), message)
         else:
             errorPosition = self.currentSourcePosition()
             self.advance()
-            return self, ParseTreeErrorNode(errorPosition, message)
+            return self, self.builder.errorNode(errorPosition, message)
         
     def memento(self):
         return self.position
@@ -114,33 +177,33 @@ def parseIntegerConstant(string: str) -> str:
     return radixedInteger
     
 def parseLiteralInteger(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    token = state.next()
-    assert token.kind == TokenKind.NAT
-    return state, ParseTreeLiteralIntegerNode(token.sourcePosition, parseIntegerConstant(token.getValue()))
+    tokenIndex = state.nextIndex()
+    assert state.kinds[tokenIndex] == TokenKind.NAT
+    return state, state.builder.literalIntegerNode(state.sourcePositionAt(tokenIndex), parseIntegerConstant(state.tokenValueAt(tokenIndex)))
 
 def parseLiteralFloat(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    token = state.next()
-    assert token.kind == TokenKind.FLOAT
-    return state, ParseTreeLiteralFloatNode(token.sourcePosition, float(token.getValue()))
+    tokenIndex = state.nextIndex()
+    assert state.kinds[tokenIndex] == TokenKind.FLOAT
+    return state, state.builder.literalFloatNode(state.sourcePositionAt(tokenIndex), float(state.tokenValueAt(tokenIndex)))
 
 def parseLiteralString(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    token = state.next()
-    assert token.kind == TokenKind.STRING
-    return state, ParseTreeLiteralStringNode(token.sourcePosition, parseCEscapedString(token.getStringValue()[1:-1]))
+    tokenIndex = state.nextIndex()
+    assert state.kinds[tokenIndex] == TokenKind.STRING
+    return state, state.builder.literalStringNode(state.sourcePositionAt(tokenIndex), parseCEscapedString(state.tokenStringValueAt(tokenIndex)[1:-1]))
 
 def parseLiteralCharacter(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    token = state.next()
-    assert token.kind == TokenKind.CHARACTER
-    return state, ParseTreeLiteralCharacterNode(token.sourcePosition, ord(parseCEscapedString(token.getStringValue()[1:-1])[0]))
+    tokenIndex = state.nextIndex()
+    assert state.kinds[tokenIndex] == TokenKind.CHARACTER
+    return state, state.builder.literalCharacterNode(state.sourcePositionAt(tokenIndex), ord(parseCEscapedString(state.tokenStringValueAt(tokenIndex)[1:-1])[0]))
 
 def parseLiteralSymbol(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    token = state.next()
-    assert token.kind == TokenKind.SYMBOL
-    symbolValue = token.getStringValue()[1:]
+    tokenIndex = state.nextIndex()
+    assert state.kinds[tokenIndex] == TokenKind.SYMBOL
+    symbolValue = state.tokenStringValueAt(tokenIndex)[1:]
     if symbolValue[0] == '"':
         assert symbolValue[0] == '"' and symbolValue[-1] == '"'
         symbolValue = parseCEscapedString(symbolValue[1:-1])
-    return state, ParseTreeLiteralSymbolNode(token.sourcePosition, symbolValue)
+    return state, state.builder.literalSymbolNode(state.sourcePositionAt(tokenIndex), symbolValue)
 
 def parseLiteral(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
     if state.peekKind() == TokenKind.NAT: return parseLiteralInteger(state)
@@ -151,70 +214,69 @@ def parseLiteral(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
     else: return state.advanceWithExpectedError('Expected a literal.')
 
 def parseIdentifier(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    token = state.next()
-    assert token.kind == TokenKind.IDENTIFIER
-    return state, ParseTreeIdentifierReferenceNode(token.sourcePosition, token.getStringValue())
-
-def parseQuote(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    startPosition = state.position
-    assert state.next().kind == TokenKind.QUOTE
-    state, term = parseUnaryPrefixExpression(state)
-    return state, ParseTreeQuoteNode(state.sourcePositionFrom(startPosition), term)
-
-def parseQuasiQuote(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    startPosition = state.position
-    assert state.next().kind == TokenKind.QUASI_QUOTE
-    state, term = parseUnaryPrefixExpression(state)
-    return state, ParseTreeQuasiQuoteNode(state.sourcePositionFrom(startPosition), term)
-
-def parseQuasiUnquote(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    startPosition = state.position
-    assert state.next().kind == TokenKind.QUASI_UNQUOTE
-    state, term = parseUnaryPrefixExpression(state)
-    return state, ParseTreeQuasiUnquoteNode(state.sourcePositionFrom(startPosition), term)
-
-def parseSplice(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    startPosition = state.position
-    assert state.next().kind == TokenKind.SPLICE
-    state, term = parseUnaryPrefixExpression(state)
-    return state, ParseTreeSpliceNode(state.sourcePositionFrom(startPosition), term)
-
-def parseTerm(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    if state.peekKind() == TokenKind.IDENTIFIER: return parseIdentifier(state)
-    elif state.peekKind() == TokenKind.LEFT_PARENT: return parseParenthesis(state)
-    elif state.peekKind() == TokenKind.LEFT_CURLY_BRACKET: return parseBlock(state)
-    elif state.peekKind() == TokenKind.DICTIONARY_START: return parseDictionary(state)
-    elif state.peekKind() == TokenKind.COLON: return parseBindableName(state)
-    else: return parseLiteral(state)
-
-def parseOptionalParenthesis(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    if state.peekKind() == TokenKind.LEFT_PARENT:
-        return parseParenthesis(state)
-    else:
-        return state, None
+    tokenIndex = state.nextIndex()
+    assert state.kinds[tokenIndex] == TokenKind.IDENTIFIER
+    return state, state.builder.identifierReferenceNode(state.sourcePositionAt(tokenIndex), state.tokenStringValueAt(tokenIndex))
+
+## The expression grammar is parsed by generators that yield the parser of each nested construct
+## instead of calling it, so that runParser keeps the pending constructs in an explicit stack and
+## the nesting depth is not limited by the Python recursion limit.
+def runParser(state: ParserState, parser):
+    pendingParsers = []
+    result = None
+    while True:
+        try:
+            nestedParser = parser.send(result)
+        except StopIteration as parserReturn:
+            if not pendingParsers:
+                return parserReturn.value
+            result = parserReturn.value
+            parser = pendingParsers.pop()
+            continue
+
+        pendingParsers.append(parser)
+        parser = nestedParser
+        result = None
+
+def memoizedParserResult(state: ParserState, rule, startPosition: int) -> ParseTreeNode | None:
+    memoEntry = state.memoTable.get((rule, startPosition))
+    if memoEntry is None:
+        state.memoMissCount += 1
+        return None
+
+    state.memoHitCount += 1
+    state.position, node, errors = memoEntry
+    state.builder.addErrors(errors)
+    return node
 
 def parseNameExpression(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
     if state.peekKind() == TokenKind.IDENTIFIER:
-        token = state.next()
-        return state, ParseTreeLiteralSymbolNode(token.sourcePosition, token.getStringValue())
+        tokenIndex = state.nextIndex()
+        return state, state.builder.literalSymbolNode(state.sourcePositionAt(tokenIndex), state.tokenStringValueAt(tokenIndex))
     else:
-        return state, ParseTreeErrorNode(state.currentSourcePosition(), 'Expected a bindable name.')
+        return state, state.builder.errorNode(state.currentSourcePosition(), 'Expected a bindable name.')
 
-def parseOptionalBindableNameType(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
+def optionalBindableNameTypeParser(state: ParserState):
     if state.peekKind() == TokenKind.LEFT_BRACKET:
         state.advance()
-        state, typeExpression  = parseExpression(state)
+        typeExpression = yield expressionParser(state, BindLevel)
         typeExpression = state.expectAddingErrorToNode(TokenKind.RIGHT_BRACKET, typeExpression)
-        return True, state, typeExpression
+        return True, typeExpression
     elif state.peekKind() == TokenKind.LEFT_PARENT:
         state.advance()
-        state, typeExpression = parseExpression(state)
+        typeExpression = yield expressionParser(state, BindLevel)
         typeExpression = state.expectAddingErrorToNode(TokenKind.RIGHT_PARENT, typeExpression)
-        return False, state, typeExpression
-    return False, state, None
+        return False, typeExpression
+    return False, None
 
-def parseBindableName(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
+def bindableNameParser(state: ParserState):
     startPosition = state.position
+    if state.memoTable is not None:
+        node = memoizedParserResult(state, bindableNameParser, startPosition)
+        if node is not None:
+            return node
+        errorMark = state.builder.errorMark()
+
     assert state.peekKind() == TokenKind.COLON
     state.advance()
 
@@ -227,7 +289,7 @@ def parseBindableName(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
         isExistential = isExistential or state.peekKind() == TokenKind.QUESTION
         state.advance()
 
-    isImplicit, state, typeExpression = parseOptionalBindableNameType(state)
+    isImplicit, typeExpression = yield optionalBindableNameTypeParser(state)
     hasPostTypeExpression = False
 
     isVariadic = False
@@ -238,37 +300,39 @@ def parseBindableName(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
     else:
         state, nameExpression = parseNameExpression(state)
         if typeExpression is None:
-            isImplicit, state, typeExpression = parseOptionalBindableNameType(state)
+            isImplicit, typeExpression = yield optionalBindableNameTypeParser(state)
             hasPostTypeExpression = typeExpression is not None
 
         if state.peekKind() == TokenKind.ELLIPSIS:
             state.advance()
             isVariadic = True
 
-    return state, ParseTreeBindableNameNode(state.sourcePositionFrom(startPosition), typeExpression, nameExpression, isImplicit, isExistential, isVariadic, isMutable, hasPostTypeExpression)
+    node = state.builder.bindableNameNode(state.sourcePositionFrom(startPosition), typeExpression, nameExpression, isImplicit, isExistential, isVariadic, isMutable, hasPostTypeExpression)
+    if state.memoTable is not None:
+        state.memoTable[(bindableNameParser, startPosition)] = (state.position, node, state.builder.errorsSince(errorMark))
+    return node
 
-def parseParenthesis(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
+def parenthesisParser(state: ParserState):
     # (
     startPosition = state.position
     assert state.peekKind() == TokenKind.LEFT_PARENT
     state.advance()
 
     if isBinaryExpressionOperator(state.peekKind()) and state.peekKind(1) == TokenKind.RIGHT_PARENT:
-        token = state.next()
+        tokenIndex = state.nextIndex()
         state.advance()
-        return state, ParseTreeIdentifierReferenceNode(token.sourcePosition, token.getStringValue())
+        return state.builder.identifierReferenceNode(state.sourcePositionAt(tokenIndex), state.tokenStringValueAt(tokenIndex))
 
     if state.peekKind() == TokenKind.RIGHT_PARENT:
         state.advance()
-        return state, ParseTreeTupleNode(state.sourcePositionFrom(startPosition), [])
-    
-    state, expression = parseSequenceUntilEndOrDelimiter(state, TokenKind.RIGHT_PARENT)
+        return state.builder.tupleNode(state.sourcePositionFrom(startPosition), [])
+
+    expression = yield sequenceParser(state, TokenKind.RIGHT_PARENT)
 
     # )
-    expression = state.expectAddingErrorToNode(TokenKind.RIGHT_PARENT, expression)
-    return state, expression
+    return state.expectAddingErrorToNode(TokenKind.RIGHT_PARENT, expression)
 
-def parseBlock(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
+def blockParser(state: ParserState):
     # {
     startPosition = state.position
     assert state.peekKind() == TokenKind.LEFT_CURLY_BRACKET
@@ -279,40 +343,42 @@ def parseBlock(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
         state.advance()
         if state.peekKind() == TokenKind.BAR:
             state.advance()
-            functionalType = ParseTreeFunctionalDependentTypeNode(state.currentSourcePosition(), None, None)
+            functionalType = state.builder.functionalDependentTypeNode(state.currentSourcePosition(), None, None)
         else:
-            state, functionalType = parseFunctionalType(state)
-            state.expectAddingErrorToNode(TokenKind.BAR, functionalType)
-            if not functionalType.isFunctionalDependentTypeNode():
-                functionalType = ParseTreeFunctionalDependentTypeNode(state.currentSourcePosition(), functionalType, None)
+            functionalType = yield expressionParser(state, FunctionalTypeLevel)
+            # A missing closing bar is not reported.
+            if state.peekKind() == TokenKind.BAR:
+                state.advance()
+            if not state.builder.isFunctionalDependentTypeNode(functionalType):
+                functionalType = state.builder.functionalDependentTypeNode(state.currentSourcePosition(), functionalType, None)
 
-    state, body = parseSequenceUntilEndOrDelimiter(state, TokenKind.RIGHT_CURLY_BRACKET)
+    body = yield sequenceParser(state, TokenKind.RIGHT_CURLY_BRACKET)
 
     # }
     body = state.expectAddingErrorToNode(TokenKind.RIGHT_CURLY_BRACKET, body)
     if functionalType is None:
-        return state, ParseTreeLexicalBlockNode(state.sourcePositionFrom(startPosition), body)
+        return state.builder.lexicalBlockNode(state.sourcePositionFrom(startPosition), body)
     else:
-        return state, ParseTreeBlockNode(state.sourcePositionFrom(startPosition), functionalType, body)
+        return state.builder.blockNode(state.sourcePositionFrom(startPosition), functionalType, body)
 
-def parseDictionaryAssociation(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
+def dictionaryAssociationParser(state: ParserState):
     startPosition = state.position
     value = None
     if state.peekKind() == TokenKind.KEYWORD:
-        keyToken = state.next()
-        key = ParseTreeLiteralSymbolNode(keyToken.sourcePosition, keyToken.getStringValue()[:-1])
+        keyTokenIndex = state.nextIndex()
+        key = state.builder.literalSymbolNode(state.sourcePositionAt(keyTokenIndex), state.tokenStringValueAt(keyTokenIndex)[:-1])
 
-        if state.peekKind() not in [TokenKind.DOT, TokenKind.RIGHT_CURLY_BRACKET]:
-            state, value = parseAssociationExpression(state)
+        if state.peekKind() not in DictionaryAssociationValueDelimiters:
+            value = yield expressionParser(state, AssociationLevel)
     else:
-        state, key = parseBinaryExpressionSequence(state)
+        key = yield expressionParser(state, BinaryExpressionLevel)
         if state.peekKind() == TokenKind.COLON:
             state.advance()
-            state, value = parseAssociationExpression(state)
+            value = yield expressionParser(state, AssociationLevel)
 
-    return state, ParseTreeTupleNode(state.sourcePositionFrom(startPosition), [key, value])
+    return state.builder.tupleNode(state.sourcePositionFrom(startPosition), [key, value])
 
-def parseDictionary(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
+def dictionaryParser(state: ParserState):
     # #{
     startPosition = state.position
     assert state.peekKind() == TokenKind.DICTIONARY_START
@@ -327,9 +393,9 @@ def parseDictionary(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
     elements = []
     while not state.atEnd() and state.peekKind() != TokenKind.RIGHT_CURLY_BRACKET:
         if not expectsExpression:
-            elements.append(ParseTreeErrorNode(state.currentSourcePosition(), "Expected dot before association."))
+            elements.append(state.builder.errorNode(state.currentSourcePosition(), "Expected dot before association."))
 
-        state, expression = parseDictionaryAssociation(state)
+        expression = yield dictionaryAssociationParser(state)
         elements.append(expression)
 
         expectsExpression = False
@@ -342,241 +408,222 @@ def parseDictionary(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
     if state.peekKind() == TokenKind.RIGHT_CURLY_BRACKET:
         state.advance()
     else:
-        elements.append(ParseTreeErrorNode(state.currentSourcePosition(), "Expected a right curly brack (})."))
+        elements.append(state.builder.errorNode(state.currentSourcePosition(), "Expected a right curly brack (})."))
 
-    return state, ParseTreeDictionaryNode(state.sourcePositionFrom(startPosition), elements)
-
-def parseUnaryPostfixExpression(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    startPosition = state.position
-    state, receiver = parseTerm(state)
-    while state.peekKind() in [TokenKind.IDENTIFIER, TokenKind.LEFT_PARENT, TokenKind.LEFT_BRACKET, TokenKind.LEFT_CURLY_BRACKET, TokenKind.BYTE_ARRAY_START, TokenKind.DICTIONARY_START]:
-        token = state.peek()
-        if token.kind == TokenKind.IDENTIFIER:
-            state.advance()
-            selector = ParseTreeLiteralSymbolNode(token.sourcePosition, token.getStringValue())
-            receiver = ParseTreeMessageSendNode(receiver.sourcePosition.to(selector.sourcePosition), receiver, selector, [])
-        elif token.kind == TokenKind.LEFT_PARENT:
-            state.advance()
-            state, arguments = parseExpressionListUntilEndOrDelimiter(state, TokenKind.RIGHT_PARENT)
-            if state.peekKind() == TokenKind.RIGHT_PARENT:
-                state.advance()
-            else:
-                arguments.append(ParseTreeErrorNode(state.currentSourcePosition(), "Expected right parenthesis."))
-            receiver = ParseTreeApplicationNode(state.sourcePositionFrom(startPosition), receiver, arguments, ParseTreeApplicationNode.Normal)
-        elif token.kind == TokenKind.LEFT_BRACKET:
-            state.advance()
-            state, arguments = parseExpressionListUntilEndOrDelimiter(state, TokenKind.RIGHT_BRACKET)
-            if state.peekKind() == TokenKind.RIGHT_BRACKET:
-                state.advance()
-            else:
-                arguments.append(ParseTreeErrorNode(state.currentSourcePosition(), "Expected right bracket."))
-            receiver = ParseTreeApplicationNode(state.sourcePositionFrom(startPosition), receiver, arguments, ParseTreeApplicationNode.Bracket)
-        elif token.kind == TokenKind.BYTE_ARRAY_START:
-            state.advance()
-            state, arguments = parseExpressionListUntilEndOrDelimiter(state, TokenKind.RIGHT_BRACKET)
-            if state.peekKind() == TokenKind.RIGHT_BRACKET:
-                state.advance()
-            else:
-                arguments.append(ParseTreeErrorNode(state.currentSourcePosition(), "Expected right bracket."))
-            receiver = ParseTreeApplicationNode(state.sourcePositionFrom(startPosition), receiver, arguments, ParseTreeApplicationNode.ByteArrayStart)
-        elif token.kind == TokenKind.LEFT_CURLY_BRACKET:
-            state, argument = parseBlock(state)
-            receiver = ParseTreeApplicationNode(state.sourcePositionFrom(startPosition), receiver, [argument], ParseTreeApplicationNode.Block)
-        elif token.kind == TokenKind.DICTIONARY_START:
-            state, argument = parseDictionary(state)
-            receiver = ParseTreeApplicationNode(state.sourcePositionFrom(startPosition), receiver, [argument], ParseTreeApplicationNode.Dictionary)
-    return state, receiver
-
-def parseUnaryPrefixExpression(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    if state.peekKind() == TokenKind.QUOTE: return parseQuote(state)
-    elif state.peekKind() == TokenKind.QUASI_QUOTE: return parseQuasiQuote(state)
-    elif state.peekKind() == TokenKind.QUASI_UNQUOTE: return parseQuasiUnquote(state)
-    elif state.peekKind() == TokenKind.SPLICE: return parseSplice(state)
-    else: return parseUnaryPostfixExpression(state)
+    return state.builder.dictionaryNode(state.sourcePositionFrom(startPosition), elements)
 
 def isBinaryExpressionOperator(kind: TokenKind) -> bool:
-    return kind in [TokenKind.OPERATOR, TokenKind.STAR, TokenKind.LESS_THAN, TokenKind.GREATER_THAN, TokenKind.BAR]
-
-def parseBinaryExpressionSequence(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    startPosition = state.position
-    state, operand = parseUnaryPrefixExpression(state)
-    if not isBinaryExpressionOperator(state.peekKind()):
-        return state, operand
-    
-    elements = [operand]
-    while isBinaryExpressionOperator(state.peekKind()):
-        operatorToken = state.next()
-        operator = ParseTreeLiteralSymbolNode(operatorToken.sourcePosition, operatorToken.getStringValue())
-        elements.append(operator)
-
-        state, operand = parseUnaryPostfixExpression(state)
-        elements.append(operand)
-
-    return state, ParseTreeBinaryExpressionSequenceNode(state.sourcePositionFrom(startPosition), elements)
-
-def parseAssociationExpression(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    startPosition = state.position
-    state, key = parseBinaryExpressionSequence(state)
-
-    if state.peekKind() != TokenKind.COLON:
-        return state, key
-    
-    state.advance()
-    state, value = parseAssociationExpression(state)
-    return state, ParseTreeTupleNode(state.sourcePositionFrom(startPosition), [key, value])
-    
-def parseKeywordApplication(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    assert state.peekKind() == TokenKind.KEYWORD
-    startPosition = state.position
+    return kind in BinaryExpressionOperatorKinds
 
+def keywordArgumentsParser(state: ParserState, argumentLevel: int):
     symbolValue = ""
     arguments = []
-    firstKeywordSourcePosition = state.peek(0).sourcePosition
-    lastKeywordSourcePosition = firstKeywordSourcePosition
+    firstKeywordTokenIndex = state.position
+    lastKeywordTokenIndex = firstKeywordTokenIndex
     while state.peekKind() == TokenKind.KEYWORD:
-        keywordToken = state.next()
-        lastKeywordSourcePosition = keywordToken.sourcePosition
-        symbolValue += keywordToken.getStringValue()
-        
-        state, argument = parseAssociationExpression(state)
-        arguments.append(argument)
-
-    functionIdentifier = ParseTreeLiteralSymbolNode(firstKeywordSourcePosition.to(lastKeywordSourcePosition), symbolValue)
-    return state, ParseTreeMessageSendNode(state.sourcePositionFrom(startPosition), None, functionIdentifier, arguments)
-
-def parseKeywordMessageSend(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    startPosition = state.position
-    state, receiver = parseAssociationExpression(state)
-    if state.peekKind() != TokenKind.KEYWORD:
-        return state, receiver
+        lastKeywordTokenIndex = state.nextIndex()
+        symbolValue += state.tokenStringValueAt(lastKeywordTokenIndex)
 
-    symbolValue = ""
-    arguments = []
-    firstKeywordSourcePosition = state.peek(0).sourcePosition
-    lastKeywordSourcePosition = firstKeywordSourcePosition
-    while state.peekKind() == TokenKind.KEYWORD:
-        keywordToken = state.next()
-        lastKeywordSourcePosition = keywordToken.sourcePosition
-        symbolValue += keywordToken.getStringValue()
-        
-        state, argument = parseAssociationExpression(state)
+        argument = yield expressionParser(state, argumentLevel)
         arguments.append(argument)
 
-    selector = ParseTreeLiteralSymbolNode(firstKeywordSourcePosition.to(lastKeywordSourcePosition), symbolValue)
-    return state, ParseTreeMessageSendNode(state.sourcePositionFrom(startPosition), receiver, selector, arguments)
+    selector = state.builder.literalSymbolNode(state.sourcePositionFromTo(firstKeywordTokenIndex, lastKeywordTokenIndex), symbolValue)
+    return selector, arguments
 
-def parseCascadedMessage(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
+def cascadedMessageParser(state: ParserState):
     startPosition = state.position
-    token = state.peek()
+    tokenIndex = state.position
     if state.peekKind() == TokenKind.IDENTIFIER:
         state.advance()
-        selector = ParseTreeLiteralSymbolNode(token.sourcePosition, token.getStringValue())
-        return state, ParseTreeCascadeMessageNode(state.sourcePositionFrom(startPosition), selector, [])
+        selector = state.builder.literalSymbolNode(state.sourcePositionAt(tokenIndex), state.tokenStringValueAt(tokenIndex))
+        return state.builder.cascadeMessageNode(state.sourcePositionFrom(startPosition), selector, [])
     elif state.peekKind() == TokenKind.KEYWORD:
-        symbolValue = ""
-        arguments = []
-        firstKeywordSourcePosition = state.peek(0).sourcePosition
-        lastKeywordSourcePosition = firstKeywordSourcePosition
-        while state.peekKind() == TokenKind.KEYWORD:
-            keywordToken = state.next()
-            lastKeywordSourcePosition = keywordToken.sourcePosition
-            symbolValue += keywordToken.getStringValue()
-            
-            state, argument = parseBinaryExpressionSequence(state)
-            arguments.append(argument)
-
-        selector = ParseTreeLiteralSymbolNode(firstKeywordSourcePosition.to(lastKeywordSourcePosition), symbolValue)
-        return state, ParseTreeCascadeMessageNode(state.sourcePositionFrom(startPosition), selector, arguments)
+        selector, arguments = yield keywordArgumentsParser(state, BinaryExpressionLevel)
+        return state.builder.cascadeMessageNode(state.sourcePositionFrom(startPosition), selector, arguments)
     elif isBinaryExpressionOperator(state.peekKind()):
         state.advance()
-        selector = ParseTreeLiteralSymbolNode(token.sourcePosition, token.getStringValue())
-        state, argument = parseUnaryPostfixExpression(state)
-        return state, ParseTreeCascadeMessageNode(state.sourcePositionFrom(startPosition), selector, [argument])
+        selector = state.builder.literalSymbolNode(state.sourcePositionAt(tokenIndex), state.tokenStringValueAt(tokenIndex))
+        argument = yield expressionParser(state, UnaryPostfixLevel)
+        return state.builder.cascadeMessageNode(state.sourcePositionFrom(startPosition), selector, [argument])
     else:
-        return state, ParseTreeErrorNode(state.currentSourcePosition(), 'Expected a cascaded message send.')
-
-def parseMessageCascade(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
+        return state.builder.errorNode(state.currentSourcePosition(), 'Expected a cascaded message send.')
+
+def expressionParser(state: ParserState, level: int):
+    ## Precedence climbing over the expression grammar, from the tightest to the loosest binding rule:
+    ##   UnaryPostfix:  term (identifier | '(' expressions ')' | '[' expressions ']' | '#[' expressions ']' | block | dictionary)*
+    ##   UnaryPrefix:   (quote | quasi-quote | quasi-unquote | splice) UnaryPrefix | UnaryPostfix
+    ##   Binary:        UnaryPrefix (operator UnaryPostfix)*
+    ##   Association:   Binary (':' Association)?
+    ##   KeywordMessage:  Association (keyword Association)*
+    ##   MessageCascade: KeywordMessage (';' cascadedMessage)*
+    ##   LowPrecedence: (keyword Association)+ | MessageCascade
+    ##   Assignment:    LowPrecedence (':=' Assignment)?
+    ##   Comma:         Assignment (',' Assignment)*
+    ##   FunctionalType: Comma ('::' FunctionalType)?
+    ##   FunctionalTypeWithOptionalArgument: '::' FunctionalType | FunctionalType
+    ##   Bind:          FunctionalTypeWithOptionalArgument ('<-' Bind)?
+    ## All of the rules entered for parsing an expression start at the same token, so only the
+    ## rules whose operator is present are materialized. Nested operands are yielded to runParser.
     startPosition = state.position
-    state, firstMessage = parseKeywordMessageSend(state)
-    if state.peekKind() != TokenKind.SEMICOLON:
-        return state, firstMessage
-    
-    cascadeReceiver, firstCascadedMessage = firstMessage.asMessageSendCascadeReceiverAndFirstMessage()
-    cascadedMessages = []
-    if firstCascadedMessage is not None:
-        cascadedMessages.append(firstCascadedMessage)
-
-    while state.peekKind() == TokenKind.SEMICOLON:
+    parsedLevel = -1
+    node = None
+
+    pendingMemoLevels = None
+    if state.memoTable is not None:
+        errorMark = state.builder.errorMark()
+        pendingMemoLevels = []
+        for memoLevel in MemoizedExpressionLevels:
+            if level < memoLevel:
+                continue
+            if memoLevel == AssignmentLevel and level >= FunctionalTypeWithOptionalArgumentLevel and state.peekKind() == TokenKind.COLON_COLON:
+                break
+
+            node = memoizedParserResult(state, memoLevel, startPosition)
+            if node is not None:
+                parsedLevel = memoLevel
+                break
+            pendingMemoLevels.insert(0, memoLevel)
+
+    if parsedLevel < 0:
+        kind = state.peekKind()
+        if kind == TokenKind.COLON_COLON and level >= FunctionalTypeWithOptionalArgumentLevel:
+            state.advance()
+            resultTypeStartPosition = state.position
+            resultTypeExpression = yield expressionParser(state, FunctionalTypeLevel)
+            node = state.builder.functionalDependentTypeNode(state.sourcePositionFrom(resultTypeStartPosition), None, resultTypeExpression)
+            parsedLevel = FunctionalTypeWithOptionalArgumentLevel
+        elif kind == TokenKind.KEYWORD and level >= LowPrecedenceLevel:
+            selector, arguments = yield keywordArgumentsParser(state, AssociationLevel)
+            node = state.builder.messageSendNode(state.sourcePositionFrom(startPosition), None, selector, arguments)
+            parsedLevel = LowPrecedenceLevel
+        elif kind in UnaryPrefixNodeBuilderSelectors and level >= UnaryPrefixLevel:
+            state.advance()
+            term = yield expressionParser(state, UnaryPrefixLevel)
+            node = getattr(state.builder, UnaryPrefixNodeBuilderSelectors[kind])(state.sourcePositionFrom(startPosition), term)
+            parsedLevel = UnaryPrefixLevel
+        else:
+            # Term
+            if kind == TokenKind.IDENTIFIER: state, node = parseIdentifier(state)
+            elif kind == TokenKind.LEFT_PARENT: node = yield parenthesisParser(state)
+            elif kind == TokenKind.LEFT_CURLY_BRACKET: node = yield blockParser(state)
+            elif kind == TokenKind.DICTIONARY_START: node = yield dictionaryParser(state)
+            elif kind == TokenKind.COLON: node = yield bindableNameParser(state)
+            else: state, node = parseLiteral(state)
+
+            # Unary postfix
+            while state.peekKind() in UnaryPostfixStartKinds:
+                tokenKind = state.peekKind()
+                if tokenKind == TokenKind.IDENTIFIER:
+                    tokenIndex = state.nextIndex()
+                    selectorPosition = state.sourcePositionAt(tokenIndex)
+                    selector = state.builder.literalSymbolNode(selectorPosition, state.tokenStringValueAt(tokenIndex))
+                    node = state.builder.messageSendNode(state.builder.sourcePositionOf(node).to(selectorPosition), node, selector, [])
+                elif tokenKind == TokenKind.LEFT_CURLY_BRACKET:
+                    argument = yield blockParser(state)
+                    node = state.builder.applicationNode(state.sourcePositionFrom(startPosition), node, [argument], ParseTreeApplicationNode.Block)
+                elif tokenKind == TokenKind.DICTIONARY_START:
+                    argument = yield dictionaryParser(state)
+                    node = state.builder.applicationNode(state.sourcePositionFrom(startPosition), node, [argument], ParseTreeApplicationNode.Dictionary)
+                else:
+                    delimiter, errorMessage, applicationKind = UnaryPostfixArgumentListDelimiters[tokenKind]
+                    state.advance()
+                    arguments = yield expressionListParser(state, delimiter)
+                    if state.peekKind() == delimiter:
+                        state.advance()
+                    else:
+                        arguments.append(state.builder.errorNode(state.currentSourcePosition(), errorMessage))
+                    node = state.builder.applicationNode(state.sourcePositionFrom(startPosition), node, arguments, applicationKind)
+            parsedLevel = UnaryPostfixLevel
+
+    kind = state.peekKind()
+    if level <= UnaryPrefixLevel or (kind not in ExpressionContinuationKinds and not pendingMemoLevels):
+        return node
+
+    if parsedLevel < BinaryExpressionLevel and isBinaryExpressionOperator(kind):
+        elements = [node]
+        while isBinaryExpressionOperator(state.peekKind()):
+            operatorTokenIndex = state.nextIndex()
+            operator = state.builder.literalSymbolNode(state.sourcePositionAt(operatorTokenIndex), state.tokenStringValueAt(operatorTokenIndex))
+            elements.append(operator)
+
+            operand = yield expressionParser(state, UnaryPostfixLevel)
+            elements.append(operand)
+        node = state.builder.binaryExpressionSequenceNode(state.sourcePositionFrom(startPosition), elements)
+        kind = state.peekKind()
+    if level == BinaryExpressionLevel:
+        return node
+
+    if parsedLevel < AssociationLevel and kind == TokenKind.COLON:
         state.advance()
-        state, cascadedMessage = parseCascadedMessage(state)
-        cascadedMessages.append(cascadedMessage)
-    return state, ParseTreeMessageCascadeNode(state.sourcePositionFrom(startPosition), cascadeReceiver, cascadedMessages)
-
-def parseLowPrecedenceExpression(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    if state.peekKind() == TokenKind.KEYWORD:
-        return parseKeywordApplication(state)
-    return parseMessageCascade(state)
-
-def parseAssignmentExpression(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    startPosition = state.position
-    state, assignedStore = parseLowPrecedenceExpression(state)
-    if state.peekKind() == TokenKind.ASSIGNMENT:
-        operatorToken = state.next()
-        state, assignedValue = parseAssignmentExpression(state)
-        return state, ParseTreeAssignmentNode(state.sourcePositionFrom(startPosition), assignedStore, assignedValue)
-    else:
-        return state, assignedStore
+        value = yield expressionParser(state, AssociationLevel)
+        node = state.builder.tupleNode(state.sourcePositionFrom(startPosition), [node, value])
+        kind = state.peekKind()
+    if level == AssociationLevel:
+        return node
+
+    if parsedLevel < KeywordMessageLevel and kind == TokenKind.KEYWORD:
+        selector, arguments = yield keywordArgumentsParser(state, AssociationLevel)
+        node = state.builder.messageSendNode(state.sourcePositionFrom(startPosition), node, selector, arguments)
+        kind = state.peekKind()
+
+    if parsedLevel < MessageCascadeLevel and kind == TokenKind.SEMICOLON:
+        cascadeReceiver, firstCascadedMessage = state.builder.asMessageSendCascadeReceiverAndFirstMessage(node)
+        cascadedMessages = []
+        if firstCascadedMessage is not None:
+            cascadedMessages.append(firstCascadedMessage)
+
+        while state.peekKind() == TokenKind.SEMICOLON:
+            state.advance()
+            cascadedMessage = yield cascadedMessageParser(state)
+            cascadedMessages.append(cascadedMessage)
+        node = state.builder.messageCascadeNode(state.sourcePositionFrom(startPosition), cascadeReceiver, cascadedMessages)
+        kind = state.peekKind()
 
-def parseCommaExpression(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    startPosition = state.position
-    state, element = parseAssignmentExpression(state)
-    if state.peekKind() != TokenKind.COMMA:
-        return state, element
-    
-    elements = [element]
-    while state.peekKind() == TokenKind.COMMA:
+    if parsedLevel < AssignmentLevel and kind == TokenKind.ASSIGNMENT:
         state.advance()
-        memento = state.memento()
-        state, element = parseAssignmentExpression(state)
-        if element.isErrorNode():
-            state.restore(memento)
-            break
-        elements.append(element)
-    
-    return state, ParseTreeTupleNode(state.sourcePositionFrom(startPosition), elements)
-
-def parseFunctionalType(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    startPosition = state.position
-    state, argumentPatternOrExpression = parseCommaExpression(state)
-    if state.peekKind() == TokenKind.COLON_COLON:
+        assignedValue = yield expressionParser(state, AssignmentLevel)
+        node = state.builder.assignmentNode(state.sourcePositionFrom(startPosition), node, assignedValue)
+        kind = state.peekKind()
+    if pendingMemoLevels and pendingMemoLevels[0] == AssignmentLevel:
+        state.memoTable[(pendingMemoLevels.pop(0), startPosition)] = (state.position, node, state.builder.errorsSince(errorMark))
+    if level == AssignmentLevel:
+        return node
+
+    if parsedLevel < CommaLevel and kind == TokenKind.COMMA:
+        elements = [node]
+        while state.peekKind() == TokenKind.COMMA:
+            state.advance()
+            memento = state.memento()
+            errorMark = state.builder.errorMark()
+            element = yield expressionParser(state, AssignmentLevel)
+            if state.builder.isErrorNode(element):
+                state.restore(memento)
+                state.builder.restoreErrorMark(errorMark)
+                break
+            elements.append(element)
+        node = state.builder.tupleNode(state.sourcePositionFrom(startPosition), elements)
+        kind = state.peekKind()
+
+    if parsedLevel < FunctionalTypeLevel and kind == TokenKind.COLON_COLON:
         state.advance()
-        state, resultTypeExpression = parseFunctionalType(state)
-        return state, ParseTreeFunctionalDependentTypeNode(state.sourcePositionFrom(startPosition), argumentPatternOrExpression, resultTypeExpression)
-    return state, argumentPatternOrExpression
+        resultTypeExpression = yield expressionParser(state, FunctionalTypeLevel)
+        node = state.builder.functionalDependentTypeNode(state.sourcePositionFrom(startPosition), node, resultTypeExpression)
+        kind = state.peekKind()
+    if level == FunctionalTypeLevel:
+        return node
 
-def parseFunctionalTypeWithOptionalArgument(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    if state.peekKind() == TokenKind.COLON_COLON:
-        state.advance()
-        startPosition = state.position
-        state, resultTypeExpression = parseFunctionalType(state)
-        return state, ParseTreeFunctionalDependentTypeNode(state.sourcePositionFrom(startPosition), None, resultTypeExpression)
-    else:
-        return parseFunctionalType(state)
+    if pendingMemoLevels and pendingMemoLevels[0] == FunctionalTypeWithOptionalArgumentLevel:
+        state.memoTable[(pendingMemoLevels.pop(0), startPosition)] = (state.position, node, state.builder.errorsSince(errorMark))
 
-def parseBindExpression(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    startPosition = state.position
-    state, patternExpressionOrValue = parseFunctionalTypeWithOptionalArgument(state)
-    if state.peekKind() == TokenKind.BIND_OPERATOR:
+    if parsedLevel < BindLevel and kind == TokenKind.BIND_OPERATOR:
         state.advance()
-        state, boundValue = parseBindExpression(state)
-        return state, ParseTreeBindPatternNode(state.sourcePositionFrom(startPosition), patternExpressionOrValue, boundValue)
-    else:
-        return state, patternExpressionOrValue
-
-def parseExpression(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
-    return parseBindExpression(state)
+        boundValue = yield expressionParser(state, BindLevel)
+        node = state.builder.bindPatternNode(state.sourcePositionFrom(startPosition), node, boundValue)
+    if pendingMemoLevels:
+        state.memoTable[(pendingMemoLevels.pop(0), startPosition)] = (state.position, node, state.builder.errorsSince(errorMark))
+    return node
 
-def parseExpressionListUntilEndOrDelimiter(state: ParserState, delimiter: TokenKind) -> tuple[ParserState, list[ParseTreeNode]]:
+def expressionListParser(state: ParserState, delimiter: TokenKind, elementStartPositions: list[int] | None = None):
     elements = []
 
     # Chop the initial dots
@@ -587,9 +634,13 @@ def parseExpressionListUntilEndOrDelimiter(state: ParserState, delimiter: TokenK
     expectsExpression = True
     while not state.atEnd() and state.peekKind() != delimiter:
         if not expectsExpression:
-            elements.append(ParseTreeErrorNode(state.currentSourcePosition(), "Expected dot before expression."))
+            elements.append(state.builder.errorNode(state.currentSourcePosition(), MissingDotErrorMessage))
+            if elementStartPositions is not None:
+                elementStartPositions.append(state.position)
 
-        state, expression = parseExpression(state)
+        if elementStartPositions is not None:
+            elementStartPositions.append(state.position)
+        expression = yield expressionParser(state, BindLevel)
         elements.append(expression)
 
         expectsExpression = False
@@ -598,26 +649,123 @@ def parseExpressionListUntilEndOrDelimiter(state: ParserState, delimiter: TokenK
             expectsExpression = True
             state.advance()
 
-    return state, elements
+    return elements
 
-def parseSequenceUntilEndOrDelimiter(state: ParserState, delimiter: TokenKind) -> tuple[ParserState, ParseTreeNode]:
+def sequenceParser(state: ParserState, delimiter: TokenKind):
     initialPosition = state.position
-    state, elements = parseExpressionListUntilEndOrDelimiter(state, delimiter)
+    elements = yield expressionListParser(state, delimiter)
     if len(elements) == 1:
-        return state, elements[0]
-    return state, ParseTreeSequenceNode(state.sourcePositionFrom(initialPosition), elements)
+        return elements[0]
+    return state.builder.sequenceNode(state.sourcePositionFrom(initialPosition), elements)
+
+def parseExpression(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
+    return state, runParser(state, expressionParser(state, BindLevel))
+
+def parseExpressionListUntilEndOrDelimiter(state: ParserState, delimiter: TokenKind, elementStartPositions: list[int] | None = None) -> tuple[ParserState, list[ParseTreeNode]]:
+    return state, runParser(state, expressionListParser(state, delimiter, elementStartPositions))
+
+def parseSequenceUntilEndOrDelimiter(state: ParserState, delimiter: TokenKind) -> tuple[ParserState, ParseTreeNode]:
+    return state, runParser(state, sequenceParser(state, delimiter))
 
 def parseTopLevelExpression(state: ParserState) -> tuple[ParserState, ParseTreeNode]:
     state, node = parseSequenceUntilEndOrDelimiter(state, TokenKind.END_OF_SOURCE)
     return node
 
-def parseSourceString(sourceText: str, sourceName: str = '<string>') -> ParseTreeNode:
+def parseSourceString(sourceText: str, sourceName: str = '<string>', memoize: bool = False) -> ParseTreeNode:
     sourceCode, tokens = scanSourceString(sourceText, sourceName)
-    state = ParserState(sourceCode, tokens)
+    state = ParserState(sourceCode, tokens, memoize)
     return parseTopLevelExpression(state)
 
-def parseFileNamed(fileName: str) -> ParseTreeNode:
+def parseSourceCode(sourceCode: SourceCode, memoize: bool = False) -> ParseTreeNode:
+    state = ParserState(sourceCode, scanSourceCode(sourceCode), memoize)
+    return parseTopLevelExpression(state)
+
+def parseFileNamed(fileName: str, memoize: bool = False) -> ParseTreeNode:
     sourceCode, tokens = scanFileNamed(fileName)
-    state = ParserState(sourceCode, tokens)
+    state = ParserState(sourceCode, tokens, memoize)
     return parseTopLevelExpression(state)
-    
\ No newline at end of file
+    
+
+def isMissingDotErrorNode(node: ParseTreeNode) -> bool:
+    return isinstance(node, ParseTreeErrorNode) and node.message == MissingDotErrorMessage
+
+class IncrementalParser:
+    def __init__(self, sourceCode: SourceCode) -> None:
+        self.sourceCode = sourceCode
+        self.tokens = scanSourceCode(sourceCode)
+
+        ## The source position of a node may start after the first token consumed by its parse function,
+        ## so the token where the parsing of each top-level element started is recorded separately.
+        self.elementStartPositions = []
+        state, self.elements = parseExpressionListUntilEndOrDelimiter(ParserState(sourceCode, self.tokens), TokenKind.END_OF_SOURCE, self.elementStartPositions)
+        self.parseTree = self.makeParseTree(state)
+
+    def makeParseTree(self, state: ParserState) -> ParseTreeNode:
+        if len(self.elements) == 1:
+            return self.elements[0]
+        return ParseTreeSequenceNode(state.sourcePositionFrom(0), self.elements)
+
+    def applyEdits(self, edits: list[tuple[int, int, bytes | str]]) -> ParseTreeNode:
+        ## The source code is edited in place. The top-level expressions that are not affected by the edits are
+        ## reused, and the ones after the edits get their source positions shifted.
+        if len(edits) == 0:
+            return self.parseTree
+
+        oldElements = self.elements
+        oldStartPositions = self.elementStartPositions
+
+        editStartIndex, oldEditEndIndex, newEditEndIndex = self.sourceCode.applyEdits(edits)
+        tokens, firstRescannedIndex, oldResumeIndex, newResumeIndex = rescanSourceCodeWithEdit(self.tokens, editStartIndex, oldEditEndIndex, newEditEndIndex)
+        tokenDelta = newResumeIndex - oldResumeIndex
+
+        firstReparsedElement = 0
+        while firstReparsedElement + 1 < len(oldElements) and oldStartPositions[firstReparsedElement + 1] + TopLevelExpressionLookahead <= firstRescannedIndex:
+            firstReparsedElement += 1
+        while firstReparsedElement > 0 and oldStartPositions[firstReparsedElement - 1] == oldStartPositions[firstReparsedElement]:
+            firstReparsedElement -= 1
+
+        oldElementIndexByStartPosition = {}
+        for i in range(len(oldElements) - 1, firstReparsedElement, -1):
+            oldElementIndexByStartPosition[oldStartPositions[i]] = i
+
+        state = ParserState(self.sourceCode, tokens)
+        elements = oldElements[:firstReparsedElement]
+        startPositions = oldStartPositions[:firstReparsedElement]
+        expectsExpression = True
+        if firstReparsedElement > 0:
+            state.position = oldStartPositions[firstReparsedElement]
+            expectsExpression = not isMissingDotErrorNode(oldElements[firstReparsedElement])
+        while state.peekKind() == TokenKind.DOT:
+            state.advance()
+
+        while not state.atEnd():
+            # Past the rescanned tokens, the remaining old elements can be reused once the parser reaches one of their starts.
+            if state.position > newResumeIndex:
+                oldElementIndex = oldElementIndexByStartPosition.get(state.position - tokenDelta, None)
+                if oldElementIndex is not None and expectsExpression != isMissingDotErrorNode(oldElements[oldElementIndex]):
+                    shifter = ParseTreeSourcePositionShifter(newEditEndIndex - oldEditEndIndex)
+                    for element in oldElements[oldElementIndex:]:
+                        shifter.visitNode(element)
+                    elements += oldElements[oldElementIndex:]
+                    startPositions += [position + tokenDelta for position in oldStartPositions[oldElementIndex:]]
+                    state.position = state.tokenCount - 1
+                    break
+
+            if not expectsExpression:
+                elements.append(state.builder.errorNode(state.currentSourcePosition(), MissingDotErrorMessage))
+                startPositions.append(state.position)
+
+            startPositions.append(state.position)
+            state, expression = parseExpression(state)
+            elements.append(expression)
+
+            expectsExpression = False
+            while state.peekKind() == TokenKind.DOT:
+                expectsExpression = True
+                state.advance()
+
+        self.tokens = tokens
+        self.elements = elements
+        self.elementStartPositions = startPositions
+        self.parseTree = self.makeParseTree(state)
+        return self.parseTree
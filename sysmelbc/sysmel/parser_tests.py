@@ -1,6 +1,8 @@
+import sys
 import unittest
 from .parsetree import *
-from .parser import parseSourceString
+from .parser import parseSourceString, parseTopLevelExpression, ParserState, IncrementalParser
+from .scanner import scanSourceString
 
 class TestParser(unittest.TestCase):
     def parseSourceStringWithoutErrors(self, string: str) -> ParseTreeNode:
@@ -303,6 +305,51 @@ class TestParser(unittest.TestCase):
         self.assertTrue(node.isSpliceNode())
         self.assertTrue(node.term.isLiteralIntegerNode())
         self.assertEqual(node.term.value, 42)
+    def testIncrementalReparse(self):
+        sourceCode = SourceCode(None, '<string>', 'sysmel', b'a := 1. b := 2. c := 3. d := 4')
+        parser = IncrementalParser(sourceCode)
+        firstElement, secondElement, thirdElement, fourthElement = parser.parseTree.elements
+
+        node = parser.applyEdits([(21, 22, b'foo: 42')])
+        self.assertEqual(len(node.elements), 4)
+        self.assertIs(node.elements[0], firstElement)
+        self.assertIsNot(node.elements[2], thirdElement)
+        self.assertIs(node.elements[3], fourthElement)
+        self.assertTrue(node.elements[2].value.isMessageSendNode())
+        self.assertEqual(str(fourthElement.sourcePosition), '<string>:1.31-1.37')
+        self.assertEqual(sourceCode.text, b'a := 1. b := 2. c := foo: 42. d := 4')
+
+    def testIncrementalReparseWithoutEdits(self):
+        sourceCode = SourceCode(None, '<string>', 'sysmel', b'a := 1. b := 2')
+        parser = IncrementalParser(sourceCode)
+        parseTree = parser.parseTree
+        self.assertIsNone(sourceCode.applyEdits([]))
+        self.assertIs(parser.applyEdits([]), parseTree)
+        self.assertEqual(sourceCode.text, b'a := 1. b := 2')
+
+    def testMemoizedReparseAfterRestore(self):
+        sourceCode, tokens = scanSourceString('a, ]')
+        state = ParserState(sourceCode, tokens, memoize = True)
+        node = parseTopLevelExpression(state)
+        self.assertEqual(state.memoHitCount, 1)
+        self.assertGreater(state.memoMissCount, 0)
+        self.assertTrue(node.isSequenceNode())
+
+    def testExpectedTokenError(self):
+        errorVisitor = ParseTreeErrorVisitor()
+        errorVisitor.visitNode(parseSourceString('(a'))
+        self.assertEqual([errorNode.message for errorNode in errorVisitor.errorNodes], ['Expected token of kind TokenKind.RIGHT_PARENT.'])
+
+    def testDeepNesting(self):
+        depth = sys.getrecursionlimit() * 2
+        node = parseSourceString('(' * depth + 'a' + ')' * depth)
+        self.assertTrue(node.isIdentifierReferenceNode())
+
+        node = parseSourceString('a := ' * depth + '1')
+        for i in range(depth):
+            self.assertTrue(node.isAssignmentNode())
+            node = node.value
+        self.assertTrue(node.isLiteralIntegerNode())
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
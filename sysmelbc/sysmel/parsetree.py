@@ -1,14 +1,64 @@
 from abc import ABC, abstractmethod
 
+import bisect
 import os.path
+import re
 import sys
 
+TabCharacter = b'\t'[0]
+NewLineCharacter = b'\n'[0]
+
+LineSeparatorPattern = re.compile(rb'\r\n|\r|\n')
+
 class SourceCode:
     def __init__(self, directory: str | None, name: str, language: str, text: bytes) -> None:
         self.directory = directory
         self.name = name
         self.language = language
         self.text = text
+        self.lineStartIndices = None
+
+    def getLineStartIndices(self) -> list[int]:
+        if self.lineStartIndices is None:
+            self.lineStartIndices = [0] + [match.end() for match in LineSeparatorPattern.finditer(self.text)]
+        return self.lineStartIndices
+
+    def computeLineAndColumnAt(self, index: int) -> tuple[int, int]:
+        lineStartIndices = self.getLineStartIndices()
+        lineIndex = bisect.bisect_right(lineStartIndices, index) - 1
+        column = 1
+        for c in self.text[lineStartIndices[lineIndex] : index]:
+            if c == TabCharacter:
+                column = (column + 4) % 4 * 4 + 1
+            elif c != NewLineCharacter:
+                column += 1
+        return lineIndex + 1, column
+
+    def applyEdits(self, edits: list[tuple[int, int, bytes | str]]) -> tuple[int, int, int] | None:
+        ## Each edit replaces the [startIndex, endIndex) range of the current text. The edits must not overlap.
+        ## Returns the start of the edited region, and its end before and after applying the edits, or None without edits.
+        if len(edits) == 0:
+            return None
+
+        sortedEdits = sorted(edits, key=lambda edit: edit[0])
+        pieces = []
+        position = 0
+        for startIndex, endIndex, replacement in sortedEdits:
+            assert position <= startIndex and startIndex <= endIndex
+            if isinstance(replacement, str):
+                replacement = replacement.encode('utf-8')
+            pieces.append(self.text[position : startIndex])
+            pieces.append(replacement)
+            position = endIndex
+        pieces.append(self.text[position:])
+
+        editedText = b''.join(pieces)
+        editStartIndex = sortedEdits[0][0]
+        oldEditEndIndex = sortedEdits[-1][1]
+        newEditEndIndex = oldEditEndIndex + len(editedText) - len(self.text)
+        self.text = editedText
+        self.lineStartIndices = None
+        return editStartIndex, oldEditEndIndex, newEditEndIndex
 
     def __str__(self) -> str:
         if self.directory is None:
@@ -16,14 +66,35 @@ class SourceCode:
         return os.path.join(self.directory, self.name)
 
 class SourcePosition:
-    def __init__(self, sourceCode: SourceCode, startIndex: int, endIndex: int, startLine: int, startColumn: int, endLine: int, endColumn: int) -> None:
+    ## The lines and columns are computed on demand from the line table shared in the source code.
+    __slots__ = ('sourceCode', 'startIndex', 'endIndex')
+
+    def __init__(self, sourceCode: SourceCode, startIndex: int, endIndex: int) -> None:
         self.sourceCode = sourceCode
         self.startIndex = startIndex
         self.endIndex = endIndex
-        self.startLine = startLine
-        self.startColumn = startColumn
-        self.endLine = endLine
-        self.endColumn = endColumn
+
+    def getStartLineAndColumn(self) -> tuple[int, int]:
+        return self.sourceCode.computeLineAndColumnAt(self.startIndex)
+
+    def getEndLineAndColumn(self) -> tuple[int, int]:
+        return self.sourceCode.computeLineAndColumnAt(self.endIndex)
+
+    @property
+    def startLine(self) -> int:
+        return self.getStartLineAndColumn()[0]
+
+    @property
+    def startColumn(self) -> int:
+        return self.getStartLineAndColumn()[1]
+
+    @property
+    def endLine(self) -> int:
+        return self.getEndLineAndColumn()[0]
+
+    @property
+    def endColumn(self) -> int:
+        return self.getEndLineAndColumn()[1]
 
     def getValue(self) -> bytes:
         return self.sourceCode.text[self.startIndex : self.endIndex]
@@ -32,19 +103,15 @@ class SourcePosition:
         return self.getValue().decode('utf-8')
     
     def until(self, endSourcePosition):
-        return SourcePosition(self.sourceCode,
-                self.startIndex, endSourcePosition.startIndex,
-                self.startLine, self.startColumn,
-                endSourcePosition.startLine, endSourcePosition.startColumn)
+        return SourcePosition(self.sourceCode, self.startIndex, endSourcePosition.startIndex)
 
     def to(self, endSourcePosition):
-        return SourcePosition(self.sourceCode,
-                self.startIndex, endSourcePosition.endIndex,
-                self.startLine, self.startColumn,
-                endSourcePosition.endLine, endSourcePosition.endColumn)
+        return SourcePosition(self.sourceCode, self.startIndex, endSourcePosition.endIndex)
 
     def __str__(self) -> str:
-        return '%s:%d.%d-%d.%d' % (self.sourceCode, self.startLine, self.startColumn, self.endLine, self.endColumn)
+        startLine, startColumn = self.getStartLineAndColumn()
+        endLine, endColumn = self.getEndLineAndColumn()
+        return '%s:%d.%d-%d.%d' % (self.sourceCode, startLine, startColumn, endLine, endColumn)
 
 class EmptySourcePosition:
     Singleton = None
@@ -179,6 +246,8 @@ class ParseTreeVisitor(ABC):
         pass
 
 class ParseTreeNode(ABC):
+    __slots__ = ('sourcePosition',)
+
     def __init__(self, sourcePosition: SourcePosition) -> None:
         self.sourcePosition = sourcePosition
 
@@ -262,6 +331,8 @@ class ParseTreeNode(ABC):
         return False
     
 class ParseTreeErrorNode(ParseTreeNode):
+    __slots__ = ('message', 'innerNodes')
+
     def __init__(self, sourcePosition: SourcePosition, message: str, innerNodes: list[ParseTreeNode] = ()) -> None:
         super().__init__(sourcePosition)
         self.message = message
@@ -274,6 +345,8 @@ class ParseTreeErrorNode(ParseTreeNode):
         return True
 
 class ParseTreeApplicationNode(ParseTreeNode):
+    __slots__ = ('functional', 'arguments', 'kind')
+
     Normal = 0
     Bracket = 1
     CurlyBracket = 2
@@ -294,6 +367,8 @@ class ParseTreeApplicationNode(ParseTreeNode):
         return True
 
 class ParseTreeAssignmentNode(ParseTreeNode):
+    __slots__ = ('store', 'value')
+
     def __init__(self, sourcePosition: SourcePosition, store: ParseTreeNode, value: ParseTreeNode) -> None:
         super().__init__(sourcePosition)
         self.store = store
@@ -306,6 +381,8 @@ class ParseTreeAssignmentNode(ParseTreeNode):
         return True
 
 class ParseTreeBindPatternNode(ParseTreeNode):
+    __slots__ = ('pattern', 'value')
+
     def __init__(self, sourcePosition: SourcePosition, pattern: ParseTreeNode, value: ParseTreeNode) -> None:
         super().__init__(sourcePosition)
         self.pattern = pattern
@@ -318,6 +395,8 @@ class ParseTreeBindPatternNode(ParseTreeNode):
         return True
 
 class ParseTreeBinaryExpressionSequenceNode(ParseTreeNode):
+    __slots__ = ('elements',)
+
     def __init__(self, sourcePosition: SourcePosition, elements: list[ParseTreeNode]) -> None:
         super().__init__(sourcePosition)
         self.elements = elements
@@ -337,6 +416,8 @@ class ParseTreeBinaryExpressionSequenceNode(ParseTreeNode):
         return receiverSequence, ParseTreeCascadeMessageNode(self.sourcePosition, self.elements[-2], [self.elements[-1]])
 
 class ParseTreeBindableNameNode(ParseTreeNode):
+    __slots__ = ('typeExpression', 'nameExpression', 'isImplicit', 'isExistential', 'isVariadic', 'isMutable', 'hasPostTypeExpression')
+
     def __init__(self, sourcePosition: SourcePosition, typeExpression: ParseTreeNode, nameExpression: ParseTreeNode, isImplicit: ParseTreeNode, isExistential: ParseTreeNode, isVariadic: ParseTreeNode, isMutable: ParseTreeNode, hasPostTypeExpression: ParseTreeNode) -> None:
         super().__init__(sourcePosition)
         self.typeExpression = typeExpression
@@ -354,6 +435,8 @@ class ParseTreeBindableNameNode(ParseTreeNode):
         return True
     
 class ParseTreeBlockNode(ParseTreeNode):
+    __slots__ = ('functionType', 'body')
+
     def __init__(self, sourcePosition: SourcePosition, functionType: ParseTreeNode, body: ParseTreeNode) -> None:
         super().__init__(sourcePosition)
         self.functionType = functionType
@@ -366,6 +449,8 @@ class ParseTreeBlockNode(ParseTreeNode):
         return True
     
 class ParseTreeCascadeMessageNode(ParseTreeNode):
+    __slots__ = ('selector', 'arguments')
+
     def __init__(self, sourcePosition: SourcePosition, selector: ParseTreeNode, arguments: list[ParseTreeNode]) -> None:
         super().__init__(sourcePosition)
         self.selector = selector
@@ -378,6 +463,8 @@ class ParseTreeCascadeMessageNode(ParseTreeNode):
         return True
 
 class ParseTreeDictionaryNode(ParseTreeNode):
+    __slots__ = ('elements',)
+
     def __init__(self, sourcePosition: SourcePosition, elements: list[ParseTreeNode]) -> None:
         super().__init__(sourcePosition)
         self.elements = elements
@@ -389,6 +476,8 @@ class ParseTreeDictionaryNode(ParseTreeNode):
         return True
     
 class ParseTreeFunctionalDependentTypeNode(ParseTreeNode):
+    __slots__ = ('argumentPattern', 'resultType')
+
     def __init__(self, sourcePosition: SourcePosition, argumentPattern: ParseTreeNode, resultType: ParseTreeNode) -> None:
         super().__init__(sourcePosition)
         self.argumentPattern = argumentPattern
@@ -401,6 +490,8 @@ class ParseTreeFunctionalDependentTypeNode(ParseTreeNode):
         return True
     
 class ParseTreeIdentifierReferenceNode(ParseTreeNode):
+    __slots__ = ('value',)
+
     def __init__(self, sourcePosition: SourcePosition, value: str) -> None:
         super().__init__(sourcePosition)
         self.value = value
@@ -412,6 +503,8 @@ class ParseTreeIdentifierReferenceNode(ParseTreeNode):
         return True
     
 class ParseTreeLexicalBlockNode(ParseTreeNode):
+    __slots__ = ('body',)
+
     def __init__(self, sourcePosition: SourcePosition, body: ParseTreeNode) -> None:
         super().__init__(sourcePosition)
         self.body = body
@@ -423,10 +516,14 @@ class ParseTreeLexicalBlockNode(ParseTreeNode):
         return True
     
 class ParseTreeLiteralNode(ParseTreeNode):
+    __slots__ = ()
+
     def isLiteralNode(self) -> bool:
         return True
 
 class ParseTreeLiteralCharacterNode(ParseTreeLiteralNode):
+    __slots__ = ('value',)
+
     def __init__(self, sourcePosition: SourcePosition, value: int) -> None:
         super().__init__(sourcePosition)
         self.value = value
@@ -438,6 +535,8 @@ class ParseTreeLiteralCharacterNode(ParseTreeLiteralNode):
         return True
 
 class ParseTreeLiteralFloatNode(ParseTreeLiteralNode):
+    __slots__ = ('value',)
+
     def __init__(self, sourcePosition: SourcePosition, value: float) -> None:
         super().__init__(sourcePosition)
         self.value = value
@@ -449,6 +548,8 @@ class ParseTreeLiteralFloatNode(ParseTreeLiteralNode):
         return True
         
 class ParseTreeLiteralIntegerNode(ParseTreeLiteralNode):
+    __slots__ = ('value',)
+
     def __init__(self, sourcePosition: SourcePosition, value: int) -> None:
         super().__init__(sourcePosition)
         self.value = value
@@ -460,6 +561,8 @@ class ParseTreeLiteralIntegerNode(ParseTreeLiteralNode):
         return True
     
 class ParseTreeLiteralStringNode(ParseTreeLiteralNode):
+    __slots__ = ('value',)
+
     def __init__(self, sourcePosition: SourcePosition, value: str) -> None:
         super().__init__(sourcePosition)
         self.value = value
@@ -471,6 +574,8 @@ class ParseTreeLiteralStringNode(ParseTreeLiteralNode):
         return True
     
 class ParseTreeLiteralSymbolNode(ParseTreeLiteralNode):
+    __slots__ = ('value',)
+
     def __init__(self, sourcePosition: SourcePosition, value: str) -> None:
         super().__init__(sourcePosition)
         self.value = value
@@ -482,6 +587,8 @@ class ParseTreeLiteralSymbolNode(ParseTreeLiteralNode):
         return True
     
 class ParseTreeMessageCascadeNode(ParseTreeNode):
+    __slots__ = ('receiver', 'messages')
+
     def __init__(self, sourcePosition: SourcePosition, receiver: ParseTreeNode, messages: list[ParseTreeNode]) -> None:
         super().__init__(sourcePosition)
         self.receiver = receiver
@@ -494,6 +601,8 @@ class ParseTreeMessageCascadeNode(ParseTreeNode):
         return True
     
 class ParseTreeMessageSendNode(ParseTreeNode):
+    __slots__ = ('receiver', 'selector', 'arguments')
+
     def __init__(self, sourcePosition: SourcePosition, receiver: ParseTreeNode, selector: ParseTreeNode, arguments: list[ParseTreeNode]) -> None:
         super().__init__(sourcePosition)
         self.receiver = receiver
@@ -510,6 +619,8 @@ class ParseTreeMessageSendNode(ParseTreeNode):
         return self.receiver, ParseTreeCascadeMessageNode(self.sourcePosition, self.selector, self.arguments)
 
 class ParseTreeQuasiQuoteNode(ParseTreeNode):
+    __slots__ = ('term',)
+
     def __init__(self, sourcePosition: SourcePosition, term: ParseTreeNode) -> None:
         super().__init__(sourcePosition)
         self.term = term
@@ -521,6 +632,8 @@ class ParseTreeQuasiQuoteNode(ParseTreeNode):
         return True
     
 class ParseTreeQuasiUnquoteNode(ParseTreeNode):
+    __slots__ = ('term',)
+
     def __init__(self, sourcePosition: SourcePosition, term: ParseTreeNode) -> None:
         super().__init__(sourcePosition)
         self.term = term
@@ -532,6 +645,8 @@ class ParseTreeQuasiUnquoteNode(ParseTreeNode):
         return True
 
 class ParseTreeQuoteNode(ParseTreeNode):
+    __slots__ = ('term',)
+
     def __init__(self, sourcePosition: SourcePosition, term: ParseTreeNode) -> None:
         super().__init__(sourcePosition)
         self.term = term
@@ -543,6 +658,8 @@ class ParseTreeQuoteNode(ParseTreeNode):
         return True
     
 class ParseTreeSequenceNode(ParseTreeNode):
+    __slots__ = ('elements',)
+
     def __init__(self, sourcePosition: SourcePosition, elements: list[ParseTreeNode]) -> None:
         super().__init__(sourcePosition)
         self.elements = elements
@@ -554,6 +671,8 @@ class ParseTreeSequenceNode(ParseTreeNode):
         return True
     
 class ParseTreeSpliceNode(ParseTreeNode):
+    __slots__ = ('term',)
+
     def __init__(self, sourcePosition: SourcePosition, term: ParseTreeNode) -> None:
         super().__init__(sourcePosition)
         self.term = term
@@ -565,6 +684,8 @@ class ParseTreeSpliceNode(ParseTreeNode):
         return True
 
 class ParseTreeTupleNode(ParseTreeNode):
+    __slots__ = ('elements',)
+
     def __init__(self, sourcePosition: SourcePosition, elements: list[ParseTreeNode]) -> None:
         super().__init__(sourcePosition)
         self.elements = elements
@@ -664,6 +785,24 @@ class ParseTreeSequentialVisitor(ParseTreeVisitor):
     def visitTupleNode(self, node: ParseTreeTupleNode):
         self.visitNodes(node.elements)
 
+class ParseTreeSourcePositionShifter(ParseTreeSequentialVisitor):
+    def __init__(self, delta: int) -> None:
+        super().__init__()
+        self.delta = delta
+        self.shiftedSourcePositions = set()
+
+    def visitNode(self, node: ParseTreeNode):
+        # Error recovery may leave missing tuple elements.
+        if node is None:
+            return None
+
+        sourcePosition = node.sourcePosition
+        if isinstance(sourcePosition, SourcePosition) and sourcePosition not in self.shiftedSourcePositions:
+            self.shiftedSourcePositions.add(sourcePosition)
+            sourcePosition.startIndex += self.delta
+            sourcePosition.endIndex += self.delta
+        return super().visitNode(node)
+
 class ParseTreeErrorVisitor(ParseTreeSequentialVisitor):
     def __init__(self) -> None:
         super().__init__()
@@ -678,4 +817,56 @@ class ParseTreeErrorVisitor(ParseTreeSequentialVisitor):
         for errorNode in self.errorNodes:
             sys.stderr.write('%s: %s\n' % (str(errorNode.sourcePosition), errorNode.message))
         return len(self.errorNodes) == 0
-    
\ No newline at end of file
+    
+class ParseTreeBuilder:
+    ## The parse tree node classes take the same arguments as the builder methods, so they are called directly.
+    errorNode = ParseTreeErrorNode
+    applicationNode = ParseTreeApplicationNode
+    assignmentNode = ParseTreeAssignmentNode
+    bindPatternNode = ParseTreeBindPatternNode
+    binaryExpressionSequenceNode = ParseTreeBinaryExpressionSequenceNode
+    bindableNameNode = ParseTreeBindableNameNode
+    blockNode = ParseTreeBlockNode
+    cascadeMessageNode = ParseTreeCascadeMessageNode
+    dictionaryNode = ParseTreeDictionaryNode
+    functionalDependentTypeNode = ParseTreeFunctionalDependentTypeNode
+    identifierReferenceNode = ParseTreeIdentifierReferenceNode
+    lexicalBlockNode = ParseTreeLexicalBlockNode
+    literalCharacterNode = ParseTreeLiteralCharacterNode
+    literalFloatNode = ParseTreeLiteralFloatNode
+    literalIntegerNode = ParseTreeLiteralIntegerNode
+    literalSymbolNode = ParseTreeLiteralSymbolNode
+    literalStringNode = ParseTreeLiteralStringNode
+    messageCascadeNode = ParseTreeMessageCascadeNode
+    messageSendNode = ParseTreeMessageSendNode
+    quoteNode = ParseTreeQuoteNode
+    quasiQuoteNode = ParseTreeQuasiQuoteNode
+    quasiUnquoteNode = ParseTreeQuasiUnquoteNode
+    sequenceNode = ParseTreeSequenceNode
+    spliceNode = ParseTreeSpliceNode
+    tupleNode = ParseTreeTupleNode
+
+    def sourcePositionOf(self, node) -> SourcePosition:
+        return node.sourcePosition
+
+    def isErrorNode(self, node) -> bool:
+        return node.isErrorNode()
+
+    def isFunctionalDependentTypeNode(self, node) -> bool:
+        return node.isFunctionalDependentTypeNode()
+
+    def asMessageSendCascadeReceiverAndFirstMessage(self, node):
+        return node.asMessageSendCascadeReceiverAndFirstMessage()
+
+    ## The parse tree errors are collected afterwards by the ParseTreeErrorVisitor, so there are no errors to rewind.
+    def errorMark(self) -> int:
+        return 0
+
+    def errorsSince(self, mark: int) -> tuple:
+        return ()
+
+    def restoreErrorMark(self, mark: int):
+        pass
+
+    def addErrors(self, errors: tuple):
+        pass
@@ -0,0 +1,144 @@
+PersistentHashMapBitsPerLevel = 5
+PersistentHashMapLevelMask = (1 << PersistentHashMapBitsPerLevel) - 1
+PersistentHashMapHashBits = 64
+PersistentHashMapHashMask = (1 << PersistentHashMapHashBits) - 1
+
+def persistentHashMapHashOf(key) -> int:
+    ## The hash is taken as unsigned, so that shifting it consumes a fixed amount of bits.
+    return hash(key) & PersistentHashMapHashMask
+
+class PersistentHashMapBitmapNode:
+    ## An entry holds a key and a value, or None and a child node when several keys share the hash bits at this level.
+    __slots__ = ('bitmap', 'entries')
+
+    def __init__(self, bitmap: int, entries: tuple) -> None:
+        self.bitmap = bitmap
+        self.entries = entries
+
+    def get(self, key, keyHash: int, shift: int, default):
+        node = self
+        while True:
+            bit = 1 << ((keyHash >> shift) & PersistentHashMapLevelMask)
+            if not node.bitmap & bit:
+                return default
+
+            entryIndex = (node.bitmap & (bit - 1)).bit_count() * 2
+            entryKey = node.entries[entryIndex]
+            entryValue = node.entries[entryIndex + 1]
+            if entryKey is None:
+                if shift + PersistentHashMapBitsPerLevel >= PersistentHashMapHashBits:
+                    return entryValue.get(key, keyHash, shift + PersistentHashMapBitsPerLevel, default)
+                node = entryValue
+                shift += PersistentHashMapBitsPerLevel
+                continue
+
+            if entryKey == key:
+                return entryValue
+            return default
+
+    def withKeyValue(self, key, keyHash: int, value, shift: int):
+        bit = 1 << ((keyHash >> shift) & PersistentHashMapLevelMask)
+        entryIndex = (self.bitmap & (bit - 1)).bit_count() * 2
+        entries = self.entries
+        if not self.bitmap & bit:
+            return PersistentHashMapBitmapNode(self.bitmap | bit, entries[:entryIndex] + (key, value) + entries[entryIndex:]), True
+
+        entryKey = entries[entryIndex]
+        entryValue = entries[entryIndex + 1]
+        if entryKey is None:
+            newChild, isNewKey = entryValue.withKeyValue(key, keyHash, value, shift + PersistentHashMapBitsPerLevel)
+            return PersistentHashMapBitmapNode(self.bitmap, entries[:entryIndex + 1] + (newChild,) + entries[entryIndex + 2:]), isNewKey
+
+        if entryKey == key:
+            if entryValue is value:
+                return self, False
+            return PersistentHashMapBitmapNode(self.bitmap, entries[:entryIndex + 1] + (value,) + entries[entryIndex + 2:]), False
+
+        newChild = makePersistentHashMapNodeWithTwoEntries(entryKey, persistentHashMapHashOf(entryKey), entryValue, key, keyHash, value, shift + PersistentHashMapBitsPerLevel)
+        return PersistentHashMapBitmapNode(self.bitmap, entries[:entryIndex] + (None, newChild) + entries[entryIndex + 2:]), True
+
+    def itemsDo(self, aBlock):
+        entries = self.entries
+        for entryIndex in range(0, len(entries), 2):
+            if entries[entryIndex] is None:
+                entries[entryIndex + 1].itemsDo(aBlock)
+            else:
+                aBlock(entries[entryIndex], entries[entryIndex + 1])
+
+class PersistentHashMapCollisionNode:
+    __slots__ = ('keyHash', 'entries')
+
+    def __init__(self, keyHash: int, entries: tuple) -> None:
+        self.keyHash = keyHash
+        self.entries = entries
+
+    def get(self, key, keyHash: int, shift: int, default):
+        entries = self.entries
+        for entryIndex in range(0, len(entries), 2):
+            if entries[entryIndex] == key:
+                return entries[entryIndex + 1]
+        return default
+
+    def withKeyValue(self, key, keyHash: int, value, shift: int):
+        entries = self.entries
+        for entryIndex in range(0, len(entries), 2):
+            if entries[entryIndex] == key:
+                return PersistentHashMapCollisionNode(self.keyHash, entries[:entryIndex + 1] + (value,) + entries[entryIndex + 2:]), False
+        return PersistentHashMapCollisionNode(self.keyHash, entries + (key, value)), True
+
+    def itemsDo(self, aBlock):
+        entries = self.entries
+        for entryIndex in range(0, len(entries), 2):
+            aBlock(entries[entryIndex], entries[entryIndex + 1])
+
+def makePersistentHashMapNodeWithTwoEntries(firstKey, firstHash: int, firstValue, secondKey, secondHash: int, secondValue, shift: int):
+    if shift >= PersistentHashMapHashBits:
+        return PersistentHashMapCollisionNode(firstHash, (firstKey, firstValue, secondKey, secondValue))
+
+    firstFragment = (firstHash >> shift) & PersistentHashMapLevelMask
+    secondFragment = (secondHash >> shift) & PersistentHashMapLevelMask
+    if firstFragment == secondFragment:
+        child = makePersistentHashMapNodeWithTwoEntries(firstKey, firstHash, firstValue, secondKey, secondHash, secondValue, shift + PersistentHashMapBitsPerLevel)
+        return PersistentHashMapBitmapNode(1 << firstFragment, (None, child))
+    elif firstFragment < secondFragment:
+        return PersistentHashMapBitmapNode((1 << firstFragment) | (1 << secondFragment), (firstKey, firstValue, secondKey, secondValue))
+    else:
+        return PersistentHashMapBitmapNode((1 << firstFragment) | (1 << secondFragment), (secondKey, secondValue, firstKey, firstValue))
+
+class PersistentHashMap:
+    ## Immutable hash array mapped trie. The keys must not be None.
+    __slots__ = ('root', 'size')
+    Empty = None
+
+    def __init__(self, root: PersistentHashMapBitmapNode, size: int) -> None:
+        self.root = root
+        self.size = size
+
+    @classmethod
+    def getEmpty(cls):
+        if cls.Empty is None:
+            cls.Empty = cls(PersistentHashMapBitmapNode(0, ()), 0)
+        return cls.Empty
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, key) -> bool:
+        return self.root.get(key, persistentHashMapHashOf(key), 0, PersistentHashMapMissingValue) is not PersistentHashMapMissingValue
+
+    def get(self, key, default = None):
+        return self.root.get(key, persistentHashMapHashOf(key), 0, default)
+
+    def withKeyValue(self, key, value):
+        assert key is not None
+        newRoot, isNewKey = self.root.withKeyValue(key, persistentHashMapHashOf(key), value, 0)
+        if newRoot is self.root:
+            return self
+        return PersistentHashMap(newRoot, self.size + 1 if isNewKey else self.size)
+
+    def items(self) -> list:
+        items = []
+        self.root.itemsDo(lambda key, value: items.append((key, value)))
+        return items
+
+PersistentHashMapMissingValue = object()
@@ -0,0 +1,35 @@
+from .persistentHashMap import *
+import unittest
+
+class CollidingKey:
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CollidingKey) and self.value == other.value
+
+    def __hash__(self) -> int:
+        return 42
+
+class TestPersistentHashMap(unittest.TestCase):
+    def testAddingKeysPreservesPreviousMaps(self):
+        maps = [PersistentHashMap.getEmpty()]
+        for i in range(1000):
+            maps.append(maps[-1].withKeyValue('k%d' % (i % 700), i))
+
+        self.assertEqual(len(maps[-1]), 700)
+        self.assertEqual(maps[-1].get('k5'), 705)
+        self.assertEqual(maps[10].get('k5'), 5)
+        self.assertIsNone(maps[5].get('k5'))
+        self.assertNotIn('k5', maps[5])
+        self.assertEqual(sorted(maps[-1].items()), sorted({'k%d' % (i % 700): i for i in range(1000)}.items()))
+
+    def testCollidingKeys(self):
+        map = PersistentHashMap.getEmpty()
+        for i in range(10):
+            map = map.withKeyValue(CollidingKey(i), i)
+        map = map.withKeyValue(CollidingKey(3), 'three')
+        self.assertEqual(len(map), 10)
+        self.assertEqual([map.get(CollidingKey(i)) for i in range(10)], [0, 1, 2, 'three', 4, 5, 6, 7, 8, 9])
+        self.assertIsNone(map.get(CollidingKey(10)))
+        self.assertEqual(map.get(-1, 'missing'), 'missing')
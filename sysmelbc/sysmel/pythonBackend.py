@@ -0,0 +1,230 @@
+from .mop import *
+from .asg import *
+
+class ASGPythonFunction:
+    def __init__(self, functionalNode, source: str, function) -> None:
+        self.functionalNode = functionalNode
+        self.source = source
+        self.function = function
+
+    def evaluateInModuleWithArguments(self, module, *args):
+        return self.function(module, *args)
+
+    def dump(self) -> str:
+        return self.source
+
+class ASGPythonCodeGenerator(ASGDynamicProgrammingAlgorithm):
+    ## The regions are rebuilt into structured if and while statements. The region instructions are emitted after
+    ## the region, except for the regions that transfer the control.
+    def __init__(self, scheduledInstructions) -> None:
+        super().__init__()
+        self.scheduledInstructions = scheduledInstructions
+        self.functionalNode = scheduledInstructions.functionalNode
+        self.lines = []
+        self.indentation = 1
+        self.localCount = 0
+        self.globals = {}
+        self.globalNames = {}
+        self.regionInstructions = {}
+        self.successorRegions = {}
+        self.convergenceRegions = {}
+        self.phiOfPhiValue = {}
+        self.loopBreakFlags = {}
+
+    def generate(self) -> ASGPythonFunction:
+        self.analyzeScheduledInstructions()
+        functionName = self.makeFunctionName()
+        parameterNames = ['module']
+        for parameter in self.getActivationParameters():
+            parameterName = 'a%d' % (len(parameterNames) - 1)
+            parameterNames.append(parameterName)
+            self.setValueForNodeExpansion(parameter, parameterName)
+        for constant in self.scheduledInstructions.constants:
+            self.setValueForNodeExpansion(constant, self.bindGlobal(constant))
+
+        self.emitRegionChain(self.scheduledInstructions.serializedInstructions[0])
+        source = 'def %s(%s):\n' % (functionName, ', '.join(parameterNames))
+        source += '\n'.join(self.lines) + '\n'
+        exec(compile(source, '<generated %s>' % functionName, 'exec'), self.globals)
+        return ASGPythonFunction(self.functionalNode, source, self.globals[functionName])
+
+    def makeFunctionName(self) -> str:
+        if self.functionalNode.isLambda() and self.functionalNode.name is not None and self.functionalNode.name.isidentifier():
+            return self.functionalNode.name
+        return 'generated'
+
+    def getActivationParameters(self):
+        if self.functionalNode.isLambda():
+            return self.functionalNode.arguments
+        return self.scheduledInstructions.activationParameters
+
+    def analyzeScheduledInstructions(self):
+        region = None
+        for instruction in self.scheduledInstructions.serializedInstructions:
+            if instruction.isSequencingNode():
+                region = instruction
+                self.regionInstructions[region] = []
+                predecessor = getattr(region, 'predecessor', None)
+                if predecessor is not None:
+                    self.successorRegions[predecessor] = region
+                if region.isSequenceConvergenceNode() and not region.isKindOf(ASGLoopContinueEntry):
+                    self.convergenceRegions[region.divergence] = region
+            else:
+                self.regionInstructions[region].append(instruction)
+                if instruction.isPhiNode():
+                    for phiValue in instruction.values:
+                        self.phiOfPhiValue[phiValue] = instruction
+
+    def bindGlobal(self, value) -> str:
+        name = self.globalNames.get(id(value), None)
+        if name is None:
+            name = 'g%d' % len(self.globalNames)
+            self.globalNames[id(value)] = name
+            self.globals[name] = value
+        return name
+
+    def newLocal(self) -> str:
+        self.localCount += 1
+        return 'v%d' % self.localCount
+
+    def emitLine(self, line: str):
+        self.lines.append('    ' * self.indentation + line)
+
+    def emitIndentedRegionChain(self, region):
+        self.indentation += 1
+        lineCount = len(self.lines)
+        self.emitRegionChain(region)
+        if len(self.lines) == lineCount:
+            self.emitLine('pass')
+        self.indentation -= 1
+
+    def emitRegionChain(self, region):
+        while region is not None:
+            if region.isKindOf(ASGSequencingAndDataNode):
+                self(region)
+                self.emitRegionInstructions(region)
+            else:
+                self.emitRegionInstructions(region)
+                self(region)
+            region = self.successorRegions.get(region, None) or self.convergenceRegions.get(region, None)
+
+    def emitRegionInstructions(self, region):
+        for instruction in self.regionInstructions[region]:
+            self(instruction)
+
+    def emitValueLine(self, expression: str) -> str:
+        local = self.newLocal()
+        self.emitLine('%s = %s' % (local, expression))
+        return local
+
+    def translateApplication(self, node, functional, arguments) -> str:
+        translatedArguments = list(map(self, arguments))
+        if functional.isLiteralPrimitiveFunction():
+            if functional.compileTimeImplementation is None:
+                raise Exception('Cannot generate Python code for the primitive %s without a compile time implementation.' % functional.name)
+            translatedArguments = [self.bindGlobal(node.sourceDerivation), self(node.type)] + translatedArguments
+            return self.emitValueLine('%s(%s)' % (self.bindGlobal(functional.compileTimeImplementation), ', '.join(translatedArguments)))
+        return self.emitValueLine('%s(%s)' % (self(functional), ', '.join(translatedArguments)))
+
+    @asgPatternMatchingOnNodeKind(ASGSequenceEntryNode)
+    def translateSequenceEntry(self, node: ASGSequenceEntryNode):
+        return None
+
+    @asgPatternMatchingOnNodeKind(ASGSequenceConvergenceNode)
+    def translateSequenceConvergence(self, node: ASGSequenceConvergenceNode):
+        return None
+
+    @asgPatternMatchingOnNodeKind(ASGSequenceBranchEndNode)
+    def translateSequenceBranchEnd(self, node: ASGSequenceBranchEndNode):
+        return None
+
+    @asgPatternMatchingOnNodeKind(ASGConditionalBranchNode)
+    def translateConditionalBranch(self, node: ASGConditionalBranchNode):
+        ## The booleans are injected into the sum of False and True.
+        self.emitLine('if %s.index != 0:' % self(node.condition))
+        self.emitIndentedRegionChain(node.trueDestination)
+        self.emitLine('else:')
+        self.emitIndentedRegionChain(node.falseDestination)
+        return None
+
+    @asgPatternMatchingOnNodeKind(ASGLoopEntryNode)
+    def translateLoopEntry(self, node: ASGLoopEntryNode):
+        ## The body is wrapped in an inner loop, so that a continue breaks into the continue expression.
+        convergence = self.convergenceRegions.get(node, None)
+        breakFlag = None
+        if convergence is not None and any(predecessor.isLoopBreakNode() for predecessor in convergence.predecessors):
+            breakFlag = self.newLocal()
+            self.loopBreakFlags[node.entryDestination] = breakFlag
+            self.emitLine('%s = False' % breakFlag)
+
+        self.emitLine('while True:')
+        self.indentation += 1
+        self.emitLine('while True:')
+        self.emitIndentedRegionChain(node.entryDestination)
+        if breakFlag is not None:
+            self.emitLine('if %s: break' % breakFlag)
+        self.emitRegionChain(node.continueDestination)
+        self.indentation -= 1
+        return None
+
+    @asgPatternMatchingOnNodeKind(ASGLoopContinueNode)
+    def translateLoopContinue(self, node: ASGLoopContinueNode):
+        self.emitLine('break')
+        return None
+
+    @asgPatternMatchingOnNodeKind(ASGLoopBreakNode)
+    def translateLoopBreak(self, node: ASGLoopBreakNode):
+        self.emitLine('%s = True' % self.loopBreakFlags[node.loopBodyEntry])
+        self.emitLine('break')
+        return None
+
+    @asgPatternMatchingOnNodeKind(ASGLoopIterationEndNode)
+    def translateLoopIterationEnd(self, node: ASGLoopIterationEndNode):
+        if node.continueCondition is not None:
+            self.emitLine('if %s.index == 0: break' % self(node.continueCondition))
+        return None
+
+    @asgPatternMatchingOnNodeKind(ASGSequenceReturnNode)
+    def translateSequenceReturn(self, node: ASGSequenceReturnNode):
+        self.emitLine('return %s' % self(node.value))
+        return None
+
+    @asgPatternMatchingOnNodeKind(ASGExportNode)
+    def translateExport(self, node: ASGExportNode):
+        self.emitLine('module.exportValueWithName(%s, %r, externalName = %r)' % (self(node.value), node.exportedName, node.externalName))
+        return None
+
+    @asgPatternMatchingOnNodeKind(ASGApplicationNode)
+    def translateApplicationNode(self, node: ASGApplicationNode):
+        return self.translateApplication(node, node.functional, node.arguments)
+
+    @asgPatternMatchingOnNodeKind(ASGFxApplicationNode)
+    def translateFxApplication(self, node: ASGFxApplicationNode):
+        return self.translateApplication(node, node.functional, node.arguments)
+
+    @asgPatternMatchingOnNodeKind(ASGAllocaNode)
+    def translateAlloca(self, node: ASGAllocaNode):
+        return self.emitValueLine('[None]')
+
+    @asgPatternMatchingOnNodeKind(ASGLoadNode)
+    def translateLoad(self, node: ASGLoadNode):
+        return self.emitValueLine('%s[0]' % self(node.pointer))
+
+    @asgPatternMatchingOnNodeKind(ASGStoreNode)
+    def translateStore(self, node: ASGStoreNode):
+        self.emitLine('%s[0] = %s' % (self(node.pointer), self(node.value)))
+        return None
+
+    @asgPatternMatchingOnNodeKind(ASGPhiNode)
+    def translatePhi(self, node: ASGPhiNode):
+        return self.newLocal()
+
+    @asgPatternMatchingOnNodeKind(ASGPhiValueNode)
+    def translatePhiValue(self, node: ASGPhiValueNode):
+        phi = self(self.phiOfPhiValue[node])
+        self.emitLine('%s = %s' % (phi, self(node.value)))
+        return phi
+
+    @asgPatternMatchingOnNodeKind(ASGNode)
+    def translateUnsupportedNode(self, node: ASGNode):
+        raise Exception('Cannot generate Python code for %s.' % node.printNameWithDataAttributes())
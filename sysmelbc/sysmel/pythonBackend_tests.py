@@ -0,0 +1,23 @@
+from .testSupport import expandAndTypecheckSourceString
+from .asg import *
+from .visualizations import asgTopoSort
+import unittest
+
+class TestASGPythonBackend(unittest.TestCase):
+    def analyzeLambda(self, sourceText: str) -> ASGLambdaNode:
+        asgAnalyzed, errors = expandAndTypecheckSourceString(sourceText, 'test.sysmel')
+        self.assertEqual(errors, [])
+        return [node for node in asgTopoSort(asgAnalyzed) if node.isKindOf(ASGLambdaNode)][0]
+
+    def testLoopLambda(self):
+        lambdaNode = self.analyzeLambda(':sum(:(Int32)n :: Int32) := {\n    :!i := 0i32.\n    :!s := 0i32.\n    while: i < n do: {\n        s := s + i.\n    } continueWith: (i := i + 1i32).\n    s\n}.')
+        argument = ASGLiteralIntegerNode(ASGNodeNoDerivation.getSingleton(), lambdaNode.type.arguments[0].type, 10)
+        self.assertEqual(lambdaNode(argument).value, 45)
+
+    def testScheduledInstructionsAreCached(self):
+        from .gcm import lambdaGCM
+        lambdaNode = self.analyzeLambda(':twice(:(Int32)x :: Int32) := x + x.')
+        scheduledInstructions = lambdaGCM(lambdaNode)
+        self.assertIs(lambdaGCM(lambdaNode), scheduledInstructions)
+        self.assertIs(scheduledInstructions.asInterpretableInstructions(), scheduledInstructions.asInterpretableInstructions())
+        self.assertIs(scheduledInstructions.asPythonFunction(), lambdaNode.getCompiledPythonFunction())
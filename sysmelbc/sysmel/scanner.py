@@ -1,9 +1,11 @@
-from enum import Enum
+from array import array
+from enum import IntEnum
 from .parsetree import SourceCode, SourcePosition
-import copy
+import bisect
 import os.path
+import re
 
-TokenKind = Enum('TokenKind', [
+TokenKind = IntEnum('TokenKind', [
     'END_OF_SOURCE', 'ERROR',
 
     'CHARACTER', 'FLOAT', 'IDENTIFIER', 'NAT', 'KEYWORD', 'MULTI_KEYWORD', 'OPERATOR', 'STRING', 'SYMBOL',
@@ -17,6 +19,8 @@ TokenKind = Enum('TokenKind', [
 ])
 
 class Token:
+    __slots__ = ('kind', 'sourcePosition', 'errorMessage')
+
     def __init__(self, kind: TokenKind, sourcePosition: SourcePosition, errorMessage: str = None):
         self.kind = kind
         self.sourcePosition = sourcePosition
@@ -34,365 +38,311 @@ class Token:
         else:
             return '%s: %s' % (str(self.sourcePosition), repr(self.kind))
 
-class ScannerState:
-    def __init__(self, sourceCode: SourceCode):
+class TokenBuffer:
+    def __init__(self, sourceCode: SourceCode) -> None:
         self.sourceCode = sourceCode
-        self.position = 0
-        self.line = 1
-        self.column = 1
-        self.isPreviousCR = False
-    
-    def atEnd(self) -> bool:
-        return self.position >= len(self.sourceCode.text)
-
-    def peek(self, peekOffset: int = 0) -> int:
-        peekPosition = self.position + peekOffset
-        if peekPosition < len(self.sourceCode.text):
-            return self.sourceCode.text[peekPosition]
-        else:
-            return -1
-        
-    def advance(self) -> None:
-        assert self.position < len(self.sourceCode.text)
-        c = self.sourceCode.text[self.position]
-        self.position += 1
-        if c == b'\r'[0]: 
-            self.line += 1
-            self.column = 1
-            self.isPreviousCR = True
-        elif c == b'\n'[0]: 
-            if not self.isPreviousCR:
-                self.line += 1
-                self.column = 1
-            self.isPreviousCR = False
-        elif c == b'\t'[0]: 
-            self.column = (self.column + 4) % 4 * 4 + 1
-            self.isPreviousCR = False
-        else:
-            self.column += 1
-
-    def advanceCount(self, count: int) -> None:
-        for i in range(count):
-            self.advance()
-        
-    def makeToken(self, kind: TokenKind) -> Token:
-        sourcePosition = SourcePosition(self.sourceCode, self.position, self.position, self.line, self.column, self.line, self.column)
-        return Token(kind, sourcePosition)
-    
-    def makeTokenStartingFrom(self, kind: TokenKind, initialState) -> Token:
-        sourcePosition = SourcePosition(self.sourceCode, initialState.position, self.position, initialState.line, initialState.column, self.line, self.column)
-        return Token(kind, sourcePosition)
-
-    def makeErrorTokenStartingFrom(self, errorMessage: str, initialState):
-        sourcePosition = SourcePosition(self.sourceCode, initialState.position, self.position, initialState.line, initialState.column, self.line, self.column)
-        return Token(TokenKind.ERROR, sourcePosition, errorMessage)
-
-def skipWhite(state: ScannerState) -> tuple[ScannerState, Token]:
-    hasSeenComment = True
-    while hasSeenComment:
-        hasSeenComment = False
-        while not state.atEnd() and state.peek() <= b' '[0]:
-            state.advance()
-
-        if state.peek() == b'#'[0]:
-            if state.peek(1) == b'#'[0]:
-                state.advanceCount(2)
-                while not state.atEnd():
-                    if state.peek() in b'\r\n':
-                        break
-                    state.advance()
-                hasSeenComment = True
-
-            elif state.peek(1) == b'*'[0]:
-                commentInitialState = copy.copy(state)
-                state.advanceCount(2)
-                hasCommentEnd = False
-                while not state.atEnd():
-                    hasCommentEnd = state.peek() == b'*'[0] and state.peek(1) == b'#'[0]
-                    if hasCommentEnd:
-                        state.advanceCount(2)
-                        break
-
-                    state.advance()
-                if not hasCommentEnd:
-                    return state, state.makeErrorTokenStartingFrom('Incomplete multiline comment.', commentInitialState)
-
-                hasSeenComment = True
-
-    return state, None
-
-def isDigit(c: int) -> bool:
-    return (b'0'[0] <= c and c <= b'9'[0])
-
-def isE(c: int) -> bool:
-    return b'e'[0] == c or b'E'[0] == c
-
-def isIdentifierStart(c: int) -> bool:
-    return (b'A'[0] <= c and c <= b'Z'[0]) or \
-        (b'a'[0] <= c and c <= b'z'[0]) or \
-        (b'_'[0] == c)
-
-def isIdentifierMiddle(c: int) -> bool:
-    return isIdentifierStart(c) or isDigit(c)
-
-def isOperatorCharacter(c: int) -> bool:
-    return c >= 0 and c in b'+-/\\*~<>=@%|&?!^'
-
-def scanAdvanceKeyword(state: ScannerState) -> tuple[ScannerState, Token]:
-    if not isIdentifierStart(state.peek()):
-        return state, False
-    
-    initialState = copy.copy(state)
-    while isIdentifierMiddle(state.peek()):
-        state.advance()
-
-    if state.peek() != b':'[0]:
-        return initialState, False
-
-    state.advance()
-    return state, True
-
-def scanNextToken(state: ScannerState) -> tuple[ScannerState, Token]:
-    state, whiteErrorToken = skipWhite(state)
-    if whiteErrorToken is not None: return state, whiteErrorToken
-
-    if state.atEnd():
-        return state, state.makeToken(TokenKind.END_OF_SOURCE)
-    
-    initialState = copy.copy(state)
-    c = state.peek()
-
-    ## Identifiers, keywords and multi-keywords
-    if isIdentifierStart(c):
-        state.advance()
-        while isIdentifierMiddle(state.peek()):
-            state.advance()
-
-        if state.peek() == b':'[0]:
-            state.advance()
-            isMultiKeyword = False
-            hasAdvanced = True
-            while hasAdvanced:
-                state, hasAdvanced = scanAdvanceKeyword(state)
-                isMultiKeyword = isMultiKeyword or hasAdvanced
-
-            if isMultiKeyword:
-                return state, state.makeTokenStartingFrom(TokenKind.MULTI_KEYWORD, initialState)
-            else:
-                return state, state.makeTokenStartingFrom(TokenKind.KEYWORD, initialState)
-        
-        return state, state.makeTokenStartingFrom(TokenKind.IDENTIFIER, initialState)
-    
-    ## Numbers
-    if isDigit(c):
-        state.advance()
-        while isDigit(state.peek()):
-            state.advance()
-
-        ## Parse the radix.
-        if not state.atEnd() and state.peek() in b'rR':
-            state.advance()
-            while isIdentifierMiddle(state.peek()):
-                state.advance()
-            return state, state.makeTokenStartingFrom(TokenKind.NAT, initialState)
-        
-        ## Decimal point.
-        if state.peek() == b'.'[0] and isDigit(state.peek(1)):
-            state.advanceCount(2)
-            while isDigit(state.peek()):
-                state.advance()
-
-            if (state.peek() == b'e'[0] or state.peek() == b'E'[0]):
-                if isDigit(state.peek(1)) or ((state.peek(1) == b'+'[0] or state.peek(1) == b'-'[0]) and isDigit(state.peek(2))):
-                    state.advanceCount(2)
-                    while isDigit(state.peek()):
-                        state.advance()
-
-            return state, state.makeTokenStartingFrom(TokenKind.FLOAT, initialState)
-        
-        return state, state.makeTokenStartingFrom(TokenKind.NAT, initialState)
-
-    ## Symbols
-    if c == b'#'[0]:
-        c1 = state.peek(1)
-        if isIdentifierStart(c1):
-            state.advanceCount(2)
-            while isIdentifierMiddle(state.peek()):
-                state.advance()
-
-            if state.peek() == b':'[0]:
-                state.advance()
-                isMultiKeyword = False
-                hasAdvanced = True
-                while hasAdvanced:
-                    state, hasAdvanced = scanAdvanceKeyword(state)
-                    isMultiKeyword = isMultiKeyword or hasAdvanced
-
-                if isMultiKeyword:
-                    return state, state.makeTokenStartingFrom(TokenKind.SYMBOL, initialState)
-                else:
-                    return state, state.makeTokenStartingFrom(TokenKind.SYMBOL, initialState)
-            
-            return state, state.makeTokenStartingFrom(TokenKind.SYMBOL, initialState)
-
-        if isOperatorCharacter(c1):
-            state.advanceCount(2)
-            while isOperatorCharacter(state.peek()):
-                state.advance()
-            return state, state.makeTokenStartingFrom(TokenKind.SYMBOL, initialState)
-        elif c1 == b'"'[0]:
-            state.advanceCount(2)
-            while not state.atEnd() and state.peek() != b'"'[0]:
-                if state.peek() == b'\\'[0] and state.peek(1) >= 0:
-                    state.advanceCount(2)
-                else:
-                    state.advance()
-            if state.peek() != b'"'[0]:
-                return state, state.makeErrorTokenStartingFrom("Incomplete symbol string literal.", initialState)
-            state.advance()
-            return state, state.makeTokenStartingFrom(TokenKind.SYMBOL, initialState)
-
-        elif c1 == b'['[0]:
-            state.advanceCount(2)
-            return state, state.makeTokenStartingFrom(TokenKind.BYTE_ARRAY_START, initialState)
-        elif c1 == b'{'[0]:
-            state.advanceCount(2)
-            return state, state.makeTokenStartingFrom(TokenKind.DICTIONARY_START, initialState)
-        elif c1 == b'('[0]:
-            state.advanceCount(2)
-            return state, state.makeTokenStartingFrom(TokenKind.LITERAL_ARRAY_START, initialState)
-
-    ## Strings
-    if c == b'"'[0]:
-        state.advance()
-        while not state.atEnd() and state.peek() != b'"'[0]:
-            if state.peek() == b'\\'[0] and state.peek(1) >= 0:
-                state.advanceCount(2)
-            else:
-                state.advance()
-
-        if state.peek() != b'"'[0]:
-            return state, state.makeErrorTokenStartingFrom("Incomplete string literal.", initialState)
-        state.advance()
-
-        return state, state.makeTokenStartingFrom(TokenKind.STRING, initialState)
-
-    ## Characters
-    if c == b"'"[0]:
-        state.advance()
-        while not state.atEnd() and state.peek() != b"'"[0]:
-            if state.peek() == b'\\'[0] and state.peek(1) >= 0:
-                state.advanceCount(2)
-            else:
-                state.advance() 
-        if state.peek() != b"'"[0]:
-            return state, state.makeErrorTokenStartingFrom("Incomplete character literal.", initialState)
-        state.advance()
-
-        return state, state.makeTokenStartingFrom(TokenKind.CHARACTER, initialState)
-
-    if c == b'('[0]:
-        state.advance()
-        return state, state.makeTokenStartingFrom(TokenKind.LEFT_PARENT, initialState)
-    elif c == b')'[0]:
-        state.advance()
-        return state, state.makeTokenStartingFrom(TokenKind.RIGHT_PARENT, initialState)
-    elif c == b'['[0]:
-        state.advance()
-        return state, state.makeTokenStartingFrom(TokenKind.LEFT_BRACKET, initialState)
-    elif c == b']'[0]:
-        state.advance()
-        return state, state.makeTokenStartingFrom(TokenKind.RIGHT_BRACKET, initialState)
-    elif c == b'{'[0]:
-        state.advance()
-        return state, state.makeTokenStartingFrom(TokenKind.LEFT_CURLY_BRACKET, initialState)
-    elif c == b'}'[0]:
-        state.advance()
-        return state, state.makeTokenStartingFrom(TokenKind.RIGHT_CURLY_BRACKET, initialState)
-    elif c == b';'[0]:
-        state.advance()
-        return state, state.makeTokenStartingFrom(TokenKind.SEMICOLON, initialState)
-    elif c == b','[0]:
-        state.advance()
-        return state, state.makeTokenStartingFrom(TokenKind.COMMA, initialState)
-    elif c == b'.'[0]:
-        state.advance()
-        if state.peek(0) == b'.'[0] and state.peek(1) == b'.'[0]:
-            state.advanceCount(2)
-            return state, state.makeTokenStartingFrom(TokenKind.ELLIPSIS, initialState)
-        return state, state.makeTokenStartingFrom(TokenKind.DOT, initialState)
-    elif c == b':'[0]:
-        state.advance()
-        if state.peek(0) == b':'[0]:
-            state.advance()
-            return state, state.makeTokenStartingFrom(TokenKind.COLON_COLON, initialState)
-        elif state.peek(0) == b'='[0]:
-            state.advance()
-            return state, state.makeTokenStartingFrom(TokenKind.ASSIGNMENT, initialState)
-        return state, state.makeTokenStartingFrom(TokenKind.COLON, initialState)
-    elif c == b'`'[0]:
-        if state.peek(1) == b'\''[0]:
-            state.advanceCount(2)
-            return state, state.makeTokenStartingFrom(TokenKind.QUOTE, initialState)
-        elif state.peek(1) == b'`'[0]:
-            state.advanceCount(2)
-            return state, state.makeTokenStartingFrom(TokenKind.QUASI_QUOTE, initialState)
-        elif state.peek(1) == b','[0]:
-            state.advanceCount(2)
-            return state, state.makeTokenStartingFrom(TokenKind.QUASI_UNQUOTE, initialState)
-        elif state.peek(1) == b'@'[0]:
-            state.advanceCount(2)
-            return state, state.makeTokenStartingFrom(TokenKind.SPLICE, initialState)
-    elif c == b'|'[0]:
-        state.advance()
-        if isOperatorCharacter(state.peek()):
-            while isOperatorCharacter(state.peek()):
-                state.advance()
-            return state, state.makeTokenStartingFrom(TokenKind.OPERATOR, initialState)
-        return state, state.makeTokenStartingFrom(TokenKind.BAR, initialState)
-    elif isOperatorCharacter(c):
-        while isOperatorCharacter(state.peek()):
-            state.advance()
-        token = state.makeTokenStartingFrom(TokenKind.OPERATOR, initialState)
-        tokenValue = token.getValue()
-        if tokenValue == b'<':
-            token.kind = TokenKind.LESS_THAN
-        elif tokenValue == b'>':
-            token.kind = TokenKind.GREATER_THAN
-        elif tokenValue == b'*':
-            token.kind = TokenKind.STAR
-        elif tokenValue == b'?':
-            token.kind = TokenKind.QUESTION
-        elif tokenValue == b'!':
-            token.kind = TokenKind.BANG
-        elif tokenValue == b'<-':
-            token.kind = TokenKind.BIND_OPERATOR
-        return state, token
-
-    state.advance()
-    errorToken = state.makeErrorTokenStartingFrom("Unexpected character.", initialState)
-    return state, errorToken
-
-def scanSourceCode(sourceCode: SourceCode) -> list[Token]:
-    state = ScannerState(sourceCode)
-    tokens = []
-    while True:
-        state, token = scanNextToken(state)
-        tokens.append(token)
-        if token.kind == TokenKind.END_OF_SOURCE:
-            break
+        self.kinds = array('H')
+        self.startIndices = array('I')
+        self.endIndices = array('I')
+        self.errorMessages = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index: int) -> Token:
+        if index < 0:
+            index += len(self.kinds)
+        return Token(TokenKind(self.kinds[index]), self.sourcePositionAt(index), self.errorMessages.get(index, None))
+
+    def __iter__(self):
+        for i in range(len(self.kinds)):
+            yield self[i]
+
+    def append(self, kind: TokenKind, startIndex: int, endIndex: int, errorMessage: str = None) -> None:
+        if errorMessage is not None:
+            self.errorMessages[len(self.kinds)] = errorMessage
+        self.kinds.append(kind)
+        self.startIndices.append(startIndex)
+        self.endIndices.append(endIndex)
+
+    def kindAt(self, index: int) -> TokenKind:
+        return TokenKind(self.kinds[index])
+
+    def errorMessageAt(self, index: int) -> str | None:
+        return self.errorMessages.get(index, None)
+
+    def sourcePositionAt(self, index: int) -> SourcePosition:
+        return SourcePosition(self.sourceCode, self.startIndices[index], self.endIndices[index])
+
+    def sourcePositionFromTo(self, startIndex: int, endIndex: int) -> SourcePosition:
+        return SourcePosition(self.sourceCode, self.startIndices[startIndex], self.endIndices[endIndex])
+
+    def sourcePositionFromUntil(self, startIndex: int, endIndex: int) -> SourcePosition:
+        return SourcePosition(self.sourceCode, self.startIndices[startIndex], self.startIndices[endIndex])
+
+    def getValueAt(self, index: int) -> bytes:
+        return self.sourceCode.text[self.startIndices[index] : self.endIndices[index]]
+
+    def getStringValueAt(self, index: int) -> str:
+        return self.getValueAt(index).decode('utf-8')
+
+IdentifierStartCharacters = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_'
+DigitCharacters = b'0123456789'
+OperatorCharacters = b'+-/\\*~<>=@%|&?!^'
+
+WhitePattern = re.compile(rb'(?:[\x00- ]+|##[^\r\n]*|#\*.*?\*#)*', re.DOTALL)
+IdentifierPattern = re.compile(rb'[A-Za-z_][A-Za-z0-9_]*(?::(?:[A-Za-z_][A-Za-z0-9_]*:)*)?')
+NumberPattern = re.compile(rb'[0-9]+(?:[rR][A-Za-z0-9_]*|(\.[0-9]+(?:[eE][+-]?[0-9]+)?))?')
+OperatorPattern = re.compile(rb'[-+/\\*~<>=@%|&?!^]+')
+StringPattern = re.compile(rb'"(?:[^"\\]|\\.)*"', re.DOTALL)
+CharacterPattern = re.compile(rb"'(?:[^'\\]|\\.)*'", re.DOTALL)
+SymbolIdentifierPattern = re.compile(rb'#[A-Za-z_][A-Za-z0-9_]*(?::(?:[A-Za-z_][A-Za-z0-9_]*:)*)?')
+SymbolOperatorPattern = re.compile(rb'#[-+/\\*~<>=@%|&?!^]+')
+SymbolStringPattern = re.compile(rb'#"(?:[^"\\]|\\.)*"', re.DOTALL)
+
+SpecialOperatorKinds = {
+    b'<': TokenKind.LESS_THAN,
+    b'>': TokenKind.GREATER_THAN,
+    b'*': TokenKind.STAR,
+    b'?': TokenKind.QUESTION,
+    b'!': TokenKind.BANG,
+    b'<-': TokenKind.BIND_OPERATOR,
+}
+
+def makeCharacterClassTable(characters: bytes) -> tuple[bool]:
+    return tuple(c in characters for c in range(256))
+
+IdentifierStartTable = makeCharacterClassTable(IdentifierStartCharacters)
+OperatorCharacterTable = makeCharacterClassTable(OperatorCharacters)
+WhiteOrCommentStartTable = makeCharacterClassTable(bytes(range(b' '[0] + 1)) + b'#')
+
+## Each token scanning function receives the source text and the start position, and it returns the token kind, its end position and an optional error message.
+def scanUnexpectedCharacter(text: bytes, position: int) -> tuple[TokenKind, int, str | None]:
+    return TokenKind.ERROR, position + 1, 'Unexpected character.'
+
+def scanIdentifierOrKeyword(text: bytes, position: int) -> tuple[TokenKind, int, str | None]:
+    endPosition = IdentifierPattern.match(text, position).end()
+    colonCount = text.count(b':', position, endPosition)
+    if colonCount == 0:
+        return TokenKind.IDENTIFIER, endPosition, None
+    elif colonCount == 1:
+        return TokenKind.KEYWORD, endPosition, None
+    else:
+        return TokenKind.MULTI_KEYWORD, endPosition, None
+
+def scanNumber(text: bytes, position: int) -> tuple[TokenKind, int, str | None]:
+    match = NumberPattern.match(text, position)
+    if match.group(1) is not None:
+        return TokenKind.FLOAT, match.end(), None
+    return TokenKind.NAT, match.end(), None
+
+def scanDelimitedLiteral(pattern: re.Pattern, kind: TokenKind, errorMessage: str):
+    def scanFunction(text: bytes, position: int) -> tuple[TokenKind, int, str | None]:
+        match = pattern.match(text, position)
+        if match is None:
+            return TokenKind.ERROR, len(text), errorMessage
+        return kind, match.end(), None
+    return scanFunction
+
+scanString = scanDelimitedLiteral(StringPattern, TokenKind.STRING, 'Incomplete string literal.')
+scanCharacter = scanDelimitedLiteral(CharacterPattern, TokenKind.CHARACTER, 'Incomplete character literal.')
+scanSymbolString = scanDelimitedLiteral(SymbolStringPattern, TokenKind.SYMBOL, 'Incomplete symbol string literal.')
+
+def scanSymbolOrHashPrefixed(text: bytes, position: int) -> tuple[TokenKind, int, str | None]:
+    c1 = text[position + 1] if position + 1 < len(text) else -1
+    if c1 < 0:
+        return scanUnexpectedCharacter(text, position)
+    elif IdentifierStartTable[c1]:
+        return TokenKind.SYMBOL, SymbolIdentifierPattern.match(text, position).end(), None
+    elif OperatorCharacterTable[c1]:
+        return TokenKind.SYMBOL, SymbolOperatorPattern.match(text, position).end(), None
+    elif c1 == b'"'[0]:
+        return scanSymbolString(text, position)
+    elif c1 == b'['[0]:
+        return TokenKind.BYTE_ARRAY_START, position + 2, None
+    elif c1 == b'{'[0]:
+        return TokenKind.DICTIONARY_START, position + 2, None
+    elif c1 == b'('[0]:
+        return TokenKind.LITERAL_ARRAY_START, position + 2, None
+    return scanUnexpectedCharacter(text, position)
+
+def scanSingleCharacterToken(kind: TokenKind):
+    def scanFunction(text: bytes, position: int) -> tuple[TokenKind, int, str | None]:
+        return kind, position + 1, None
+    return scanFunction
+
+def scanDotOrEllipsis(text: bytes, position: int) -> tuple[TokenKind, int, str | None]:
+    if text.startswith(b'...', position):
+        return TokenKind.ELLIPSIS, position + 3, None
+    return TokenKind.DOT, position + 1, None
+
+def scanColonPrefixed(text: bytes, position: int) -> tuple[TokenKind, int, str | None]:
+    if text.startswith(b'::', position):
+        return TokenKind.COLON_COLON, position + 2, None
+    elif text.startswith(b':=', position):
+        return TokenKind.ASSIGNMENT, position + 2, None
+    return TokenKind.COLON, position + 1, None
+
+QuotePrefixedKinds = {
+    b"'"[0]: TokenKind.QUOTE,
+    b'`'[0]: TokenKind.QUASI_QUOTE,
+    b','[0]: TokenKind.QUASI_UNQUOTE,
+    b'@'[0]: TokenKind.SPLICE,
+}
+
+def scanQuotePrefixed(text: bytes, position: int) -> tuple[TokenKind, int, str | None]:
+    kind = QuotePrefixedKinds.get(text[position + 1] if position + 1 < len(text) else -1, None)
+    if kind is None:
+        return scanUnexpectedCharacter(text, position)
+    return kind, position + 2, None
+
+def scanBarOrOperator(text: bytes, position: int) -> tuple[TokenKind, int, str | None]:
+    endPosition = OperatorPattern.match(text, position).end()
+    if endPosition == position + 1:
+        return TokenKind.BAR, endPosition, None
+    return TokenKind.OPERATOR, endPosition, None
+
+def scanOperator(text: bytes, position: int) -> tuple[TokenKind, int, str | None]:
+    endPosition = OperatorPattern.match(text, position).end()
+    return SpecialOperatorKinds.get(text[position:endPosition], TokenKind.OPERATOR), endPosition, None
+
+def makeTokenScanFunctionTable() -> list:
+    table = [scanUnexpectedCharacter] * 256
+    for c in OperatorCharacters:
+        table[c] = scanOperator
+    for c in IdentifierStartCharacters:
+        table[c] = scanIdentifierOrKeyword
+    for c in DigitCharacters:
+        table[c] = scanNumber
+
+    for c, kind in [
+            (b'(', TokenKind.LEFT_PARENT), (b')', TokenKind.RIGHT_PARENT),
+            (b'[', TokenKind.LEFT_BRACKET), (b']', TokenKind.RIGHT_BRACKET),
+            (b'{', TokenKind.LEFT_CURLY_BRACKET), (b'}', TokenKind.RIGHT_CURLY_BRACKET),
+            (b';', TokenKind.SEMICOLON), (b',', TokenKind.COMMA)]:
+        table[c[0]] = scanSingleCharacterToken(kind)
+
+    table[b'#'[0]] = scanSymbolOrHashPrefixed
+    table[b'"'[0]] = scanString
+    table[b"'"[0]] = scanCharacter
+    table[b'.'[0]] = scanDotOrEllipsis
+    table[b':'[0]] = scanColonPrefixed
+    table[b'`'[0]] = scanQuotePrefixed
+    table[b'|'[0]] = scanBarOrOperator
+    return table
+
+TokenScanFunctionTable = makeTokenScanFunctionTable()
+
+def scanSourceCode(sourceCode: SourceCode) -> TokenBuffer:
+    text = sourceCode.text
+    textSize = len(text)
+    scanFunctionTable = TokenScanFunctionTable
+    whiteStartTable = WhiteOrCommentStartTable
+    whiteMatch = WhitePattern.match
+    tokens = TokenBuffer(sourceCode)
+    appendKind = tokens.kinds.append
+    appendStartIndex = tokens.startIndices.append
+    appendEndIndex = tokens.endIndices.append
+    position = 0
+    while position < textSize:
+        c = text[position]
+        if whiteStartTable[c]:
+            position = whiteMatch(text, position).end()
+            if position >= textSize:
+                break
+
+            if text.startswith(b'#*', position):
+                tokens.append(TokenKind.ERROR, position, textSize, 'Incomplete multiline comment.')
+                position = textSize
+                break
+            c = text[position]
+
+        kind, endPosition, errorMessage = scanFunctionTable[c](text, position)
+        if errorMessage is not None:
+            tokens.errorMessages[len(tokens.kinds)] = errorMessage
+        appendKind(kind)
+        appendStartIndex(position)
+        appendEndIndex(endPosition)
+        position = endPosition
+
+    tokens.append(TokenKind.END_OF_SOURCE, position, position)
     return tokens
 
-def scanSourceString(sourceText: str, sourceName: str = '<string>') -> tuple[SourceCode, list[Token]]:
+def scanNextToken(text: bytes, position: int) -> tuple[TokenKind, int, int, str | None]:
+    if position < len(text) and WhiteOrCommentStartTable[text[position]]:
+        position = WhitePattern.match(text, position).end()
+    if position >= len(text):
+        return TokenKind.END_OF_SOURCE, position, position, None
+    if text.startswith(b'#*', position):
+        return TokenKind.ERROR, position, len(text), 'Incomplete multiline comment.'
+
+    kind, endPosition, errorMessage = TokenScanFunctionTable[text[position]](text, position)
+    return kind, position, endPosition, errorMessage
+
+def rescanSourceCodeWithEdit(tokens: TokenBuffer, editStartIndex: int, oldEditEndIndex: int, newEditEndIndex: int) -> tuple[TokenBuffer, int, int, int]:
+    ## The source code of the token buffer must already contain the edited text. The result is the new token buffer,
+    ## the index of the first rescanned token, and the end of the replaced token range in the old and in the new buffer.
+    sourceCode = tokens.sourceCode
+    text = sourceCode.text
+    delta = newEditEndIndex - oldEditEndIndex
+    oldTokenCount = len(tokens)
+
+    ## Rescan from the end of the last token whose extent cannot depend on the edited text.
+    ## The scanner lookahead never crosses white space, so it is enough to skip back over adjacent tokens.
+    firstRescannedIndex = bisect.bisect_left(tokens.endIndices, editStartIndex, 0, oldTokenCount - 1)
+    while firstRescannedIndex > 0 and tokens.endIndices[firstRescannedIndex - 1] == tokens.startIndices[firstRescannedIndex]:
+        firstRescannedIndex -= 1
+    position = tokens.endIndices[firstRescannedIndex - 1] if firstRescannedIndex > 0 else 0
+
+    def findResynchronizationIndex(newPosition: int) -> int | None:
+        oldPosition = newPosition - delta
+        if newPosition < newEditEndIndex or oldPosition < oldEditEndIndex:
+            return None
+        oldIndex = bisect.bisect_left(tokens.endIndices, oldPosition, firstRescannedIndex, oldTokenCount - 1)
+        if oldIndex < oldTokenCount - 1 and tokens.endIndices[oldIndex] == oldPosition:
+            return oldIndex + 1
+        return None
+
+    rescannedTokens = TokenBuffer(sourceCode)
+    oldResumeIndex = None
+    while oldResumeIndex is None:
+        kind, startIndex, endIndex, errorMessage = scanNextToken(text, position)
+        rescannedTokens.append(kind, startIndex, endIndex, errorMessage)
+        if kind == TokenKind.END_OF_SOURCE:
+            oldResumeIndex = oldTokenCount
+            break
+
+        position = endIndex
+        oldResumeIndex = findResynchronizationIndex(position)
+
+    newResumeIndex = firstRescannedIndex + len(rescannedTokens)
+    result = TokenBuffer(sourceCode)
+    result.kinds = tokens.kinds[:firstRescannedIndex] + rescannedTokens.kinds + tokens.kinds[oldResumeIndex:]
+    result.startIndices = tokens.startIndices[:firstRescannedIndex] + rescannedTokens.startIndices + array('I', map(delta.__add__, tokens.startIndices[oldResumeIndex:]))
+    result.endIndices = tokens.endIndices[:firstRescannedIndex] + rescannedTokens.endIndices + array('I', map(delta.__add__, tokens.endIndices[oldResumeIndex:]))
+    for index, errorMessage in tokens.errorMessages.items():
+        if index < firstRescannedIndex:
+            result.errorMessages[index] = errorMessage
+        elif index >= oldResumeIndex:
+            result.errorMessages[index - oldResumeIndex + newResumeIndex] = errorMessage
+    for index, errorMessage in rescannedTokens.errorMessages.items():
+        result.errorMessages[firstRescannedIndex + index] = errorMessage
+
+    return result, firstRescannedIndex, oldResumeIndex, newResumeIndex
+
+def scanSourceString(sourceText: str, sourceName: str = '<string>') -> tuple[SourceCode, TokenBuffer]:
     sourceCode = SourceCode(None, sourceName, 'sysmel', sourceText.encode('utf-8'))
     tokens = scanSourceCode(sourceCode)
     return sourceCode, tokens
 
-def scanFileNamed(fileName: str) -> tuple[SourceCode, list[Token]]:
+def readSourceCodeFileNamed(fileName: str) -> SourceCode:
     with open(fileName, "rb") as f:
         sourceText = f.read()
         sourceDirectory = os.path.dirname(fileName)
         sourceName = os.path.basename(fileName)
-        sourceCode = SourceCode(sourceDirectory, sourceName, 'smalltalk', sourceText)
-        tokens = scanSourceCode(sourceCode)
-        return sourceCode, tokens
\ No newline at end of file
+        return SourceCode(sourceDirectory, sourceName, 'smalltalk', sourceText)
+
+def scanFileNamed(fileName: str) -> tuple[SourceCode, TokenBuffer]:
+    sourceCode = readSourceCodeFileNamed(fileName)
+    tokens = scanSourceCode(sourceCode)
+    return sourceCode, tokens
@@ -74,5 +74,19 @@ class TestScanner(unittest.TestCase):
         self.assertEqual(self.scanTokenKinds("+"), [TokenKind.OPERATOR, TokenKind.END_OF_SOURCE])
         self.assertEqual(self.scanTokenKinds("-"), [TokenKind.OPERATOR, TokenKind.END_OF_SOURCE])
 
+    def testTokenBuffer(self):
+        sourceCode, tokens = scanSourceString('a: 42')
+        self.assertEqual(list(tokens.kinds), [TokenKind.KEYWORD, TokenKind.NAT, TokenKind.END_OF_SOURCE])
+        self.assertEqual(tokens.getStringValueAt(0), 'a:')
+        self.assertEqual(tokens[1].getValue(), b'42')
+        self.assertEqual(tokens[-1].kind, TokenKind.END_OF_SOURCE)
+
+    def testSourcePositionLineAndColumn(self):
+        sourceCode, tokens = scanSourceString('first\r\n  second\n\nthird')
+        self.assertEqual(list(map(lambda t: t.kind, tokens)), [TokenKind.IDENTIFIER, TokenKind.IDENTIFIER, TokenKind.IDENTIFIER, TokenKind.END_OF_SOURCE])
+        self.assertEqual(str(tokens[0].sourcePosition), '<string>:1.1-1.6')
+        self.assertEqual(str(tokens[1].sourcePosition), '<string>:2.3-2.9')
+        self.assertEqual(str(tokens[2].sourcePosition), '<string>:4.1-4.6')
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,382 @@
+from .mop import *
+from .environment import ASGTopLevelTargetEnvironment
+from .parsetree import SourceCode, SourcePosition
+import array
+import marshal
+import struct
+import sys
+
+def asgGraphFourCC(cc):
+    assert len(cc) == 4
+    return ord(cc[0]) | (ord(cc[1]) << 8) | (ord(cc[2]) << 16) | (ord(cc[3]) << 24)
+
+ASGGraphMagic = asgGraphFourCC('ASGG')
+ASGGraphVersion = 1
+ASGGraphHeaderFormat = '<IIIIII'
+ASGGraphHeaderSize = struct.calcsize(ASGGraphHeaderFormat)
+
+## The node records start with their kind index, or with this marker for the values referenced by name.
+ASGGraphExternalNodeRecord = -1
+
+## Tags of the attribute values in the code stream.
+ASGGraphValueNone = 0
+ASGGraphValueConstant = 1
+ASGGraphValueNode = 2
+ASGGraphValueNodes = 3
+ASGGraphValueExternal = 4
+ASGGraphValueDerivations = 5
+ASGGraphValueNoDerivation = 6
+ASGGraphValueSourceCodeDerivation = 7
+ASGGraphValueExpansionDerivation = 8
+ASGGraphValueMacroExpansionDerivation = 9
+ASGGraphValueUnificationDerivation = 10
+ASGGraphValueDerivationReference = 11
+
+ASGGraphConstantTypes = (bool, int, float, str, bytes)
+
+## The code stream is stored with the narrowest signed integer type that can hold all of its values.
+ASGGraphCodeTypeCodes = ('h', 'i', 'q')
+
+def asgGraphCodeTypeCodeFor(codes) -> str:
+    if len(codes) == 0:
+        return ASGGraphCodeTypeCodes[0]
+
+    largestValue = max(max(codes), -min(codes))
+    for typeCode in ASGGraphCodeTypeCodes:
+        if largestValue < 1 << (array.array(typeCode).itemsize * 8 - 1):
+            return typeCode
+    return ASGGraphCodeTypeCodes[-1]
+
+class ASGGraphUnsupportedValue(Exception):
+    pass
+
+def isASGGraphConstant(value) -> bool:
+    if type(value) in ASGGraphConstantTypes:
+        return True
+    return type(value) is tuple and all(isASGGraphConstant(element) for element in value)
+
+def derivationNodesOf(derivation):
+    if isinstance(derivation, ASGNodeMacroExpansionDerivation):
+        return (derivation.sourceNode, derivation.macro)
+    elif isinstance(derivation, ASGNodeExpansionDerivation):
+        return (derivation.sourceNode,)
+    elif isinstance(derivation, ASGNodeUnificationDerivation):
+        return (derivation.originalNode, derivation.unifiedNode)
+    return ()
+
+class ASGGraphEncoder:
+    ## Nodes are emitted in post-order. The top-level environment values are referenced by stable name, and the
+    ## transient expansion algorithms of the derivations are not preserved.
+    def __init__(self, topLevelEnvironment: ASGTopLevelTargetEnvironment = None) -> None:
+        self.externalNames = {}
+        if topLevelEnvironment is not None:
+            for name, value in topLevelEnvironment.getStableValueNames().items():
+                self.externalNames[value] = name
+
+        self.kindIndices = {}
+        self.kindNames = []
+        self.derivationKindIndices = {}
+        self.derivationKindNames = []
+        self.derivationIndices = {}
+        self.constantIndices = {}
+        self.constants = []
+        self.externalNameIndices = {}
+        self.externalNameList = []
+        self.sourceCodeIndices = {}
+        self.sourceCodes = []
+        self.nodeIndices = {}
+        self.visitedNodes = set()
+        self.codes = array.array('q')
+
+    def encodeGraph(self, rootNodes) -> bytes:
+        for rootNode in rootNodes:
+            self.encodeNodeAndDependencies(rootNode)
+        for rootNode in rootNodes:
+            self.codes.append(self.nodeIndices[rootNode])
+
+        codes = array.array(asgGraphCodeTypeCodeFor(self.codes), self.codes)
+        if sys.byteorder != 'little':
+            codes.byteswap()
+
+        tables = marshal.dumps((self.kindNames, self.derivationKindNames, self.constants, self.externalNameList, self.sourceCodes))
+        return struct.pack(ASGGraphHeaderFormat, ASGGraphMagic, ASGGraphVersion, len(tables), len(codes), codes.itemsize, len(rootNodes)) + tables + codes.tobytes()
+
+    def dependenciesOf(self, node: ASGNode):
+        if node in self.externalNames:
+            return
+
+        for attribute in node.__class__.__asgConstructionAttributes__:
+            value = attribute.loadValueFrom(node)
+            if isinstance(value, ASGNode):
+                yield value
+            elif isinstance(value, tuple):
+                for element in value:
+                    if isinstance(element, ASGNode):
+                        yield element
+            elif isinstance(value, ASGNodeDerivation):
+                for derivationNode in derivationNodesOf(value):
+                    yield derivationNode
+
+            if isinstance(attribute, ASGNodeConstructionAttributeWithSourceDerivation):
+                derivation = attribute.loadSourceDerivationFrom(node)
+                if isinstance(derivation, tuple):
+                    for elementDerivation in derivation:
+                        for derivationNode in derivationNodesOf(elementDerivation):
+                            yield derivationNode
+                else:
+                    for derivationNode in derivationNodesOf(derivation):
+                        yield derivationNode
+
+    def encodeNodeAndDependencies(self, rootNode: ASGNode):
+        asgDepthFirstPostOrderDo(rootNode, self.dependenciesOf, self.encodeNode, self.visitedNodes)
+
+    def encodeNode(self, node: ASGNode):
+        codes = self.codes
+        externalName = self.externalNames.get(node, None)
+        if externalName is not None:
+            codes.append(ASGGraphExternalNodeRecord)
+            codes.append(self.externalNameIndexOf(externalName))
+        else:
+            nodeClass = node.__class__
+            kindIndex = self.kindIndices.get(nodeClass, None)
+            if kindIndex is None:
+                kindIndex = len(self.kindNames)
+                self.kindIndices[nodeClass] = kindIndex
+                self.kindNames.append((nodeClass.__module__, nodeClass.__qualname__))
+
+            codes.append(kindIndex)
+            for attribute in nodeClass.__asgConstructionAttributes__:
+                self.encodeValue(attribute.loadValueFrom(node))
+                if isinstance(attribute, ASGNodeConstructionAttributeWithSourceDerivation):
+                    self.encodeSourceDerivation(attribute.loadSourceDerivationFrom(node))
+
+        self.nodeIndices[node] = len(self.nodeIndices)
+
+    def externalNameIndexOf(self, name: str) -> int:
+        index = self.externalNameIndices.get(name, None)
+        if index is None:
+            index = len(self.externalNameList)
+            self.externalNameIndices[name] = index
+            self.externalNameList.append(name)
+        return index
+
+    def encodeValue(self, value):
+        codes = self.codes
+        if value is None:
+            codes.append(ASGGraphValueNone)
+        elif isinstance(value, ASGNode):
+            codes.append(ASGGraphValueNode)
+            codes.append(self.nodeIndices[value])
+        elif isinstance(value, ASGNodeDerivation):
+            self.encodeDerivation(value)
+        elif isASGGraphConstant(value):
+            self.encodeConstant(value)
+        elif isinstance(value, tuple):
+            if all(isinstance(element, ASGNode) for element in value):
+                codes.append(ASGGraphValueNodes)
+                codes.append(len(value))
+                for element in value:
+                    codes.append(self.nodeIndices[element])
+            else:
+                raise ASGGraphUnsupportedValue(value)
+        else:
+            externalName = self.externalNames.get(value, None)
+            if externalName is None:
+                raise ASGGraphUnsupportedValue(value)
+            codes.append(ASGGraphValueExternal)
+            codes.append(self.externalNameIndexOf(externalName))
+
+    def encodeSourceDerivation(self, sourceDerivation):
+        if sourceDerivation is None:
+            self.codes.append(ASGGraphValueNone)
+        elif isinstance(sourceDerivation, tuple):
+            self.codes.append(ASGGraphValueDerivations)
+            self.codes.append(len(sourceDerivation))
+            for elementDerivation in sourceDerivation:
+                self.encodeDerivation(elementDerivation)
+        else:
+            self.encodeDerivation(sourceDerivation)
+
+    def encodeConstant(self, value):
+        ## The representation distinguishes between equal constants of different types, such as 1 and True.
+        key = (type(value), repr(value))
+        index = self.constantIndices.get(key, None)
+        if index is None:
+            index = len(self.constants)
+            self.constantIndices[key] = index
+            self.constants.append(value)
+        self.codes.append(ASGGraphValueConstant)
+        self.codes.append(index)
+
+    def encodeDerivation(self, derivation: ASGNodeDerivation):
+        codes = self.codes
+        derivationClass = derivation.__class__
+        if derivationClass is ASGNodeNoDerivation:
+            codes.append(ASGGraphValueNoDerivation)
+            return
+
+        ## The derivations are shared between a node and the ports that use it, so they are encoded once and referenced by index.
+        derivationIndex = self.derivationIndices.get(derivation, None)
+        if derivationIndex is not None:
+            codes.append(ASGGraphValueDerivationReference)
+            codes.append(derivationIndex)
+            return
+
+        if derivationClass is ASGNodeSourceCodeDerivation:
+            sourcePosition = derivation.sourcePosition
+            if not isinstance(sourcePosition, SourcePosition):
+                raise ASGGraphUnsupportedValue(derivation)
+            codes.append(ASGGraphValueSourceCodeDerivation)
+            codes.append(self.sourceCodeIndexOf(sourcePosition.sourceCode))
+            codes.append(sourcePosition.startIndex)
+            codes.append(sourcePosition.endIndex)
+        elif derivationClass is ASGNodeMacroExpansionDerivation:
+            codes.append(ASGGraphValueMacroExpansionDerivation)
+            codes.append(self.nodeIndices[derivation.sourceNode])
+            codes.append(self.nodeIndices[derivation.macro])
+        elif derivationClass is ASGNodeUnificationDerivation:
+            codes.append(ASGGraphValueUnificationDerivation)
+            codes.append(self.nodeIndices[derivation.originalNode])
+            codes.append(self.nodeIndices[derivation.unifiedNode])
+        elif isinstance(derivation, ASGNodeExpansionDerivation):
+            derivationKindIndex = self.derivationKindIndices.get(derivationClass, None)
+            if derivationKindIndex is None:
+                derivationKindIndex = len(self.derivationKindNames)
+                self.derivationKindIndices[derivationClass] = derivationKindIndex
+                self.derivationKindNames.append((derivationClass.__module__, derivationClass.__qualname__))
+            codes.append(ASGGraphValueExpansionDerivation)
+            codes.append(derivationKindIndex)
+            codes.append(self.nodeIndices[derivation.sourceNode])
+        else:
+            raise ASGGraphUnsupportedValue(derivation)
+        self.derivationIndices[derivation] = len(self.derivationIndices)
+
+    def sourceCodeIndexOf(self, sourceCode: SourceCode) -> int:
+        index = self.sourceCodeIndices.get(sourceCode, None)
+        if index is None:
+            index = len(self.sourceCodes)
+            self.sourceCodeIndices[sourceCode] = index
+            self.sourceCodes.append((sourceCode.directory, sourceCode.name, sourceCode.language, sourceCode.text))
+        return index
+
+class ASGGraphDecoder:
+    def __init__(self, topLevelEnvironment: ASGTopLevelTargetEnvironment = None) -> None:
+        self.stableValueNames = {}
+        if topLevelEnvironment is not None:
+            self.stableValueNames = topLevelEnvironment.getStableValueNames()
+
+    def decodeGraph(self, data: bytes) -> list[ASGNode]:
+        magic, version, tablesSize, codeCount, codeItemSize, rootCount = struct.unpack_from(ASGGraphHeaderFormat, data)
+        if magic != ASGGraphMagic or version != ASGGraphVersion:
+            raise ValueError('Unsupported ASG graph encoding.')
+
+        kindNames, derivationKindNames, constants, externalNames, sourceCodeDescriptions = marshal.loads(data[ASGGraphHeaderSize:ASGGraphHeaderSize + tablesSize])
+        kinds = [getattr(sys.modules[moduleName], className) for moduleName, className in kindNames]
+        derivationKinds = [getattr(sys.modules[moduleName], className) for moduleName, className in derivationKindNames]
+        externalValues = [self.stableValueNames[name] for name in externalNames]
+        sourceCodes = [SourceCode(*description) for description in sourceCodeDescriptions]
+        codeTypeCodes = [typeCode for typeCode in ASGGraphCodeTypeCodes if array.array(typeCode).itemsize == codeItemSize]
+        if len(codeTypeCodes) == 0:
+            raise ValueError('Unsupported ASG graph encoding.')
+        codes = array.array(codeTypeCodes[0])
+        codes.frombytes(data[ASGGraphHeaderSize + tablesSize:])
+        if sys.byteorder != 'little':
+            codes.byteswap()
+        if len(codes) != codeCount:
+            raise ValueError('Truncated ASG graph encoding.')
+
+        ## The attributes that carry a source derivation are followed by it in the attribute table.
+        kindAttributes = [[(attribute, isinstance(attribute, ASGNodeConstructionAttributeWithSourceDerivation)) for attribute in kind.__asgConstructionAttributes__] for kind in kinds]
+
+        nodes = []
+        derivations = []
+        def decodeDerivation(i):
+            tag = codes[i]
+            if tag == ASGGraphValueDerivationReference:
+                return derivations[codes[i + 1]], i + 2
+            elif tag == ASGGraphValueNoDerivation:
+                return ASGNodeNoDerivation.getSingleton(), i + 1
+            elif tag == ASGGraphValueNone:
+                return None, i + 1
+            elif tag == ASGGraphValueSourceCodeDerivation:
+                derivation = ASGNodeSourceCodeDerivation(SourcePosition(sourceCodes[codes[i + 1]], codes[i + 2], codes[i + 3]))
+                i += 4
+            elif tag == ASGGraphValueExpansionDerivation:
+                derivation = derivationKinds[codes[i + 1]](None, nodes[codes[i + 2]])
+                i += 3
+            elif tag == ASGGraphValueUnificationDerivation:
+                derivation = ASGNodeUnificationDerivation(nodes[codes[i + 1]], nodes[codes[i + 2]])
+                i += 3
+            elif tag == ASGGraphValueMacroExpansionDerivation:
+                derivation = ASGNodeMacroExpansionDerivation(None, nodes[codes[i + 1]], nodes[codes[i + 2]])
+                i += 3
+            else:
+                raise ValueError('Invalid ASG graph derivation tag.')
+
+            derivations.append(derivation)
+            return derivation, i
+
+        nodeCodeCount = codeCount - rootCount
+        i = 0
+        while i < nodeCodeCount:
+            kindIndex = codes[i]
+            if kindIndex == ASGGraphExternalNodeRecord:
+                nodes.append(externalValues[codes[i + 1]])
+                i += 2
+                continue
+
+            i += 1
+            arguments = []
+            sourceDerivations = []
+            for attribute, hasSourceDerivation in kindAttributes[kindIndex]:
+                ## The common values are decoded inline.
+                tag = codes[i]
+                if tag == ASGGraphValueNode:
+                    arguments.append(nodes[codes[i + 1]])
+                    i += 2
+                elif tag == ASGGraphValueConstant:
+                    arguments.append(constants[codes[i + 1]])
+                    i += 2
+                elif tag == ASGGraphValueNone:
+                    arguments.append(None)
+                    i += 1
+                elif tag == ASGGraphValueNodes:
+                    elementCount = codes[i + 1]
+                    arguments.append(tuple([nodes[nodeIndex] for nodeIndex in codes[i + 2:i + 2 + elementCount]]))
+                    i += 2 + elementCount
+                elif tag == ASGGraphValueExternal:
+                    arguments.append(externalValues[codes[i + 1]])
+                    i += 2
+                else:
+                    value, i = decodeDerivation(i)
+                    arguments.append(value)
+
+                if hasSourceDerivation:
+                    tag = codes[i]
+                    if tag == ASGGraphValueDerivationReference:
+                        sourceDerivations.append((attribute, derivations[codes[i + 1]]))
+                        i += 2
+                    elif tag == ASGGraphValueDerivations:
+                        elementCount = codes[i + 1]
+                        i += 2
+                        elementDerivations = []
+                        for elementIndex in range(elementCount):
+                            elementDerivation, i = decodeDerivation(i)
+                            elementDerivations.append(elementDerivation)
+                        sourceDerivations.append((attribute, tuple(elementDerivations)))
+                    else:
+                        sourceDerivation, i = decodeDerivation(i)
+                        sourceDerivations.append((attribute, sourceDerivation))
+
+            node = kinds[kindIndex](*arguments)
+            for attribute, sourceDerivation in sourceDerivations:
+                attribute.storeSourceDerivationIn(sourceDerivation, node)
+            nodes.append(node)
+
+        return [nodes[nodeIndex] for nodeIndex in codes[nodeCodeCount:]]
+
+def encodeASGGraph(rootNodes, topLevelEnvironment: ASGTopLevelTargetEnvironment = None) -> bytes:
+    return ASGGraphEncoder(topLevelEnvironment).encodeGraph(rootNodes)
+
+def decodeASGGraph(data: bytes, topLevelEnvironment: ASGTopLevelTargetEnvironment = None) -> list[ASGNode]:
+    return ASGGraphDecoder(topLevelEnvironment).decodeGraph(data)
@@ -0,0 +1,31 @@
+from .serialization import *
+from .testSupport import expandAndTypecheckSourceString
+from .asg import ASGLiteralPrimitiveFunctionNode
+from .visualizations import asgTopoSortWithDerivations
+import unittest
+
+class TestASGGraphSerialization(unittest.TestCase):
+    def typecheckSource(self, source: bytes) -> ASGNode:
+        analyzed, typecheckingErrors = expandAndTypecheckSourceString(source.decode('utf-8'), 'test.sysmel')
+        self.assertEqual(typecheckingErrors, [])
+        return analyzed
+
+    def testEncodeDecode(self):
+        analyzed = self.typecheckSource(b':f(:(Int32)x :: Int32) := (x + 1i32) * 2i32. f(42i32). if: true then: 1i32 else: 2i32')
+        topLevelEnvironment = ASGTopLevelTargetEnvironment.getForTarget(DefaultCompilationTarget)
+        encodedGraph = encodeASGGraph([analyzed], topLevelEnvironment)
+        decodedGraph, = decodeASGGraph(encodedGraph, topLevelEnvironment)
+        self.assertIsNot(decodedGraph, analyzed)
+        self.assertTrue(decodedGraph.unificationEquals(analyzed))
+        self.assertEqual(encodeASGGraph([decodedGraph], topLevelEnvironment), encodedGraph)
+
+        # The primitives are shared with the environment instead of being copied.
+        stableValues = set(topLevelEnvironment.getStableValueNames().values())
+        primitiveFunctions = [node for node in asgTopoSortWithDerivations(decodedGraph) if isinstance(node, ASGLiteralPrimitiveFunctionNode)]
+        self.assertNotEqual(primitiveFunctions, [])
+        self.assertTrue(all(primitiveFunction in stableValues for primitiveFunction in primitiveFunctions))
+
+    def testPrimitiveImplementationsRequireEnvironment(self):
+        analyzed = self.typecheckSource(b'1i32 + 2i32')
+        with self.assertRaises(ASGGraphUnsupportedValue):
+            encodeASGGraph([analyzed])
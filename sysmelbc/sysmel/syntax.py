@@ -1,5 +1,8 @@
 from .mop import *
 from .parsetree import *
+from .parser import ParserState, parseTopLevelExpression
+from .scanner import scanSourceCode
+import sys
 
 class ASGSyntaxNode(ASGNode):
     sourceDerivation = ASGNodeSourceDerivationAttribute()
@@ -361,3 +364,177 @@ class ASGParseTreeFrontEnd(ParseTreeVisitor):
 
     def visitTupleNode(self, node: ParseTreeTupleNode):
         return ASGSyntaxTupleNode(ASGNodeSourceCodeDerivation(node.sourcePosition), self.transformNodesWithoutSequencing(node.elements), syntacticPredecessor = self.lastVisitedNode)
+
+class ASGSyntaxParserBuilder(ParseTreeBuilder):
+    ## Builds the same syntax ASG as ASGParseTreeFrontEnd directly during the parsing.
+    def __init__(self) -> None:
+        self.errorNodes: list[ASGSyntaxErrorNode] = []
+
+    def errorNode(self, sourcePosition: SourcePosition, message: str):
+        errorNode = ASGSyntaxErrorNode(ASGNodeSourceCodeDerivation(sourcePosition), message, [])
+        self.errorNodes.append(errorNode)
+        return errorNode
+
+    def applicationNode(self, sourcePosition: SourcePosition, functional, arguments: list, kind: int):
+        return ASGSyntaxApplicationNode(ASGNodeSourceCodeDerivation(sourcePosition), functional, arguments, kind)
+
+    def assignmentNode(self, sourcePosition: SourcePosition, store, value):
+        return ASGSyntaxAssignmentNode(ASGNodeSourceCodeDerivation(sourcePosition), store, value)
+
+    def bindPatternNode(self, sourcePosition: SourcePosition, pattern, value):
+        return ASGSyntaxBindPatternNode(ASGNodeSourceCodeDerivation(sourcePosition), pattern, value, allowsRebind = True)
+
+    def binaryExpressionSequenceNode(self, sourcePosition: SourcePosition, elements: list):
+        return ASGSyntaxBinaryExpressionSequenceNode(ASGNodeSourceCodeDerivation(sourcePosition), elements)
+
+    def bindableNameNode(self, sourcePosition: SourcePosition, typeExpression, nameExpression, isImplicit: bool, isExistential: bool, isVariadic: bool, isMutable: bool, hasPostTypeExpression: bool):
+        return ASGSyntaxBindableNameNode(ASGNodeSourceCodeDerivation(sourcePosition), typeExpression, nameExpression, isImplicit, isExistential, isVariadic, isMutable, hasPostTypeExpression)
+
+    def blockNode(self, sourcePosition: SourcePosition, functionType, body):
+        return ASGSyntaxBlockNode(ASGNodeSourceCodeDerivation(sourcePosition), functionType, body)
+
+    def cascadeMessageNode(self, sourcePosition: SourcePosition, selector, arguments: list):
+        return ASGSyntaxCascadeMessageNode(ASGNodeSourceCodeDerivation(sourcePosition), selector, arguments)
+
+    def dictionaryNode(self, sourcePosition: SourcePosition, elements: list):
+        ## ASGParseTreeFrontEnd sequences the dictionary elements. Each element is the syntactic predecessor of the
+        ## first node lowered from the next element, and the last element is the predecessor of the dictionary.
+        sequencedElements = elements[:1]
+        for i in range(1, len(elements)):
+            sequencedElements.append(self.withSyntacticPredecessorOfFirstLoweredNode(elements[i], sequencedElements[i - 1]))
+        return ASGSyntaxDictionaryNode(ASGNodeSourceCodeDerivation(sourcePosition), sequencedElements, syntacticPredecessor = sequencedElements[-1] if sequencedElements else None)
+
+    def functionalDependentTypeNode(self, sourcePosition: SourcePosition, argumentPattern, resultType):
+        return ASGSyntaxFunctionalDependentTypeNode(ASGNodeSourceCodeDerivation(sourcePosition), argumentPattern, resultType)
+
+    def identifierReferenceNode(self, sourcePosition: SourcePosition, value: str):
+        return ASGSyntaxIdentifierReferenceNode(ASGNodeSourceCodeDerivation(sourcePosition), value)
+
+    def lexicalBlockNode(self, sourcePosition: SourcePosition, body):
+        return ASGSyntaxLexicalBlockNode(ASGNodeSourceCodeDerivation(sourcePosition), body)
+
+    def literalCharacterNode(self, sourcePosition: SourcePosition, value: int):
+        return ASGSyntaxLiteralCharacterNode(ASGNodeSourceCodeDerivation(sourcePosition), value)
+
+    def literalFloatNode(self, sourcePosition: SourcePosition, value: float):
+        return ASGSyntaxLiteralFloatNode(ASGNodeSourceCodeDerivation(sourcePosition), value)
+
+    def literalIntegerNode(self, sourcePosition: SourcePosition, value: int):
+        return ASGSyntaxLiteralIntegerNode(ASGNodeSourceCodeDerivation(sourcePosition), value)
+
+    def literalSymbolNode(self, sourcePosition: SourcePosition, value: str):
+        return ASGSyntaxLiteralSymbolNode(ASGNodeSourceCodeDerivation(sourcePosition), value)
+
+    def literalStringNode(self, sourcePosition: SourcePosition, value: str):
+        return ASGSyntaxLiteralStringNode(ASGNodeSourceCodeDerivation(sourcePosition), value)
+
+    def messageCascadeNode(self, sourcePosition: SourcePosition, receiver, messages: list):
+        return ASGSyntaxMessageCascadeNode(ASGNodeSourceCodeDerivation(sourcePosition), receiver, messages)
+
+    def messageSendNode(self, sourcePosition: SourcePosition, receiver, selector, arguments: list):
+        return ASGSyntaxMessageSendNode(ASGNodeSourceCodeDerivation(sourcePosition), receiver, selector, arguments)
+
+    def quoteNode(self, sourcePosition: SourcePosition, term):
+        return ASGSyntaxQuoteNode(ASGNodeSourceCodeDerivation(sourcePosition), term)
+
+    def quasiQuoteNode(self, sourcePosition: SourcePosition, term):
+        return ASGSyntaxQuasiQuoteNode(ASGNodeSourceCodeDerivation(sourcePosition), term)
+
+    def quasiUnquoteNode(self, sourcePosition: SourcePosition, term):
+        return ASGSyntaxQuasiUnquoteNode(ASGNodeSourceCodeDerivation(sourcePosition), term)
+
+    def sequenceNode(self, sourcePosition: SourcePosition, elements: list):
+        return ASGSyntaxSequenceNode(ASGNodeSourceCodeDerivation(sourcePosition), elements)
+
+    def spliceNode(self, sourcePosition: SourcePosition, term):
+        return ASGSyntaxSpliceNode(ASGNodeSourceCodeDerivation(sourcePosition), term)
+
+    def tupleNode(self, sourcePosition: SourcePosition, elements: list):
+        return ASGSyntaxTupleNode(ASGNodeSourceCodeDerivation(sourcePosition), elements)
+
+    def sourcePositionOf(self, node: ASGSyntaxNode) -> SourcePosition:
+        return node.sourceDerivation.sourcePosition
+
+    def isErrorNode(self, node: ASGSyntaxNode) -> bool:
+        return isinstance(node, ASGSyntaxErrorNode)
+
+    def isFunctionalDependentTypeNode(self, node: ASGSyntaxNode) -> bool:
+        return isinstance(node, ASGSyntaxFunctionalDependentTypeNode)
+
+    def asMessageSendCascadeReceiverAndFirstMessage(self, node: ASGSyntaxNode):
+        if isinstance(node, ASGSyntaxMessageSendNode):
+            return node.receiver, self.cascadeMessageNode(self.sourcePositionOf(node), node.selector, node.arguments)
+        elif isinstance(node, ASGSyntaxBinaryExpressionSequenceNode):
+            assert len(node.elements) >= 3
+            cascadeMessage = self.cascadeMessageNode(self.sourcePositionOf(node), node.elements[-2], [node.elements[-1]])
+            if len(node.elements) == 3:
+                return node.elements[0], cascadeMessage
+            return self.binaryExpressionSequenceNode(self.sourcePositionOf(node), node.elements[:-2]), cascadeMessage
+        return node, None
+
+    def withSyntacticPredecessorOfFirstLoweredNode(self, node: ASGSyntaxNode, predecessor: ASGSyntaxNode) -> ASGSyntaxNode:
+        ## Only the first node lowered without children keeps the predecessor, the lowering of bindable names drops it.
+        ## The nodes are immutable, so the path leading into that node is rebuilt with the predecessor.
+        if isinstance(node, ASGSyntaxBindableNameNode):
+            return node
+
+        constructionAttributes = node.__class__.__asgConstructionAttributes__
+        constructionValues = node.getAllConstructionAttributes()
+        for i in range(len(constructionAttributes)):
+            if constructionAttributes[i].isSyntacticPredecessorAttribute():
+                continue
+
+            value = constructionValues[i]
+            if isinstance(value, tuple) and len(value) != 0:
+                firstChild = value[0]
+            elif isinstance(value, ASGNode):
+                firstChild = value
+            else:
+                continue
+
+            ## A dictionary with a single element is also preceded by the rebuilt element.
+            sequencedFirstChild = self.withSyntacticPredecessorOfFirstLoweredNode(firstChild, predecessor)
+            for j in range(len(constructionAttributes)):
+                if constructionValues[j] is firstChild and constructionAttributes[j].isSyntacticPredecessorAttribute():
+                    constructionValues[j] = sequencedFirstChild
+            if isinstance(value, tuple):
+                constructionValues[i] = (sequencedFirstChild,) + value[1:]
+            else:
+                constructionValues[i] = sequencedFirstChild
+            return node.__class__(*constructionValues)
+
+        for i in range(len(constructionAttributes)):
+            if constructionAttributes[i].isSyntacticPredecessorAttribute():
+                constructionValues[i] = predecessor
+        sequencedNode = node.__class__(*constructionValues)
+        if isinstance(node, ASGSyntaxErrorNode):
+            self.replaceErrorNode(node, sequencedNode)
+        return sequencedNode
+
+    def replaceErrorNode(self, oldErrorNode: ASGSyntaxErrorNode, newErrorNode: ASGSyntaxErrorNode):
+        for i in range(len(self.errorNodes) - 1, -1, -1):
+            if self.errorNodes[i] is oldErrorNode:
+                self.errorNodes[i] = newErrorNode
+                return
+
+    def errorMark(self) -> int:
+        return len(self.errorNodes)
+
+    def errorsSince(self, mark: int) -> tuple:
+        return tuple(self.errorNodes[mark:])
+
+    def restoreErrorMark(self, mark: int):
+        del self.errorNodes[mark:]
+
+    def addErrors(self, errors: tuple):
+        self.errorNodes += errors
+
+def parseSourceCodeIntoSyntax(sourceCode: SourceCode, memoize: bool = False) -> tuple[ASGSyntaxNode, list[ASGSyntaxErrorNode]]:
+    builder = ASGSyntaxParserBuilder()
+    syntax = parseTopLevelExpression(ParserState(sourceCode, scanSourceCode(sourceCode), memoize, builder))
+    return syntax, builder.errorNodes
+
+def printSyntaxErrors(errorNodes: list[ASGSyntaxErrorNode]) -> bool:
+    for errorNode in errorNodes:
+        sys.stderr.write('%s: %s\n' % (str(errorNode.sourceDerivation.sourcePosition), errorNode.message))
+    return len(errorNodes) == 0
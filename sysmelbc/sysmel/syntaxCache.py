@@ -0,0 +1,253 @@
+from .mop import *
+from .syntax import *
+from .scanner import readSourceCodeFileNamed
+import array
+import hashlib
+import marshal
+import os.path
+import struct
+import sys
+import tempfile
+
+def syntaxCacheFourCC(cc):
+    assert len(cc) == 4
+    return ord(cc[0]) | (ord(cc[1]) << 8) | (ord(cc[2]) << 16) | (ord(cc[3]) << 24)
+
+SyntaxCacheMagic = syntaxCacheFourCC('SYNC')
+SyntaxCacheVersion = 1
+SyntaxCacheHeaderFormat = '<IIII'
+SyntaxCacheHeaderSize = struct.calcsize(SyntaxCacheHeaderFormat)
+
+## Tags of the attribute values in the code stream.
+SyntaxCacheValueNone = 0
+SyntaxCacheValueConstant = 1
+SyntaxCacheValueNode = 2
+SyntaxCacheValueNodes = 3
+SyntaxCacheValueSourceDerivation = 4
+
+## The modules that take part on producing the syntax ASG. Their source code is part of the cache key,
+## so editing the front-end invalidates the cached entries.
+SyntaxCacheFrontEndModules = ['scanner.py', 'parser.py', 'parsetree.py', 'mop.py', 'syntax.py', 'syntaxCache.py']
+
+class SyntaxCacheUnsupportedValue(Exception):
+    pass
+
+def encodeSyntaxASG(rootNode: ASGNode) -> bytes:
+    classIndices = {}
+    classNames = []
+    constantIndices = {}
+    constants = []
+    nodeIndices = {}
+    codes = array.array('q')
+
+    def encodeConstant(value):
+        key = (type(value), value)
+        index = constantIndices.get(key, None)
+        if index is None:
+            index = len(constants)
+            constantIndices[key] = index
+            constants.append(value)
+        codes.append(SyntaxCacheValueConstant)
+        codes.append(index)
+
+    def encodeValue(value):
+        if value is None:
+            codes.append(SyntaxCacheValueNone)
+        elif isinstance(value, ASGNode):
+            codes.append(SyntaxCacheValueNode)
+            codes.append(nodeIndices[value])
+        elif isinstance(value, tuple):
+            codes.append(SyntaxCacheValueNodes)
+            codes.append(len(value))
+            for element in value:
+                codes.append(nodeIndices[element])
+        elif isinstance(value, ASGNodeSourceCodeDerivation):
+            sourcePosition = value.sourcePosition
+            if not isinstance(sourcePosition, SourcePosition):
+                raise SyntaxCacheUnsupportedValue(value)
+            codes.append(SyntaxCacheValueSourceDerivation)
+            codes.append(sourcePosition.startIndex)
+            codes.append(sourcePosition.endIndex)
+        elif type(value) in (bool, int, float, str):
+            encodeConstant(value)
+        else:
+            raise SyntaxCacheUnsupportedValue(value)
+
+    # Emit the nodes in post-order, so that the inputs of a node are decoded before it.
+    pendingNodes = [(rootNode, False)]
+    while pendingNodes:
+        node, inputsAreEncoded = pendingNodes.pop()
+        if node in nodeIndices:
+            continue
+
+        if not inputsAreEncoded:
+            pendingNodes.append((node, True))
+            for attribute in reversed(node.__class__.__asgConstructionAttributes__):
+                value = attribute.loadValueFrom(node)
+                if isinstance(value, ASGNode):
+                    pendingNodes.append((value, False))
+                elif isinstance(value, tuple):
+                    for element in reversed(value):
+                        pendingNodes.append((element, False))
+            continue
+
+        nodeClass = node.__class__
+        classIndex = classIndices.get(nodeClass, None)
+        if classIndex is None:
+            classIndex = len(classNames)
+            classIndices[nodeClass] = classIndex
+            classNames.append((nodeClass.__module__, nodeClass.__qualname__))
+
+        codes.append(classIndex)
+        for attribute in nodeClass.__asgConstructionAttributes__:
+            encodeValue(attribute.loadValueFrom(node))
+        nodeIndices[node] = len(nodeIndices)
+
+    if sys.byteorder != 'little':
+        codes.byteswap()
+
+    tables = marshal.dumps((classNames, constants))
+    return struct.pack(SyntaxCacheHeaderFormat, SyntaxCacheMagic, SyntaxCacheVersion, len(tables), len(codes)) + tables + codes.tobytes()
+
+def decodeSyntaxASG(data: bytes, sourceCode: SourceCode) -> ASGNode:
+    magic, version, tablesSize, codeCount = struct.unpack_from(SyntaxCacheHeaderFormat, data)
+    if magic != SyntaxCacheMagic or version != SyntaxCacheVersion:
+        raise ValueError('Unsupported syntax cache entry.')
+
+    classNames, constants = marshal.loads(data[SyntaxCacheHeaderSize:SyntaxCacheHeaderSize + tablesSize])
+    classes = [getattr(sys.modules[moduleName], className) for moduleName, className in classNames]
+    codes = array.array('q')
+    codes.frombytes(data[SyntaxCacheHeaderSize + tablesSize:])
+    if sys.byteorder != 'little':
+        codes.byteswap()
+    assert len(codes) == codeCount
+
+    nodes = []
+    i = 0
+    while i < codeCount:
+        nodeClass = classes[codes[i]]
+        i += 1
+
+        arguments = []
+        for attributeIndex in range(len(nodeClass.__asgConstructionAttributes__)):
+            tag = codes[i]
+            if tag == SyntaxCacheValueNode:
+                arguments.append(nodes[codes[i + 1]])
+                i += 2
+            elif tag == SyntaxCacheValueConstant:
+                arguments.append(constants[codes[i + 1]])
+                i += 2
+            elif tag == SyntaxCacheValueSourceDerivation:
+                arguments.append(ASGNodeSourceCodeDerivation(SourcePosition(sourceCode, codes[i + 1], codes[i + 2])))
+                i += 3
+            elif tag == SyntaxCacheValueNodes:
+                elementCount = codes[i + 1]
+                arguments.append(tuple(nodes[nodeIndex] for nodeIndex in codes[i + 2:i + 2 + elementCount]))
+                i += 2 + elementCount
+            else:
+                assert tag == SyntaxCacheValueNone
+                arguments.append(None)
+                i += 1
+
+        nodes.append(nodeClass(*arguments))
+
+    return nodes[-1]
+
+def computeSyntaxCacheCompilerVersion(compilerVersion: str) -> bytes:
+    digest = hashlib.sha256()
+    digest.update(compilerVersion.encode('utf-8'))
+    digest.update(b'\0%d\0' % marshal.version)
+    moduleDirectory = os.path.dirname(__file__)
+    for moduleName in SyntaxCacheFrontEndModules:
+        with open(os.path.join(moduleDirectory, moduleName), 'rb') as f:
+            digest.update(f.read())
+    return digest.digest()
+
+class ASGSyntaxCache:
+    def __init__(self, cacheDirectory: str, compilerVersion: str) -> None:
+        self.cacheDirectory = cacheDirectory
+        self.compilerVersionDigest = computeSyntaxCacheCompilerVersion(compilerVersion)
+        self.hitCount = 0
+        self.missCount = 0
+
+    def entryFileNameFor(self, sourceCode: SourceCode) -> str:
+        digest = hashlib.sha256()
+        digest.update(struct.pack('<I', SyntaxCacheVersion))
+        digest.update(self.compilerVersionDigest)
+        digest.update(sourceCode.text)
+        key = digest.hexdigest()
+        return os.path.join(self.cacheDirectory, key[:2], key[2:] + '.asg')
+
+    def load(self, sourceCode: SourceCode) -> ASGNode | None:
+        try:
+            with open(self.entryFileNameFor(sourceCode), 'rb') as f:
+                data = f.read()
+            node = decodeSyntaxASG(data, sourceCode)
+        except (OSError, ValueError, EOFError, KeyError, AttributeError, IndexError, struct.error):
+            self.missCount += 1
+            return None
+
+        self.hitCount += 1
+        return node
+
+    def store(self, sourceCode: SourceCode, node: ASGNode) -> bool:
+        try:
+            data = encodeSyntaxASG(node)
+        except SyntaxCacheUnsupportedValue:
+            return False
+
+        # Write into a temporary file and rename it, so that concurrent builds never see partial entries.
+        entryFileName = self.entryFileNameFor(sourceCode)
+        entryDirectory = os.path.dirname(entryFileName)
+        try:
+            os.makedirs(entryDirectory, exist_ok = True)
+            with tempfile.NamedTemporaryFile(dir = entryDirectory, delete = False) as f:
+                f.write(data)
+            os.replace(f.name, entryFileName)
+        except OSError:
+            return False
+        return True
+
+def findLoadFileOnceTargets(asgSyntax: ASGNode) -> list[str]:
+    ## Only the top-level loadFileOnce: statements with a literal file name are known before the expansion.
+    if not isinstance(asgSyntax, ASGSyntaxSequenceNode):
+        return []
+
+    targets = []
+    for element in asgSyntax.elements:
+        if isinstance(element, ASGSyntaxMessageSendNode) and element.receiver is None \
+            and isinstance(element.selector, ASGSyntaxLiteralSymbolNode) and element.selector.value == 'loadFileOnce:' \
+            and len(element.arguments) == 1 and isinstance(element.arguments[0], ASGSyntaxLiteralStringNode):
+            targets.append(element.arguments[0].value)
+    return targets
+
+WorkerSyntaxCaches = {}
+
+def parseSourceFileIntoEncodedSyntax(fileName: str, cacheDirectory: str | None, compilerVersion: str) -> tuple[SourceCode, bytes | None, list[str]]:
+    ## Runs in a worker process. Returns None on parse errors, so that the caller reports them in order.
+    sourceCode = readSourceCodeFileNamed(fileName)
+    syntaxCache = None
+    if cacheDirectory is not None:
+        syntaxCacheKey = (cacheDirectory, compilerVersion)
+        syntaxCache = WorkerSyntaxCaches.get(syntaxCacheKey, None)
+        if syntaxCache is None:
+            syntaxCache = ASGSyntaxCache(cacheDirectory, compilerVersion)
+            WorkerSyntaxCaches[syntaxCacheKey] = syntaxCache
+
+    asgSyntax = None
+    if syntaxCache is not None:
+        asgSyntax = syntaxCache.load(sourceCode)
+
+    if asgSyntax is None:
+        asgSyntax, syntaxErrors = parseSourceCodeIntoSyntax(sourceCode)
+        if len(syntaxErrors) != 0:
+            return sourceCode, None, []
+
+        if syntaxCache is not None:
+            syntaxCache.store(sourceCode, asgSyntax)
+
+    try:
+        encodedSyntax = encodeSyntaxASG(asgSyntax)
+    except SyntaxCacheUnsupportedValue:
+        encodedSyntax = None
+    return sourceCode, encodedSyntax, findLoadFileOnceTargets(asgSyntax)
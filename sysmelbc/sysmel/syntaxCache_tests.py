@@ -0,0 +1,57 @@
+from .syntaxCache import *
+from .parser import parseSourceCode
+import tempfile
+import unittest
+
+class TestSyntaxCache(unittest.TestCase):
+    def parseIntoSyntax(self, sourceCode: SourceCode) -> ASGNode:
+        return ASGParseTreeFrontEnd().visitNode(parseSourceCode(sourceCode))
+
+    def testEncodeDecode(self):
+        sourceCode = SourceCode(None, '<string>', 'sysmel', b'let f := {:(Int32)x :: Int32 | x + 1}. f(42). #[1. 2. $a. "Hello"]')
+        syntax = self.parseIntoSyntax(sourceCode)
+        encodedSyntax = encodeSyntaxASG(syntax)
+        decodedSyntax = decodeSyntaxASG(encodedSyntax, sourceCode)
+        self.assertIsNot(decodedSyntax, syntax)
+        self.assertEqual(encodeSyntaxASG(decodedSyntax), encodedSyntax)
+        self.assertIs(decodedSyntax.sourceDerivation.getSourcePosition().sourceCode, sourceCode)
+
+    def testDirectSyntaxMatchesParseTreeLowering(self):
+        for source in [b'a := 1. b := a + 2', b'#{a: 1. b + c : 2. #{d: 3}: e}', b'x foo; bar: 1; + 2', b'a, ]. (', b'{:x :y | x + y}']:
+            sourceCode = SourceCode(None, '<string>', 'sysmel', source)
+            for memoize in [False, True]:
+                syntax, errorNodes = parseSourceCodeIntoSyntax(sourceCode, memoize)
+                parseTree = parseSourceCode(sourceCode, memoize)
+                errorVisitor = ParseTreeErrorVisitor()
+                errorVisitor.visitNode(parseTree)
+                self.assertEqual(encodeSyntaxASG(syntax), encodeSyntaxASG(ASGParseTreeFrontEnd().visitNode(parseTree)))
+                self.assertEqual([(str(node.sourceDerivation.sourcePosition), node.message) for node in errorNodes], [(str(node.sourcePosition), node.message) for node in errorVisitor.errorNodes])
+
+    def testDictionaryElementsAreNotMutated(self):
+        builder = ASGSyntaxParserBuilder()
+        sourcePosition = EmptySourcePosition.getSingleton()
+        firstElement = builder.literalIntegerNode(sourcePosition, 1)
+        secondKey = builder.identifierReferenceNode(sourcePosition, 'b')
+        secondElement = builder.tupleNode(sourcePosition, [secondKey, builder.literalIntegerNode(sourcePosition, 2)])
+        dictionary = builder.dictionaryNode(sourcePosition, [firstElement, secondElement])
+
+        ## The first leaf lowered from the second element is rebuilt with its predecessor.
+        self.assertIs(dictionary.elements[0], firstElement)
+        self.assertIsNot(dictionary.elements[1], secondElement)
+        self.assertIs(dictionary.elements[1].elements[0].syntacticPredecessor, firstElement)
+        self.assertIs(dictionary.elements[1].elements[1], secondElement.elements[1])
+        self.assertIs(dictionary.syntacticPredecessor, dictionary.elements[1])
+        self.assertIsNone(secondKey.syntacticPredecessor)
+
+    def testLoadAndStore(self):
+        with tempfile.TemporaryDirectory() as cacheDirectory:
+            sourceCode = SourceCode(None, '<string>', 'sysmel', b'a := 1. b := a + 2')
+            cache = ASGSyntaxCache(cacheDirectory, '0.1')
+            self.assertIsNone(cache.load(sourceCode))
+            self.assertTrue(cache.store(sourceCode, self.parseIntoSyntax(sourceCode)))
+            self.assertIsNotNone(cache.load(sourceCode))
+            self.assertEqual((cache.hitCount, cache.missCount), (1, 1))
+
+            editedSourceCode = SourceCode(None, '<string>', 'sysmel', b'a := 1. b := a + 3')
+            self.assertIsNone(cache.load(editedSourceCode))
+            self.assertIsNone(ASGSyntaxCache(cacheDirectory, '0.2').load(sourceCode))
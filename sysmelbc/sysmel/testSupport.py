@@ -0,0 +1,18 @@
+from .analysis import expandAndTypecheck
+from .environment import makeScriptAnalysisEnvironment
+from .module import Module
+from .mop import ASGNode
+from .parsetree import SourceCode
+from .syntax import parseSourceCodeIntoSyntax
+from .target import DefaultCompilationTarget
+
+## The tests and the benchmarks analyze standalone scripts without a front-end driver.
+def expandAndTypecheckSyntax(asgSyntax: ASGNode, scriptPath: str, module: Module = None):
+    if module is None:
+        module = Module('script', DefaultCompilationTarget)
+    environment = makeScriptAnalysisEnvironment(module.target, module, asgSyntax.sourceDerivation.getSourcePosition(), scriptPath, None)
+    return expandAndTypecheck(environment, asgSyntax)
+
+def expandAndTypecheckSourceString(sourceText: str, sourceName: str = '<string>', module: Module = None):
+    asgSyntax, syntaxErrors = parseSourceCodeIntoSyntax(SourceCode(None, sourceName, 'sysmel', sourceText.encode('utf-8')))
+    return expandAndTypecheckSyntax(asgSyntax, sourceName, module)
@@ -1,17 +1,7 @@
 from .mop import *
 
 def asgTopoSortTraversal(aBlock, node: ASGNode):
-    visited = set()
-    def visitNode(node):
-        if node in visited:
-            return
-        
-        visited.add(node)
-        for dependency in node.allDependencies():
-            visitNode(dependency)
-        aBlock(node)
-
-    visitNode(node)
+    asgDepthFirstPostOrderDo(node, lambda node: node.allDependencies(), aBlock)
 
 def asgTopoSort(node: ASGNode):
     sorted = []
@@ -60,20 +50,14 @@ def asgToDotFileNamed(node: ASGNode, filename: str):
     with open(filename, "w") as f:
         f.write(dotData)
 
-def asgTopoSortTraversalWithDerivations(aBlock, node: ASGNode):
-    visited = set()
-    def visitNode(node):
-        if node in visited:
-            return
-        
-        visited.add(node)
-        for derivation in node.allDerivationNodes():
-            visitNode(derivation)
-        for dependency in node.allDependencies():
-            visitNode(dependency)
-        aBlock(node)
+def asgDependenciesWithDerivations(node: ASGNode):
+    for derivation in node.allDerivationNodes():
+        yield derivation
+    for dependency in node.allDependencies():
+        yield dependency
 
-    visitNode(node)
+def asgTopoSortTraversalWithDerivations(aBlock, node: ASGNode):
+    asgDepthFirstPostOrderDo(node, asgDependenciesWithDerivations, aBlock)
 
 def asgTopoSortWithDerivations(node: ASGNode):
     sorted = []
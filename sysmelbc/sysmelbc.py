@@ -25,6 +25,17 @@ class FrontEndDriver:
         self.compilationTarget = DefaultCompilationTarget
         self.sdvmModule = None
         self.keepIntermediates = False
+        self.syntaxCacheDirectory = None
+        self.syntaxCache = None
+        self.parallelJobCount = 1
+        self.parsingExecutor = None
+        self.pendingParsingJobs = {}
+        self.printGVNStatistics = False
+        self.printInstantiationStatistics = False
+        self.evaluateWithPython = False
+        self.profileEvaluation = False
+        self.profileSamplingInterval = None
+        self.profileCollapsedStacksFileName = None
         if sys.platform.startswith('win32'):
             self.sdvmPath = os.path.join(self.topFolder, 'build/bin/sdvm.exe')
         else:
@@ -44,12 +55,23 @@ class FrontEndDriver:
 -c                          Emits object file.
 -o                          Sets the output file name.
 -keep-intermediate          Keep the intermediate files.
+-cache-dir <dir>            Caches the parsed syntax of the source files in the specified directory.
+-j <count>                  Parses the source files with the specified number of parallel jobs.
+-gvn-stats                  Prints the statistics of the global value numbering tables.
+-instantiation-stats        Prints the statistics of the dependent function type instantiation cache.
+-python-eval                Evaluates the top-level scripts with generated Python code instead of the interpreter.
+-profile-eval               Prints the per node kind and per source line profile of the interpreted evaluation.
+-profile-sampling <ms>      Profiles the interpreted evaluation by sampling it with the specified interval.
+-profile-collapsed <file>   Writes the interpreted evaluation profile as collapsed stacks for flame graphs.
 -asg                        Use ASG based pipeline.
 """
         )
 
+    def getVersionString(self):
+        return "0.1"
+
     def printVersion(self):
-        print("sysmelbc.py version 0.1")
+        print("sysmelbc.py version " + self.getVersionString())
 
     def parseCommandLineArguments(self, argv):
         i = 1
@@ -69,6 +91,34 @@ class FrontEndDriver:
                     self.verbose = True
                 elif arg in ['-keep-intermediate']:
                     self.keepIntermediates = True
+                elif arg in ['-gvn-stats']:
+                    self.printGVNStatistics = True
+                elif arg in ['-instantiation-stats']:
+                    self.printInstantiationStatistics = True
+                elif arg in ['-python-eval']:
+                    self.evaluateWithPython = True
+                elif arg in ['-profile-eval']:
+                    self.profileEvaluation = True
+                elif arg in ['-profile-sampling']:
+                    if i >= len(argv):
+                        self.printHelp()
+                        return False
+
+                    try:
+                        self.profileSamplingInterval = float(argv[i]) / 1000.0
+                    except ValueError:
+                        self.printHelp()
+                        return False
+                    self.profileEvaluation = True
+                    i += 1
+                elif arg in ['-profile-collapsed']:
+                    if i >= len(argv):
+                        self.printHelp()
+                        return False
+
+                    self.profileCollapsedStacksFileName = argv[i]
+                    self.profileEvaluation = True
+                    i += 1
                 elif arg in ['-c']:
                     self.emitObjectFile = True
                 elif arg in ['-emit-sdvm']:
@@ -94,6 +144,20 @@ class FrontEndDriver:
 
                     self.moduleName = argv[i]
                     i += 1
+                elif arg in ['-cache-dir']:
+                    if i >= len(argv):
+                        self.printHelp()
+                        return False
+
+                    self.syntaxCacheDirectory = argv[i]
+                    i += 1
+                elif arg in ['-j']:
+                    if i >= len(argv) or not argv[i].isdigit():
+                        self.printHelp()
+                        return False
+
+                    self.parallelJobCount = max(1, int(argv[i]))
+                    i += 1
                 elif arg in ['-module-dir']:
                     if i >= len(argv):
                         self.printHelp()
@@ -109,21 +173,69 @@ class FrontEndDriver:
                 self.inputSourceFiles.append(arg)
         return True
 
+    def getSyntaxCache(self):
+        from sysmel.syntaxCache import ASGSyntaxCache
+        if self.syntaxCache is None and self.syntaxCacheDirectory is not None:
+            self.syntaxCache = ASGSyntaxCache(self.syntaxCacheDirectory, self.getVersionString())
+        return self.syntaxCache
+
+    def submitParsingJob(self, sourceFile):
+        from sysmel.syntaxCache import parseSourceFileIntoEncodedSyntax
+        jobKey = os.path.abspath(sourceFile)
+        if self.parsingExecutor is None or jobKey in self.pendingParsingJobs:
+            return
+
+        self.pendingParsingJobs[jobKey] = self.parsingExecutor.submit(parseSourceFileIntoEncodedSyntax, sourceFile, self.syntaxCacheDirectory, self.getVersionString())
+
+    def takeParsedSyntaxFromJob(self, sourceFile):
+        from sysmel.syntaxCache import decodeSyntaxASG
+        job = self.pendingParsingJobs.pop(os.path.abspath(sourceFile), None)
+        if job is None:
+            return None
+
+        sourceCode, encodedSyntax, loadedFileNames = job.result()
+        for loadedFileName in loadedFileNames:
+            self.submitParsingJob(os.path.join(sourceCode.directory, loadedFileName))
+
+        if encodedSyntax is None:
+            return None
+        return decodeSyntaxASG(encodedSyntax, sourceCode)
+
+    def parseSourceFileIntoSyntax(self, sourceFile):
+        from sysmel.scanner import readSourceCodeFileNamed
+        from sysmel.syntax import parseSourceCodeIntoSyntax, printSyntaxErrors
+
+        # Sources with parse errors are parsed again here, for reporting their errors in order.
+        asgSyntax = self.takeParsedSyntaxFromJob(sourceFile)
+        if asgSyntax is not None:
+            return asgSyntax
+
+        sourceCode = readSourceCodeFileNamed(sourceFile)
+        syntaxCache = self.getSyntaxCache()
+        if syntaxCache is not None:
+            asgSyntax = syntaxCache.load(sourceCode)
+            if asgSyntax is not None:
+                return asgSyntax
+
+        asgSyntax, syntaxErrors = parseSourceCodeIntoSyntax(sourceCode)
+        if not printSyntaxErrors(syntaxErrors):
+            return None
+
+        if syntaxCache is not None:
+            syntaxCache.store(sourceCode, asgSyntax)
+        return asgSyntax
+
     def parseAndTypecheckSourceFile(self, sourceFile):
-        from sysmel.parser import parseFileNamed
-        from sysmel.parsetree import ParseTreeErrorVisitor
-        from sysmel.syntax import ASGParseTreeFrontEnd
         from sysmel.analysis import expandAndTypecheck
         from sysmel.visualizations import asgToDotFileNamed, asgWithDerivationsToDotFileNamed
         from sysmel.environment import makeScriptAnalysisEnvironment
         from sysmel.mop import asgPredecessorTopoSortDo
         from sysmel.gcm import lambdaGCM
 
-        parseTree = parseFileNamed(sourceFile)
-        if not ParseTreeErrorVisitor().checkAndPrintErrors(parseTree):
+        asgSyntax = self.parseSourceFileIntoSyntax(sourceFile)
+        if asgSyntax is None:
             return False
 
-        asgSyntax = ASGParseTreeFrontEnd().visitNode(parseTree)
         asgToDotFileNamed(asgSyntax, 'asgSyntax.dot')
 
         asgAnalyzed, asgTypecheckingErrors = expandAndTypecheck(makeScriptAnalysisEnvironment(self.compilationTarget, self.module, asgSyntax.sourceDerivation.getSourcePosition(), sourceFile, self), asgSyntax)
@@ -148,20 +260,61 @@ class FrontEndDriver:
             self.module = Module(self.moduleName, self.compilationTarget)
         elif self.moduleName is not None and self.module is None:
             self.module = Module(self.moduleName, self.compilationTarget)
+        if self.parallelJobCount > 1:
+            return self.parseInParallelAndTypecheckSourceFiles()
+
         success = True
         for inputSource in self.inputSourceFiles:
             if not self.parseAndTypecheckSourceFile(inputSource):
                 success = False
         return success
 
+    def parseInParallelAndTypecheckSourceFiles(self):
+        from concurrent.futures import ProcessPoolExecutor
+
+        # The typechecking still happens in the original order, for keeping the diagnostics deterministic.
+        success = True
+        with ProcessPoolExecutor(max_workers = self.parallelJobCount) as executor:
+            self.parsingExecutor = executor
+            try:
+                for inputSource in self.inputSourceFiles:
+                    self.submitParsingJob(inputSource)
+                for inputSource in self.inputSourceFiles:
+                    if not self.parseAndTypecheckSourceFile(inputSource):
+                        success = False
+            finally:
+                self.parsingExecutor = None
+                self.pendingParsingJobs = {}
+                executor.shutdown(cancel_futures = True)
+        return success
+
     def evaluateTypecheckedSource(self, typecheckedSource):
         from sysmel.gcm import topLevelScriptGCM
         gcm = topLevelScriptGCM(typecheckedSource)
-        interpretableScript = gcm.asInterpretableInstructions()
-        scriptResult = interpretableScript.evaluateInModuleWithArguments(self.module)
+        if self.evaluateWithPython:
+            evaluableScript = gcm.asPythonFunction()
+        else:
+            evaluableScript = gcm.asInterpretableInstructions()
+        scriptResult = evaluableScript.evaluateInModuleWithArguments(self.module)
         return scriptResult
 
     def evaluateTypecheckedSources(self):
+        if not self.profileEvaluation:
+            return self.evaluateTypecheckedSourcesInOrder()
+
+        from sysmel.interpreter import ASGInterpreterProfiler
+        profiler = ASGInterpreterProfiler(self.profileSamplingInterval)
+        profiler.install()
+        try:
+            return self.evaluateTypecheckedSourcesInOrder()
+        finally:
+            profiler.uninstall()
+            sys.stderr.write(profiler.formatReport())
+            if self.profileCollapsedStacksFileName is not None:
+                with open(self.profileCollapsedStacksFileName, 'w') as f:
+                    f.write(profiler.formatCollapsedStacks())
+
+    def evaluateTypecheckedSourcesInOrder(self):
         for typecheckedSource in self.typecheckedSources:
             evalResult = self.evaluateTypecheckedSource(typecheckedSource)
             if self.verbose and evalResult is not None:
@@ -246,7 +399,27 @@ class FrontEndDriver:
         if len(self.inputSourceFiles) == 0:
             self.printHelp()
             return True
-        return self.runPipeline()    
+
+        if self.printInstantiationStatistics:
+            try:
+                return self.runPipelineWithOptionalGVNStatistics()
+            finally:
+                if self.module is not None:
+                    sys.stderr.write(self.module.dependentInstantiationCache.formatReport())
+        return self.runPipelineWithOptionalGVNStatistics()
+
+    def runPipelineWithOptionalGVNStatistics(self):
+        if not self.printGVNStatistics:
+            return self.runPipeline()
+
+        from sysmel.mop import ASGBuilderWithGVN, ASGGVNStatistics
+        statistics = ASGGVNStatistics()
+        ASGBuilderWithGVN.Statistics = statistics
+        try:
+            return self.runPipeline()
+        finally:
+            ASGBuilderWithGVN.Statistics = None
+            sys.stderr.write(statistics.formatReport())
 
 if __name__ == "__main__":
     if not FrontEndDriver().main(sys.argv):
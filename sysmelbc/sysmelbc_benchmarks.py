@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+
+import os.path
+import sys
+import tempfile
+import time
+import tracemalloc
+from sysmel.parser import parseSourceString, parseSourceCode
+from sysmel.parsetree import SourceCode, ParseTreeSequentialVisitor, ParseTreeErrorVisitor
+from sysmel.syntax import ASGParseTreeFrontEnd, parseSourceCodeIntoSyntax
+from sysmel.asg import *
+
+class ParseTreeNodeCounter(ParseTreeSequentialVisitor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.nodeCount = 0
+
+    def visitNode(self, node):
+        self.nodeCount += 1
+        return super().visitNode(node)
+
+def makeParserBenchmarkSource(elementCount: int) -> str:
+    return '\n'.join('let f%d := {:(Int32)x :: Int32 | (x + %d) * 2 max: (x, %d, "s%d") size}.' % (i, i, i, i) for i in range(elementCount))
+
+def benchmarkParseTreeMemory(elementCount: int = 5000):
+    sourceText = makeParserBenchmarkSource(elementCount)
+    tracemalloc.start()
+    parseTree = parseSourceString(sourceText)
+    allocatedBytes, peakBytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    counter = ParseTreeNodeCounter()
+    counter.visitNode(parseTree)
+    print('parse tree: %d bytes of source, %d nodes, %.1f bytes/node, peak %.1f MB' % (len(sourceText), counter.nodeCount, allocatedBytes / counter.nodeCount, peakBytes / 1e6))
+
+def measureBestTime(aBlock, repetitions: int = 5) -> float:
+    bestTime = None
+    for i in range(repetitions):
+        startTime = time.perf_counter()
+        aBlock()
+        elapsedTime = time.perf_counter() - startTime
+        if bestTime is None or elapsedTime < bestTime:
+            bestTime = elapsedTime
+    return bestTime
+
+def runWithRecursionLimit(recursionLimit: int, aBlock):
+    ## The analysis of deeply nested terms is still recursive. The other benchmarks keep the default limit, so that
+    ## a traversal that regresses into recursion fails with a RecursionError.
+    oldRecursionLimit = sys.getrecursionlimit()
+    sys.setrecursionlimit(recursionLimit)
+    try:
+        return aBlock()
+    finally:
+        sys.setrecursionlimit(oldRecursionLimit)
+
+def benchmarkSyntaxConstruction(elementCount: int = 5000):
+    sourceCode = SourceCode(None, '<benchmark>', 'sysmel', makeParserBenchmarkSource(elementCount).encode('utf-8'))
+    def parseTreePath():
+        parseTree = parseSourceCode(sourceCode)
+        ParseTreeErrorVisitor().visitNode(parseTree)
+        return ASGParseTreeFrontEnd().visitNode(parseTree)
+
+    parseTreeTime = measureBestTime(parseTreePath)
+    directTime = measureBestTime(lambda: parseSourceCodeIntoSyntax(sourceCode))
+    print('syntax construction: parse tree + error check + lowering %.3f s, direct %.3f s' % (parseTreeTime, directTime))
+
+def buildGVNBenchmarkNodes(elementCount: int):
+    builder = ASGBuilderWithGVN(None)
+    derivation = ASGNodeNoDerivation.getSingleton()
+    integerType = builder.build(ASGBaseTypeNode, derivation, 'Int32')
+    pairType = builder.build(ASGProductTypeNode, derivation, (integerType, integerType))
+    for i in range(elementCount):
+        first = builder.build(ASGLiteralIntegerNode, derivation, integerType, i % 1000)
+        second = builder.build(ASGLiteralIntegerNode, derivation, integerType, i % 100)
+        builder.build(ASGTupleNode, derivation, pairType, (first, second))
+    return builder
+
+def buildNestedGVNBenchmarkNodes(elementCount: int, depth: int):
+    builder = ASGBuilderWithGVN(None)
+    derivation = ASGNodeNoDerivation.getSingleton()
+    integerType = builder.build(ASGBaseTypeNode, derivation, 'Int32')
+    for i in range(depth):
+        builder = ASGBuilderWithGVN(builder)
+    for i in range(elementCount):
+        builder.build(ASGLiteralIntegerNode, derivation, integerType, i)
+        builder.build(ASGLiteralIntegerNode, derivation, integerType, i // 2)
+    return builder
+
+def countASGNodes(rootNode) -> int:
+    visitedNodes = set()
+    pendingNodes = [rootNode]
+    while pendingNodes:
+        node = pendingNodes.pop()
+        if node in visitedNodes:
+            continue
+        visitedNodes.add(node)
+        for attribute in node.__class__.__asgConstructionAttributes__:
+            value = attribute.loadValueFrom(node)
+            if isinstance(value, ASGNode):
+                pendingNodes.append(value)
+            elif isinstance(value, tuple):
+                pendingNodes += value
+    return len(visitedNodes)
+
+def benchmarkASGMemory(elementCount: int = 5000):
+    sourceCode = SourceCode(None, '<benchmark>', 'sysmel', makeParserBenchmarkSource(elementCount).encode('utf-8'))
+    tracemalloc.start()
+    asgSyntax, errorNodes = parseSourceCodeIntoSyntax(sourceCode)
+    allocatedBytes, peakBytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodeCount = countASGNodes(asgSyntax)
+    print('syntax asg: %d nodes, %.1f bytes/node, peak %.1f MB' % (nodeCount, allocatedBytes / nodeCount, peakBytes / 1e6))
+
+def benchmarkNodeConstructionAndGVN(elementCount: int = 20000):
+    constructionTime = measureBestTime(lambda: buildGVNBenchmarkNodes(elementCount))
+    print('node construction and GVN: %d nodes in %.3f s, %.2f us/node' % (elementCount * 3, constructionTime, constructionTime * 1e6 / (elementCount * 3)))
+
+def benchmarkNestedGVN(elementCount: int = 20000, depth: int = 16):
+    constructionTime = measureBestTime(lambda: buildNestedGVNBenchmarkNodes(elementCount, depth))
+    print('nested GVN: %d nodes at depth %d in %.3f s, %.2f us/node' % (elementCount * 2, depth, constructionTime, constructionTime * 1e6 / (elementCount * 2)))
+
+def makePipelineBenchmarkSource(elementCount: int) -> str:
+    return '\n'.join(':f%d(:(Int32)x :: Int32) := (x + %di32) * 2i32.\nf%d(%di32).' % (i, i, i, i) for i in range(elementCount))
+
+def benchmarkPipeline(elementCount: int = 300):
+    from sysmelbc import FrontEndDriver
+    with tempfile.TemporaryDirectory() as temporaryDirectory:
+        sourceFileName = os.path.join(temporaryDirectory, 'benchmark.sysmel')
+        with open(sourceFileName, 'w') as f:
+            f.write(makePipelineBenchmarkSource(elementCount))
+
+        ## The driver dumps its dot files into the working directory.
+        outputFileName = os.path.join(temporaryDirectory, 'benchmark.sdvm')
+        workingDirectory = os.getcwd()
+        os.chdir(temporaryDirectory)
+        try:
+            pipelineTime = measureBestTime(lambda: FrontEndDriver().main(['sysmelbc.py', sourceFileName, '-emit-sdvm', '-o', outputFileName]), 3)
+        finally:
+            os.chdir(workingDirectory)
+    print('pipeline: %d functions in %.3f s' % (elementCount, pipelineTime))
+
+def benchmarkSourceAnalysis(title: str, sourceText: str, unitCount: int, unitsName: str, unitName: str):
+    from sysmel.testSupport import expandAndTypecheckSyntax
+    asgSyntax, errorNodes = parseSourceCodeIntoSyntax(SourceCode(None, 'benchmark.sysmel', 'sysmel', sourceText.encode('utf-8')))
+    analysisTime = measureBestTime(lambda: expandAndTypecheckSyntax(asgSyntax, 'benchmark.sysmel'), 3)
+    print('%s: %d %s analyzed in %.3f s, %.1f us/%s' % (title, unitCount, unitsName, analysisTime, analysisTime * 1e6 / unitCount, unitName))
+
+def analyzeBenchmarkSourceLambda(sourceText: str, module = None) -> ASGLambdaNode:
+    from sysmel.testSupport import expandAndTypecheckSourceString
+    from sysmel.visualizations import asgTopoSort
+    asgAnalyzed, errors = expandAndTypecheckSourceString(sourceText, 'benchmark.sysmel', module)
+    return [node for node in asgTopoSort(asgAnalyzed) if node.isKindOf(ASGLambdaNode)][0]
+
+def makeBindingsBenchmarkSource(elementCount: int) -> str:
+    return ':v0 := 0i32.\n' + '\n'.join(':v%d := v%d.' % (i + 1, i // 2) for i in range(elementCount))
+
+def benchmarkBindings(elementCount: int = 20000):
+    benchmarkSourceAnalysis('bindings', makeBindingsBenchmarkSource(elementCount), elementCount, 'bindings', 'binding')
+
+def makeNestedArithmeticExpression(depth: int, index: int) -> str:
+    if depth == 0:
+        return 'x'
+    return '(%s + %di32) * (%s - %di32)' % (makeNestedArithmeticExpression(depth - 1, index), depth, makeNestedArithmeticExpression(depth - 1, index + 1), index)
+
+def makeOverloadsBenchmarkSource(elementCount: int, depth: int) -> str:
+    return '\n'.join(':f%d(:(Int32)x :: Int32) := %s.' % (i, makeNestedArithmeticExpression(depth, i)) for i in range(elementCount))
+
+def benchmarkOverloadResolution(elementCount: int = 50, depth: int = 4):
+    applicationCount = elementCount * 3 * ((1 << depth) - 1)
+    benchmarkSourceAnalysis('overloads', makeOverloadsBenchmarkSource(elementCount, depth), applicationCount, 'overloaded applications', 'application')
+
+def makeInstantiationsBenchmarkSource(elementCount: int) -> str:
+    return ':id(:(Type)T, :(T pointer pointer)x :: T pointer pointer) := x.\n' + '\n'.join(':f%d(:(Int32 pointer pointer)y :: Int32 pointer pointer) := id(Int32, id(Int32, id(Int32, y))).' % i for i in range(elementCount))
+
+def benchmarkDependentInstantiations(elementCount: int = 2000):
+    benchmarkSourceAnalysis('dependent instantiations', makeInstantiationsBenchmarkSource(elementCount), elementCount * 3, 'dependent applications', 'application')
+
+def makeMacrosBenchmarkSource(elementCount: int) -> str:
+    header = 'fromExternal: #C import: #printf withType: (:(Char8 pointer)format, :(CVarArg)... :: Int32).\n'
+    header += 'macroLet: #hello with: ``printf(`,`\'"Hello %d\\n", `,`\'(1i32 + 2i32)).\n'
+    return header + '\n'.join(':f%d(:(Int32)x :: Int32) := {\n    hello. hello. hello. hello.\n    x\n}.' % i for i in range(elementCount))
+
+def benchmarkMacros(elementCount: int = 500):
+    benchmarkSourceAnalysis('macros', makeMacrosBenchmarkSource(elementCount), elementCount * 4, 'macro expansions', 'expansion')
+
+def buildSubstitutionBenchmarkType(elementCount: int):
+    derivation = ASGNodeNoDerivation.getSingleton()
+    typeUniverse = ASGAnyTypeUniverseNode(derivation, 'Type')
+    arguments = []
+    substitutedType = ASGBaseTypeNode(derivation, 'Int32')
+    for i in range(elementCount):
+        argument = ASGArgumentNode(derivation, typeUniverse, i, 'T%d' % i)
+        arguments.append(argument)
+        substitutedType = ASGProductTypeNode(derivation, (substitutedType, ASGPointerTypeNode(derivation, argument)))
+    return arguments, substitutedType
+
+def benchmarkBetaSubstitution(elementCount: int = 2000):
+    from sysmel.analysis import ASGBetaSubstitutionAlgorithm, ASGBetaSubstitutionContext
+    arguments, substitutedType = buildSubstitutionBenchmarkType(elementCount)
+    replacement = ASGBaseTypeNode(ASGNodeNoDerivation.getSingleton(), 'Int64')
+    def substituteArgument(argument):
+        substitutionAlgorithm = ASGBetaSubstitutionAlgorithm(ASGBetaSubstitutionContext(), None)
+        substitutionAlgorithm.substitutionContext.setSubstitutionForNode(argument, replacement)
+        return substitutionAlgorithm.expandNode(substitutedType)
+
+    firstTime = measureBestTime(lambda: substituteArgument(arguments[0]))
+    lastTime = measureBestTime(lambda: substituteArgument(arguments[-1]))
+    print('beta substitution: %d nested types, first argument %.3f ms, last argument %.3f ms' % (elementCount, firstTime * 1e3, lastTime * 1e3))
+
+def makeInterpreterBenchmarkSource(elementCount: int) -> str:
+    return ':chain(:((:(Int32)y :: Int32))f, :(Int32)x :: Int32) := %sx%s.' % ('f(' * elementCount, ')' * elementCount)
+
+def benchmarkInterpreter(elementCount: int = 500, activationCount: int = 200):
+    from sysmel.gcm import lambdaGCM
+    from sysmel.interpreter import ASGNodeWithInterpretableInstructions
+    from sysmel.module import Module
+    module = Module('benchmark', DefaultCompilationTarget)
+    lambdaNode = analyzeBenchmarkSourceLambda(makeInterpreterBenchmarkSource(elementCount), module)
+    interpretableLambda = lambdaGCM(lambdaNode).asInterpretableInstructions()
+
+    def evaluate(useCompiledSteps: bool):
+        ASGNodeWithInterpretableInstructions.UseCompiledSteps = useCompiledSteps
+        try:
+            for i in range(activationCount):
+                interpretableLambda.evaluateInModuleWithArguments(module, abs, i)
+        finally:
+            ASGNodeWithInterpretableInstructions.UseCompiledSteps = True
+
+    instructionCount = elementCount * activationCount
+    interpreterTime = measureBestTime(lambda: evaluate(False), 3)
+    compiledTime = measureBestTime(lambda: evaluate(True), 3)
+    print('interpreter: %d instructions, dispatching loop %.3f s, %.3f us/instruction, compiled closures %.3f s, %.3f us/instruction' % (instructionCount, interpreterTime, interpreterTime * 1e6 / instructionCount, compiledTime, compiledTime * 1e6 / instructionCount))
+
+def makeCompileTimeLoopBenchmarkSource() -> str:
+    return ':sum(:(Int32)n :: Int32) := {\n    :!i := 0i32.\n    :!s := 0i32.\n    while: i < n do: {\n        s := s + i.\n    } continueWith: (i := i + 1i32).\n    s\n}.'
+
+def benchmarkCompileTimeLoop(iterationCount: int = 100000):
+    lambdaNode = analyzeBenchmarkSourceLambda(makeCompileTimeLoopBenchmarkSource())
+    iterationCountLiteral = ASGLiteralIntegerNode(ASGNodeNoDerivation.getSingleton(), lambdaNode.type.arguments[0].type, iterationCount)
+
+    generationTime = measureBestTime(lambda: lambdaNode.getCompiledPythonFunction(), 1)
+    evaluationTime = measureBestTime(lambda: lambdaNode(iterationCountLiteral), 3)
+    print('compile-time loop: Python generation %.3f s, %d iterations in %.3f s, %.2f us/iteration' % (generationTime, iterationCount, evaluationTime, evaluationTime * 1e6 / iterationCount))
+
+def benchmarkScheduledScriptCache(evaluationCount: int = 200):
+    from sysmel.testSupport import expandAndTypecheckSourceString
+    from sysmel.gcm import GlobalCodeMotionAlgorithm, topLevelScriptGCM
+    from sysmel.module import Module
+    module = Module('benchmark', DefaultCompilationTarget)
+    asgAnalyzed, errors = expandAndTypecheckSourceString(makeCompileTimeLoopBenchmarkSource(), 'benchmark.sysmel', module)
+
+    def evaluateUncached():
+        for i in range(evaluationCount):
+            GlobalCodeMotionAlgorithm(asgAnalyzed).computeForTopLevelScript().asInterpretableInstructions().evaluateInModuleWithArguments(module)
+
+    def evaluateCached():
+        for i in range(evaluationCount):
+            topLevelScriptGCM(asgAnalyzed).asInterpretableInstructions().evaluateInModuleWithArguments(module)
+
+    uncachedTime = measureBestTime(evaluateUncached, 3)
+    cachedTime = measureBestTime(evaluateCached, 3)
+    print('scheduled script cache: %d evaluations, rescheduling %.3f s, %.1f us/evaluation, cached %.3f s, %.1f us/evaluation' % (evaluationCount, uncachedTime, uncachedTime * 1e6 / evaluationCount, cachedTime, cachedTime * 1e6 / evaluationCount))
+
+def buildSequencedChainLambda(elementCount: int):
+    derivation = ASGNodeNoDerivation.getSingleton()
+    integerType = ASGBaseTypeNode(derivation, 'Int32')
+    pointerType = ASGPointerTypeNode(derivation, integerType)
+    argument = ASGArgumentNode(derivation, pointerType, 0, 'pointer')
+    entryPoint = ASGSequenceEntryNode(derivation)
+    predecessor = entryPoint
+    value = argument
+    for i in range(elementCount // 2):
+        predecessor = ASGLoadNode(derivation, integerType, argument, predecessor)
+        value = ASGTupleNode(derivation, integerType, (value, predecessor))
+        predecessor = ASGStoreNode(derivation, argument, value, predecessor)
+    exitPoint = ASGSequenceReturnNode(derivation, value, predecessor)
+    lambdaType = ASGPiNode(derivation, (argument,), pointerType)
+    return ASGLambdaNode(derivation, lambdaType, (argument,), entryPoint, 'chain', exitPoint = exitPoint)
+
+def benchmarkLongSequenceTraversals(elementCount: int = 100000):
+    from sysmel.gcm import GlobalCodeMotionAlgorithm
+    from sysmel.visualizations import asgTopoSort
+    lambdaNode = buildSequencedChainLambda(elementCount)
+    topoSortTime = measureBestTime(lambda: asgTopoSort(lambdaNode), 3)
+    gcmTime = measureBestTime(lambda: GlobalCodeMotionAlgorithm(lambdaNode).computeForLambda(), 3)
+    print('long sequences: %d sequenced nodes, topological sort %.3f s, global code motion %.3f s' % (elementCount, topoSortTime, gcmTime))
+
+Benchmarks = {
+    'parsetree': benchmarkParseTreeMemory,
+    'syntax': benchmarkSyntaxConstruction,
+    'gvn': benchmarkNodeConstructionAndGVN,
+    'nestedgvn': benchmarkNestedGVN,
+    'asgmemory': benchmarkASGMemory,
+    'pipeline': benchmarkPipeline,
+    'sequences': benchmarkLongSequenceTraversals,
+    'bindings': benchmarkBindings,
+    'overloads': benchmarkOverloadResolution,
+    'instantiations': benchmarkDependentInstantiations,
+    'substitution': lambda: runWithRecursionLimit(100000, benchmarkBetaSubstitution),
+    'macros': benchmarkMacros,
+    'interpreter': lambda: runWithRecursionLimit(100000, benchmarkInterpreter),
+    'compiletimeloop': benchmarkCompileTimeLoop,
+    'scriptcache': benchmarkScheduledScriptCache,
+}
+
+if __name__ == "__main__":
+    for benchmarkName in sys.argv[1:] or Benchmarks.keys():
+        Benchmarks[benchmarkName]()
@@ -1,6 +1,13 @@
 import unittest
 from sysmel.scanner_tests import *
 from sysmel.parser_tests import *
+from sysmel.syntaxCache_tests import *
+from sysmel.mop_tests import *
+from sysmel.serialization_tests import *
+from sysmel.analysis_tests import *
+from sysmel.persistentHashMap_tests import *
+from sysmel.interpreter_tests import *
+from sysmel.pythonBackend_tests import *
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file